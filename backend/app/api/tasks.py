@@ -3,37 +3,48 @@ from __future__ import annotations
 from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
 from sqlalchemy.orm import Session
 
+from app.core.config import load_app_config
 from app.core.database import get_db
 from app.models import RefreshTask
-from app.schemas import RefreshTaskResponse
-from app.tasks.update_indices import create_refresh_task, run_refresh
+from app.schemas import RefreshProgressResponse, RefreshTaskResponse
+from app.services.refresh_stats import load_stats_json
+from app.tasks.refresh_queue import enqueue_refresh
+from app.tasks.update_indices import create_refresh_task, get_task_progress, run_refresh
 
 router = APIRouter(prefix="/api/v1/tasks", tags=["tasks"])
 
 
-@router.post("/refresh", response_model=RefreshTaskResponse)
-def trigger_refresh(background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
-    task = create_refresh_task(db)
-    background_tasks.add_task(run_refresh, task.task_id)
+def _task_response(task: RefreshTask) -> RefreshTaskResponse:
     return RefreshTaskResponse(
         task_id=task.task_id,
         status=task.status,
         started_at=task.started_at,
         finished_at=task.finished_at,
         message=task.message,
+        stats=load_stats_json(task.stats_json),
     )
 
 
+@router.post("/refresh", response_model=RefreshTaskResponse)
+def trigger_refresh(background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+    if load_app_config().worker_mode == "queue":
+        return _task_response(enqueue_refresh(db))
+    task = create_refresh_task(db)
+    background_tasks.add_task(run_refresh, task.task_id)
+    return _task_response(task)
+
+
 @router.get("/refresh/{task_id}", response_model=RefreshTaskResponse)
 def get_refresh_task(task_id: str, db: Session = Depends(get_db)):
     task: RefreshTask | None = db.get(RefreshTask, task_id)
     if task is None:
         raise HTTPException(status_code=404, detail="Task not found")
-    return RefreshTaskResponse(
-        task_id=task.task_id,
-        status=task.status,
-        started_at=task.started_at,
-        finished_at=task.finished_at,
-        message=task.message,
-    )
+    return _task_response(task)
+
 
+@router.get("/refresh/{task_id}/progress", response_model=RefreshProgressResponse)
+def get_refresh_progress(task_id: str):
+    progress = get_task_progress(task_id)
+    if progress is None:
+        raise HTTPException(status_code=404, detail="Task progress not found")
+    return RefreshProgressResponse(task_id=task_id, **progress)
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import os
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
@@ -15,11 +16,39 @@ class AppConfig:
     percentile_high: float
     temperature_colors: dict[str, str]
     excel_path: str
+    calendar_path: str
+    index_list_cache_path: str
+    history_provider: str
+    history_record_dir: str | None
+    replay_options: dict[str, Any]
     scheduler_day_of_week: str
     scheduler_hour: int
     scheduler_minute: int
+    worker_mode: str
+    worker_lease_seconds: float
+    worker_poll_seconds: float
+    worker_max_attempts: int
     api_host: str
     api_port: int
+    upstream_limits: dict[str, dict[str, float]]
+    retry_max_attempts: int
+    retry_base_delay: float
+    retry_max_delay: float
+    retry_jitter: float
+    retry_budget: int
+    negative_cache_base_days: float
+    negative_cache_max_days: float
+    progress_ttl_hours: float
+    progress_max_entries: int
+    progress_flush_seconds: float
+    metrics_enabled: bool
+    profiling_enabled: bool
+    profiling_admin_token: str | None
+    profiling_slow_request_ms: float
+    profiling_sample_interval_ms: float
+    profiling_refresh: bool
+    profiling_dir: str
+    profiling_keep: int
 
 
 def _default_config(project_root: Path) -> dict[str, Any]:
@@ -30,6 +59,8 @@ def _default_config(project_root: Path) -> dict[str, Any]:
         "data": {
             "history_years": 5,
             "excel_path": str(project_root / "data" / "指数列表.xlsx"),
+            "calendar_path": str(project_root / "backend" / "data" / "trade_calendar.json"),
+            "index_list_cache_path": str(project_root / "backend" / "data" / "index_list.cache.pkl"),
         },
         "percentile": {
             "low": 30,
@@ -45,16 +76,60 @@ def _default_config(project_root: Path) -> dict[str, Any]:
             "hour": 18,
             "minute": 0,
         },
+        "worker": {
+            "mode": "inline",
+            "lease_seconds": 300,
+            "poll_seconds": 2,
+            "max_attempts": 3,
+        },
         "api": {
             "host": "127.0.0.1",
             "port": 8000,
         },
+        "upstream": {},
+        "retry": {
+            "max_attempts": 3,
+            "base_delay": 1.0,
+            "max_delay": 30.0,
+            "jitter": 0.5,
+            "budget": 100,
+        },
+        "negative_cache": {
+            "base_days": 1,
+            "max_days": 30,
+        },
+        "provider": {
+            "name": "akshare",
+            "record_dir": None,
+            "replay": {},
+        },
+        "progress": {
+            "ttl_hours": 24,
+            "max_entries": 100,
+            "flush_seconds": 2.0,
+        },
+        "metrics": {
+            "enabled": True,
+        },
+        "profiling": {
+            "enabled": False,
+            "admin_token": None,
+            "slow_request_ms": 1000,
+            "sample_interval_ms": 5,
+            "refresh": False,
+            "output_dir": str(project_root / "backend" / "logs" / "profiles"),
+            "keep": 50,
+        },
     }
 
 
+CONFIG_ENV_VAR = "SUMMARIZE_ETF_CONFIG"
+
+
 def load_raw_config() -> dict[str, Any]:
     project_root = Path(__file__).resolve().parents[3]
-    config_path = project_root / "config.yaml"
+    # Benchmarks and load tests point the app at a throwaway config through this variable.
+    config_path = Path(os.environ.get(CONFIG_ENV_VAR) or project_root / "config.yaml")
     defaults = _default_config(project_root)
 
     loaded: dict[str, Any] = {}
@@ -89,6 +164,18 @@ def load_app_config() -> AppConfig:
     if not Path(excel_path).is_absolute():
         excel_path = str((project_root / excel_path).resolve())
 
+    calendar_path = raw["data"]["calendar_path"]
+    if not Path(calendar_path).is_absolute():
+        calendar_path = str((project_root / calendar_path).resolve())
+
+    index_list_cache_path = raw["data"]["index_list_cache_path"]
+    if not Path(index_list_cache_path).is_absolute():
+        index_list_cache_path = str((project_root / index_list_cache_path).resolve())
+
+    profiling_dir = raw["profiling"]["output_dir"]
+    if not Path(profiling_dir).is_absolute():
+        profiling_dir = str((project_root / profiling_dir).resolve())
+
     return AppConfig(
         database_url=db_url,
         history_years=int(raw["data"]["history_years"]),
@@ -96,9 +183,37 @@ def load_app_config() -> AppConfig:
         percentile_high=float(raw["percentile"]["high"]),
         temperature_colors=raw["colors"],
         excel_path=excel_path,
+        calendar_path=calendar_path,
+        index_list_cache_path=index_list_cache_path,
+        history_provider=str(raw["provider"]["name"]),
+        history_record_dir=raw["provider"].get("record_dir") or None,
+        replay_options=dict(raw["provider"].get("replay") or {}),
         scheduler_day_of_week=str(raw["scheduler"]["day_of_week"]),
         scheduler_hour=int(raw["scheduler"]["hour"]),
         scheduler_minute=int(raw["scheduler"]["minute"]),
+        worker_mode=str(raw["worker"]["mode"]),
+        worker_lease_seconds=float(raw["worker"]["lease_seconds"]),
+        worker_poll_seconds=float(raw["worker"]["poll_seconds"]),
+        worker_max_attempts=int(raw["worker"]["max_attempts"]),
         api_host=str(raw["api"]["host"]),
         api_port=int(raw["api"]["port"]),
+        upstream_limits=dict(raw.get("upstream") or {}),
+        retry_max_attempts=int(raw["retry"]["max_attempts"]),
+        retry_base_delay=float(raw["retry"]["base_delay"]),
+        retry_max_delay=float(raw["retry"]["max_delay"]),
+        retry_jitter=float(raw["retry"]["jitter"]),
+        retry_budget=int(raw["retry"]["budget"]),
+        negative_cache_base_days=float(raw["negative_cache"]["base_days"]),
+        negative_cache_max_days=float(raw["negative_cache"]["max_days"]),
+        progress_ttl_hours=float(raw["progress"]["ttl_hours"]),
+        progress_max_entries=int(raw["progress"]["max_entries"]),
+        progress_flush_seconds=float(raw["progress"]["flush_seconds"]),
+        metrics_enabled=bool(raw["metrics"]["enabled"]),
+        profiling_enabled=bool(raw["profiling"]["enabled"]),
+        profiling_admin_token=str(raw["profiling"]["admin_token"]) if raw["profiling"].get("admin_token") else None,
+        profiling_slow_request_ms=float(raw["profiling"]["slow_request_ms"]),
+        profiling_sample_interval_ms=float(raw["profiling"]["sample_interval_ms"]),
+        profiling_refresh=bool(raw["profiling"]["refresh"]),
+        profiling_dir=profiling_dir,
+        profiling_keep=int(raw["profiling"]["keep"]),
     )
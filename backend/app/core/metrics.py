@@ -0,0 +1,289 @@
+"""In-process metrics registry rendered in the Prometheus text exposition format.
+
+Counters, gauges and histograms live in process memory behind one lock; nothing is
+pushed anywhere. ``MetricsMiddleware`` times every request by route template, and
+``instrument_engine`` attaches SQLAlchemy cursor hooks that count and time the
+queries issued while a request is being served.
+"""
+
+from __future__ import annotations
+
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from threading import Lock
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250)
+
+LabelKey = tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: LabelKey, extra: tuple[tuple[str, str], ...] = ()) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    pairs.extend(f'{n}="{_escape(v)}"' for n, v in extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...], lock: Lock):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = labels
+        self._lock = lock
+
+    def _key(self, labels: dict[str, Any]) -> LabelKey:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self._values: dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> list[str]:
+        lines = self.header()
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...], lock: Lock, buckets: tuple[float, ...]):
+        super().__init__(name, help_text, labels, lock)
+        self.buckets = tuple(sorted(buckets))
+        self._values: dict[LabelKey, list[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        slot = bisect_left(self.buckets, value)
+        with self._lock:
+            # Per-bucket counts plus [+Inf count, sum]; cumulated only when rendering.
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            state[slot] += 1
+            state[-1] += value
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return int(sum(state[:-1])) if state else 0
+
+    def sum(self, **labels) -> float:
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            return state[-1] if state else 0.0
+
+    def render(self) -> list[str]:
+        lines = self.header()
+        for key, state in sorted(self._values.items()):
+            cumulative = 0.0
+            for bound, n in zip(self.buckets + (float("inf"),), state[:-1]):
+                cumulative += n
+                le = (("le", _format_value(bound)),)
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, key, le)} {_format_value(cumulative)}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(state[-1])}")
+            lines.append(f"{self.name}_count{labels} {_format_value(cumulative)}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = Lock()
+        self._metrics: dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> Any:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labels: tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labels, self._lock))
+
+    def gauge(self, name: str, help_text: str, labels: tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, help_text, labels, self._lock))
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, help_text, labels, self._lock, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            lines: list[str] = []
+            for metric in self._metrics.values():
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUESTS = REGISTRY.counter("http_requests_total", "HTTP requests by route and status.", ("method", "route", "status"))
+HTTP_LATENCY = REGISTRY.histogram("http_request_duration_seconds", "HTTP request latency by route.", ("method", "route"))
+HTTP_IN_FLIGHT = REGISTRY.gauge("http_requests_in_flight", "HTTP requests currently being served.")
+SQL_QUERIES = REGISTRY.counter("sql_queries_total", "SQL statements executed.", ("context",))
+SQL_LATENCY = REGISTRY.histogram("sql_query_duration_seconds", "SQL statement latency.", ("context",))
+SQL_PER_REQUEST = REGISTRY.histogram(
+    "http_request_sql_queries", "SQL statements issued per HTTP request.", ("method", "route"), buckets=COUNT_BUCKETS
+)
+SQL_TIME_PER_REQUEST = REGISTRY.histogram(
+    "http_request_sql_duration_seconds", "Total SQL time per HTTP request.", ("method", "route")
+)
+REFRESH_IN_FLIGHT = REGISTRY.gauge("refresh_tasks_in_flight", "Refresh tasks currently running.")
+REFRESH_PROCESSED = REGISTRY.counter("refresh_indices_processed_total", "Indices processed by refresh.", ("outcome",))
+REFRESH_RATE = REGISTRY.gauge("refresh_processed_per_second", "Processing rate of the most recent refresh task.")
+UPSTREAM_CALLS = REGISTRY.counter("upstream_source_calls_total", "History source calls by outcome.", ("source", "outcome"))
+UPSTREAM_LATENCY = REGISTRY.histogram("upstream_source_duration_seconds", "History source call latency.", ("source",))
+CACHE_REQUESTS = REGISTRY.counter("cache_requests_total", "Cache lookups by cache and result.", ("cache", "result"))
+
+
+def record_cache(cache: str, hit: bool):
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+class _RequestSql:
+    __slots__ = ("count", "seconds", "closed")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.closed = False
+
+
+# Set per request by the middleware; the object is shared with the threadpool copy
+# of the context, so sync endpoints add to the same counters. It is closed once the
+# response body is sent; queries after that (background tasks) count as background.
+_request_sql: ContextVar[_RequestSql | None] = ContextVar("request_sql", default=None)
+
+
+def instrument_engine(engine: Engine):
+    if getattr(engine, "_metrics_instrumented", False):
+        return
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("metrics_query_start")
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        current = _request_sql.get()
+        if current is not None and current.closed:
+            current = None
+        label = "request" if current is not None else "background"
+        SQL_QUERIES.inc(context=label)
+        SQL_LATENCY.observe(elapsed, context=label)
+        if current is not None:
+            current.count += 1
+            current.seconds += elapsed
+
+    engine._metrics_instrumented = True
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware so streaming responses and background tasks are untouched.
+
+    A request is measured until its final ``http.response.body`` message is sent; Starlette
+    background tasks run after that and count toward neither its latency nor its SQL.
+    """
+
+    def __init__(self, app, skip_paths: tuple[str, ...] = ("/metrics",)):
+        self.app = app
+        self.skip_paths = skip_paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("path") in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+
+        status = {"code": 500}
+        sql = _RequestSql()
+
+        def finish():
+            if sql.closed:
+                return
+            sql.closed = True
+            elapsed = time.perf_counter() - start
+            HTTP_IN_FLIGHT.dec()
+            route = scope.get("route")
+            # Label by route template to keep cardinality bounded; unmatched paths share one label.
+            route_label = getattr(route, "path", None) or "unmatched"
+            method = scope.get("method", "")
+            HTTP_REQUESTS.inc(method=method, route=route_label, status=str(status["code"]))
+            HTTP_LATENCY.observe(elapsed, method=method, route=route_label)
+            SQL_PER_REQUEST.observe(sql.count, method=method, route=route_label)
+            SQL_TIME_PER_REQUEST.observe(sql.seconds, method=method, route=route_label)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                finish()
+
+        token = _request_sql.set(sql)
+        HTTP_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_sql.reset(token)
+            # No-op when the response completed; covers errors raised before the body was sent.
+            finish()
@@ -0,0 +1,197 @@
+"""Opt-in profiling for slow requests and refresh tasks.
+
+Requests are profiled with a stack sampler: sync endpoints run on threadpool
+workers that the middleware cannot address, so one background thread samples
+``sys._current_frames()`` of every thread while at least one profiled request is
+in flight and hands each sample to all open sessions. Concurrent requests
+therefore show up in each other's profiles. Profiles are saved as collapsed
+stacks (``frame;frame;frame count``), readable by flamegraph.pl and speedscope.
+
+Refresh tasks run on a single thread and are profiled with cProfile; the raw
+``.prof`` is saved next to a text summary sorted by cumulative time.
+
+Profiling is off unless enabled in config (every request over the latency
+threshold is kept) or a request carries ``X-Profile-Token`` matching
+``profiling.admin_token`` (that request is kept regardless of latency).
+"""
+
+from __future__ import annotations
+
+import cProfile
+import hmac
+import io
+import pstats
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator
+
+import anyio.to_thread
+
+from app.core.config import AppConfig, load_app_config
+
+PROFILE_HEADER = b"x-profile-token"
+
+
+class _SamplingSession:
+    def __init__(self):
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+
+
+class StackSampler:
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._sessions: set[_SamplingSession] = set()
+        self._thread: threading.Thread | None = None
+
+    def open(self) -> _SamplingSession:
+        session = _SamplingSession()
+        with self._lock:
+            self._sessions.add(session)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+                self._thread.start()
+        return session
+
+    def close(self, session: _SamplingSession):
+        with self._lock:
+            self._sessions.discard(session)
+
+    def _run(self):
+        own = threading.get_ident()
+        while True:
+            with self._lock:
+                if not self._sessions:
+                    self._thread = None
+                    return
+                sessions = list(self._sessions)
+            folded = []
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                folded.append(_fold(frame))
+            for session in sessions:
+                session.samples += 1
+                session.stacks.update(folded)
+            time.sleep(self.interval)
+
+
+def _fold(frame) -> str:
+    parts: list[str] = []
+    while frame is not None:
+        code = frame.f_code
+        parts.append(f"{code.co_name} ({Path(code.co_filename).name}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(parts))
+
+
+def rotate_profiles(directory: Path, keep: int):
+    files = sorted((p for p in directory.iterdir() if p.is_file()), key=lambda p: p.stat().st_mtime, reverse=True)
+    for stale in files[max(0, keep):]:
+        try:
+            stale.unlink()
+        except OSError:
+            pass
+
+
+def _slug(value: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "_", value).strip("_")[:60] or "root"
+
+
+def _profile_dir(config: AppConfig) -> Path:
+    directory = Path(config.profiling_dir)
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
+
+
+def write_folded_profile(config: AppConfig, name: str, session: _SamplingSession, header: list[str]) -> Path:
+    directory = _profile_dir(config)
+    path = directory / f"{datetime.now():%Y%m%d_%H%M%S_%f}_{name}.folded"
+    lines = [f"# {line}" for line in header]
+    lines.append(f"# samples: {session.samples}")
+    lines.extend(f"{stack} {count}" for stack, count in session.stacks.most_common())
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    rotate_profiles(directory, config.profiling_keep)
+    return path
+
+
+@contextmanager
+def profile_refresh(task_id: str) -> Iterator[None]:
+    config = load_app_config()
+    if not config.profiling_refresh:
+        yield
+        return
+
+    profiler = cProfile.Profile()
+    started = time.perf_counter()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        elapsed = time.perf_counter() - started
+        directory = _profile_dir(config)
+        stem = directory / f"{datetime.now():%Y%m%d_%H%M%S_%f}_refresh_{task_id}"
+        profiler.dump_stats(str(stem.with_suffix(".prof")))
+        summary = io.StringIO()
+        summary.write(f"refresh task {task_id}: {elapsed:.2f}s\n\n")
+        pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(60)
+        stem.with_suffix(".txt").write_text(summary.getvalue(), encoding="utf-8")
+        rotate_profiles(directory, config.profiling_keep)
+
+
+class ProfilingMiddleware:
+    def __init__(self, app, config: AppConfig | None = None):
+        self.app = app
+        self.config = config or load_app_config()
+        self.sampler = StackSampler(interval=max(0.001, self.config.profiling_sample_interval_ms / 1000.0))
+        token = self.config.profiling_admin_token
+        self._token = token.encode() if token else None
+
+    def _forced(self, scope) -> bool:
+        if self._token is None:
+            return False
+        for name, value in scope.get("headers", []):
+            if name == PROFILE_HEADER:
+                return hmac.compare_digest(value, self._token)
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        forced = self._forced(scope)
+        if not forced and not self.config.profiling_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        session = self.sampler.open()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.sampler.close(session)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if forced or elapsed_ms >= self.config.profiling_slow_request_ms:
+                route = getattr(scope.get("route"), "path", None) or scope.get("path", "")
+                query = scope.get("query_string", b"").decode("latin-1")
+                header = [
+                    f"{scope.get('method', '')} {scope.get('path', '')}{'?' + query if query else ''}",
+                    f"elapsed_ms: {elapsed_ms:.1f}",
+                    f"forced: {forced}",
+                ]
+                # Keep the file write off the event loop.
+                await anyio.to_thread.run_sync(
+                    write_folded_profile,
+                    self.config,
+                    f"req_{scope.get('method', '')}_{_slug(route)}_{int(elapsed_ms)}ms",
+                    session,
+                    header,
+                )
@@ -20,12 +20,32 @@ def ensure_runtime_schema(engine: Engine):
             conn.exec_driver_sql("ALTER TABLE index_metrics ADD COLUMN percentile_3y FLOAT")
         if metric_cols and "percentile_since_inception" not in metric_names:
             conn.exec_driver_sql("ALTER TABLE index_metrics ADD COLUMN percentile_since_inception FLOAT")
+        if metric_cols and "last_bar_date" not in metric_names:
+            conn.exec_driver_sql("ALTER TABLE index_metrics ADD COLUMN last_bar_date DATE")
         if metric_cols and "percentile" in metric_names:
             conn.exec_driver_sql(
                 "UPDATE index_metrics SET percentile_since_inception = percentile "
                 "WHERE percentile_since_inception IS NULL"
             )
 
+        task_cols = conn.exec_driver_sql("PRAGMA table_info(refresh_tasks)").fetchall()
+        task_names = {row[1] for row in task_cols}
+        if task_cols and "stats_json" not in task_names:
+            conn.exec_driver_sql("ALTER TABLE refresh_tasks ADD COLUMN stats_json TEXT")
+        if task_cols and "options_json" not in task_names:
+            conn.exec_driver_sql("ALTER TABLE refresh_tasks ADD COLUMN options_json TEXT")
+        if task_cols and "lease_owner" not in task_names:
+            conn.exec_driver_sql("ALTER TABLE refresh_tasks ADD COLUMN lease_owner VARCHAR(128)")
+        if task_cols and "lease_expires_at" not in task_names:
+            conn.exec_driver_sql("ALTER TABLE refresh_tasks ADD COLUMN lease_expires_at DATETIME")
+        if task_cols and "attempts" not in task_names:
+            conn.exec_driver_sql("ALTER TABLE refresh_tasks ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+        if task_cols and "schedule_key" not in task_names:
+            conn.exec_driver_sql("ALTER TABLE refresh_tasks ADD COLUMN schedule_key VARCHAR(32)")
+            conn.exec_driver_sql(
+                "CREATE UNIQUE INDEX IF NOT EXISTS uq_refresh_tasks_schedule_key ON refresh_tasks (schedule_key)"
+            )
+
         # Try to remove deprecated columns on modern SQLite; if unsupported, keep compatibility.
         metric_cols = conn.exec_driver_sql("PRAGMA table_info(index_metrics)").fetchall()
         metric_names = {row[1] for row in metric_cols}
@@ -4,13 +4,19 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.indices import router as indices_router
+from app.api.metrics import router as metrics_router
 from app.api.stats import router as stats_router
 from app.api.tasks import router as tasks_router
+from app.core.config import load_app_config
 from app.core.database import Base, engine
+from app.core.metrics import MetricsMiddleware, instrument_engine
+from app.core.profiling import ProfilingMiddleware
 from app.core.schema import ensure_runtime_schema
 from app.scheduler import start_scheduler, stop_scheduler
 
 app = FastAPI(title="SummarizeETF API", version="1.0.0")
+config = load_app_config()
+metrics_enabled = config.metrics_enabled
 
 app.add_middleware(
     CORSMiddleware,
@@ -19,13 +25,20 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+if metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+    instrument_engine(engine)
+if config.profiling_enabled or config.profiling_admin_token:
+    app.add_middleware(ProfilingMiddleware, config=config)
 
 
 @app.on_event("startup")
 def on_startup():
     Base.metadata.create_all(bind=engine)
     ensure_runtime_schema(engine)
-    start_scheduler()
+    # In queue mode the refresh worker owns the schedule, so it fires once however many API workers run.
+    if config.worker_mode == "inline":
+        start_scheduler()
 
 
 @app.on_event("shutdown")
@@ -41,3 +54,5 @@ def health():
 app.include_router(indices_router)
 app.include_router(stats_router)
 app.include_router(tasks_router)
+if metrics_enabled:
+    app.include_router(metrics_router)
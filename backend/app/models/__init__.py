@@ -1,7 +1,9 @@
-from app.models.entities import Index, IndexMetric, RefreshTask
+from app.models.entities import Index, IndexMetric, NegativeCacheEntry, RefreshTask, TaskProgress
 
 __all__ = [
     "Index",
     "IndexMetric",
+    "NegativeCacheEntry",
     "RefreshTask",
+    "TaskProgress",
 ]
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import date, datetime
 
-from sqlalchemy import Date, DateTime, Float, ForeignKey, Integer, String, UniqueConstraint
+from sqlalchemy import Date, DateTime, Float, ForeignKey, Integer, String, Text, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.database import Base
@@ -35,6 +35,7 @@ class IndexMetric(Base):
     high_3y: Mapped[float] = mapped_column(Float, nullable=False)
     low_3y: Mapped[float] = mapped_column(Float, nullable=False)
     avg_3y: Mapped[float] = mapped_column(Float, nullable=False)
+    last_bar_date: Mapped[date | None] = mapped_column(Date, nullable=True)
 
     index = relationship("Index", back_populates="metric")
 
@@ -47,3 +48,28 @@ class RefreshTask(Base):
     started_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
     finished_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     message: Mapped[str | None] = mapped_column(String(1024), nullable=True)
+    stats_json: Mapped[str | None] = mapped_column(Text, nullable=True)
+    options_json: Mapped[str | None] = mapped_column(Text, nullable=True)
+    lease_owner: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    lease_expires_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    schedule_key: Mapped[str | None] = mapped_column(String(32), nullable=True, unique=True)
+
+
+class NegativeCacheEntry(Base):
+    __tablename__ = "negative_cache"
+
+    index_code: Mapped[str] = mapped_column(String(32), primary_key=True)
+    failure_count: Mapped[int] = mapped_column(Integer, nullable=False, default=1)
+    reason: Mapped[str | None] = mapped_column(String(1024), nullable=True)
+    last_failed_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    next_probe_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+
+class TaskProgress(Base):
+    __tablename__ = "task_progress"
+
+    task_id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    status: Mapped[str] = mapped_column(String(32), nullable=False)
+    payload: Mapped[str] = mapped_column(Text, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
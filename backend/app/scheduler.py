@@ -1,14 +1,18 @@
 from __future__ import annotations
 
+import logging
+
 from apscheduler.schedulers.background import BackgroundScheduler
 
 from app.core.config import load_app_config
-from app.tasks.update_indices import create_and_run_refresh
+from app.tasks.update_indices import run_scheduled_refresh
+
+logger = logging.getLogger(__name__)
 
 _scheduler: BackgroundScheduler | None = None
 
 
-def start_scheduler():
+def start_scheduler(job=run_scheduled_refresh):
     global _scheduler
     if _scheduler is not None:
         return _scheduler
@@ -16,7 +20,8 @@ def start_scheduler():
     config = load_app_config()
     scheduler = BackgroundScheduler(timezone="Asia/Shanghai")
     scheduler.add_job(
-        create_and_run_refresh,
+        job,
+        kwargs={"log": logger.info},
         trigger="cron",
         day_of_week=config.scheduler_day_of_week,
         hour=config.scheduler_hour,
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from datetime import datetime
+from typing import Any
 
 from pydantic import BaseModel
 
@@ -54,9 +55,24 @@ class DistributionResponse(BaseModel):
     buckets: list[DistributionBucket]
 
 
+class RefreshProgressResponse(BaseModel):
+    task_id: str
+    status: str | None = None
+    total_count: int = 0
+    processed_count: int = 0
+    success_count: int = 0
+    skipped_count: int = 0
+    negative_cached_count: int = 0
+    failed_count: int = 0
+    current_index_code: str | None = None
+    current_index_name: str | None = None
+    progress_percent: float = 0.0
+
+
 class RefreshTaskResponse(BaseModel):
     task_id: str
     status: str
     started_at: datetime
     finished_at: datetime | None
     message: str | None
+    stats: dict[str, Any] | None = None
@@ -1,19 +1,31 @@
 from __future__ import annotations
 
 from collections.abc import Sequence
+from datetime import date, timedelta
 
 import numpy as np
 
 
-def calculate_percentile(current_value: float, history_values: Sequence[float]) -> float:
-    if not history_values:
+def calculate_percentile(
+    current_value: float,
+    history_values: Sequence[float] | np.ndarray,
+    inclusive: bool = True,
+    decimals: int | None = 2,
+) -> float:
+    """Percent of non-NaN history at or below ``current_value`` (strictly below when not ``inclusive``).
+
+    One vectorized comparison pass, no sort; ``decimals=None`` skips rounding.
+    """
+    if history_values is None or len(history_values) == 0:
         return 50.0
-    arr = np.array(history_values, dtype=float)
-    arr = arr[~np.isnan(arr)]
-    if arr.size == 0:
+    arr = np.asarray(history_values, dtype=float)
+    valid = arr.size - int(np.count_nonzero(np.isnan(arr)))
+    if valid == 0:
         return 50.0
-    rank = np.searchsorted(np.sort(arr), float(current_value), side="right")
-    return float(round((rank / arr.size) * 100, 2))
+    current = float(current_value)
+    rank = np.count_nonzero(arr <= current) if inclusive else np.count_nonzero(arr < current)
+    percentile = (int(rank) / valid) * 100
+    return float(percentile if decimals is None else round(percentile, decimals))
 
 
 def get_temperature_status(percentile: float, low: float = 30, high: float = 70) -> str:
@@ -32,3 +44,25 @@ def get_temperature_color(percentile: float, colors: dict[str, str], low: float
         return colors.get("high", "#F44336")
     return colors.get("medium", "#FFC107")
 
+
+def _window(trade_dates: np.ndarray, closes: np.ndarray, since: date) -> np.ndarray:
+    window = closes[trade_dates >= np.datetime64(since, "D")]
+    return window if window.size else closes
+
+
+def compute_index_metrics(trade_dates: np.ndarray, closes: np.ndarray, as_of_date: date) -> dict[str, float]:
+    """Percentiles and 3-year stats for one index; ``closes`` must be sorted by ``trade_dates``."""
+    closes = np.asarray(closes, dtype=float)
+    trade_dates = np.asarray(trade_dates, dtype="datetime64[D]")
+    current_price = float(closes[-1])
+    closes_1m = _window(trade_dates, closes, as_of_date - timedelta(days=30))
+    closes_3y = _window(trade_dates, closes, as_of_date - timedelta(days=365 * 3))
+    return {
+        "current_price": current_price,
+        "percentile_1m": calculate_percentile(current_price, closes_1m),
+        "percentile_3y": calculate_percentile(current_price, closes_3y),
+        "percentile_since_inception": calculate_percentile(current_price, closes),
+        "high_3y": float(closes_3y.max()),
+        "low_3y": float(closes_3y.min()),
+        "avg_3y": float(closes_3y.mean()),
+    }
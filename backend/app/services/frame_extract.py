@@ -0,0 +1,88 @@
+"""Column-wise extraction of report rows from upstream frames.
+
+Replaces per-row ``iterrows`` loops: columns are sliced by position, converted with
+``to_numpy`` and formatted in one pass. Shared by the components fetch and the
+legacy per-index report scripts.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass
+class ComponentColumns:
+    codes: list[str]
+    names: list[str]
+    weights: list[float | None]
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def pairs(self) -> list[tuple[str, str]]:
+        return list(zip(self.codes, self.names))
+
+
+def _text_column(frame: pd.DataFrame, position: int, missing: str, strip: bool) -> list[str]:
+    if frame.shape[1] <= position:
+        return [missing] * len(frame)
+    values = frame.iloc[:, position].to_numpy(dtype=object).astype(str)
+    if strip:
+        values = np.char.strip(values)
+    return values.tolist()
+
+
+def top_components(df: pd.DataFrame | None, top_n: int = 10, missing: str = "", strip: bool = False) -> ComponentColumns:
+    """Code, name and weight of the first ``top_n`` rows, read from columns 0, 1 and 2.
+
+    Missing code/name columns yield ``missing``; weights that are absent or not
+    numeric yield ``None``.
+    """
+    if df is None or df.empty:
+        return ComponentColumns([], [], [])
+    head = df.iloc[:top_n]
+    if head.shape[1] > 2:
+        numeric = pd.to_numeric(head.iloc[:, 2], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        weights = np.where(np.isnan(numeric), None, numeric).tolist()
+    else:
+        weights = [None] * len(head)
+    return ComponentColumns(
+        codes=_text_column(head, 0, missing, strip),
+        names=_text_column(head, 1, missing, strip),
+        weights=weights,
+    )
+
+
+def format_decimals(values: np.ndarray, decimals: int = 2, missing: str | None = None) -> np.ndarray:
+    """``f"{v:.{decimals}f}"`` over an array; NaN becomes ``missing`` when given."""
+    formatted = np.char.mod(f"%.{decimals}f", values)
+    if missing is not None:
+        formatted = np.where(np.isnan(values), missing, formatted)
+    return formatted
+
+
+def recent_rows(
+    df: pd.DataFrame | None,
+    n: int = 10,
+    date_col: str = "日期",
+    close_col: str = "收盘",
+    change_col: str = "涨跌幅",
+    missing: str = "N/A",
+) -> list[list[str]]:
+    """The last ``n`` rows as ``[date, close, change]`` strings with two decimals.
+
+    Without a change column (or for NaN changes) the change cell is ``missing``.
+    """
+    if df is None or df.empty or date_col not in df.columns or close_col not in df.columns:
+        return []
+    tail = df.iloc[-n:]
+    dates = tail[date_col].to_numpy(dtype=object).astype(str)
+    closes = format_decimals(tail[close_col].to_numpy(dtype=np.float64))
+    if change_col in tail.columns:
+        changes = format_decimals(tail[change_col].to_numpy(dtype=np.float64, na_value=np.nan), missing=missing)
+    else:
+        changes = np.full(len(tail), missing)
+    return np.column_stack([dates, closes, changes]).tolist() if len(tail) else []
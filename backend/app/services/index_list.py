@@ -0,0 +1,130 @@
+"""Index list parsing with a pickled sidecar cache keyed by the Excel file's stat and hash."""
+
+from __future__ import annotations
+
+import hashlib
+import pickle
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+
+CACHE_VERSION = 1
+
+
+@dataclass
+class IndexListSnapshot:
+    items: list[dict[str, str]]
+    sha256: str = ""
+    cache_hit: bool = False
+
+    @property
+    def codes(self) -> list[str]:
+        return [item["code"] for item in self.items]
+
+
+@dataclass
+class IndexListDiff:
+    added: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.removed)
+
+
+def parse_index_frame(df: pd.DataFrame) -> list[dict[str, str]]:
+    if df.empty:
+        return []
+    df = df[df.iloc[:, 0].notna()]
+    if df.empty:
+        return []
+
+    codes = df.iloc[:, 0].astype(str).str.strip()
+    if len(df.columns) > 1:
+        names = df.iloc[:, 1]
+        name_s = names.astype(str).str.strip().where(names.notna(), "INDEX-" + codes)
+    else:
+        name_s = "INDEX-" + codes
+    if len(df.columns) > 2:
+        full_names = df.iloc[:, 2]
+        full_name_s = full_names.astype(str).str.strip().where(full_names.notna(), "")
+    else:
+        full_name_s = pd.Series("", index=df.index)
+
+    return [
+        {"code": code, "name": name, "full_name": full_name}
+        for code, name, full_name in zip(codes.tolist(), name_s.tolist(), full_name_s.tolist())
+    ]
+
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _read_sidecar(cache_path: Path) -> dict[str, Any] | None:
+    try:
+        with cache_path.open("rb") as f:
+            payload = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+        return None
+    if not isinstance(payload, dict) or payload.get("version") != CACHE_VERSION:
+        return None
+    return payload
+
+
+def _write_sidecar(cache_path: Path, payload: dict[str, Any]):
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = cache_path.with_suffix(cache_path.suffix + ".tmp")
+    with tmp.open("wb") as f:
+        pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+    tmp.replace(cache_path)
+
+
+def load_index_list(excel_path: str, cache_path: str | None = None) -> IndexListSnapshot:
+    path = Path(excel_path)
+    if not path.exists():
+        return IndexListSnapshot(items=[])
+
+    stat = path.stat()
+    sidecar = Path(cache_path) if cache_path else None
+    cached = _read_sidecar(sidecar) if sidecar else None
+    if cached is not None and cached.get("excel_path") == str(path.resolve()):
+        if cached.get("mtime_ns") == stat.st_mtime_ns and cached.get("size") == stat.st_size:
+            return IndexListSnapshot(items=cached["items"], sha256=cached["sha256"], cache_hit=True)
+
+    sha256 = _file_sha256(path)
+    if cached is not None and cached.get("sha256") == sha256:
+        items = cached["items"]
+        cache_hit = True
+    else:
+        items = parse_index_frame(pd.read_excel(path))
+        cache_hit = False
+
+    if sidecar is not None:
+        _write_sidecar(
+            sidecar,
+            {
+                "version": CACHE_VERSION,
+                "excel_path": str(path.resolve()),
+                "mtime_ns": stat.st_mtime_ns,
+                "size": stat.st_size,
+                "sha256": sha256,
+                "items": items,
+            },
+        )
+    return IndexListSnapshot(items=items, sha256=sha256, cache_hit=cache_hit)
+
+
+def read_index_list(excel_path: str, cache_path: str | None = None) -> list[dict[str, str]]:
+    return load_index_list(excel_path, cache_path=cache_path).items
+
+
+def diff_index_list(previous_codes: set[str], current_codes: list[str]) -> IndexListDiff:
+    current = set(current_codes)
+    return IndexListDiff(added=sorted(current - previous_codes), removed=sorted(previous_codes - current))
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.models import NegativeCacheEntry
+
+
+def probe_interval(failure_count: int, base_days: float = 1.0, max_days: float = 30.0) -> timedelta:
+    days = base_days * 2 ** max(0, failure_count - 1)
+    return timedelta(days=min(days, max_days))
+
+
+def load_negative_cache(db: Session) -> dict[str, NegativeCacheEntry]:
+    entries = db.execute(select(NegativeCacheEntry)).scalars().all()
+    return {entry.index_code: entry for entry in entries}
+
+
+def is_suppressed(entry: NegativeCacheEntry | None, now: datetime) -> bool:
+    return entry is not None and entry.next_probe_at > now
+
+
+def record_negative(
+    db: Session,
+    code: str,
+    reason: str | None,
+    now: datetime,
+    base_days: float = 1.0,
+    max_days: float = 30.0,
+) -> NegativeCacheEntry:
+    entry = db.get(NegativeCacheEntry, code)
+    if entry is None:
+        entry = NegativeCacheEntry(index_code=code, failure_count=0)
+        db.add(entry)
+    entry.failure_count = (entry.failure_count or 0) + 1
+    entry.reason = reason[:1024] if reason else None
+    entry.last_failed_at = now
+    entry.next_probe_at = now + probe_interval(entry.failure_count, base_days=base_days, max_days=max_days)
+    return entry
+
+
+def clear_negative(db: Session, code: str):
+    db.execute(delete(NegativeCacheEntry).where(NegativeCacheEntry.index_code == code))
@@ -0,0 +1,127 @@
+"""Normalization of raw upstream frames into compact NumPy arrays.
+
+Kept free of akshare and database imports.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+CSINDEX_SOURCE = "ak_stock_zh_index_hist_csindex"
+
+
+@dataclass
+class HistoryArrays:
+    trade_date: np.ndarray
+    close: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    pct_change: np.ndarray
+
+    def __len__(self) -> int:
+        return int(self.close.size)
+
+    @property
+    def empty(self) -> bool:
+        return self.close.size == 0
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> HistoryArrays:
+        if frame.empty:
+            empty = np.empty(0, dtype=np.float64)
+            return cls(np.empty(0, dtype="datetime64[D]"), empty, empty, empty, empty)
+        return cls(
+            trade_date=frame["trade_date"].to_numpy(dtype="datetime64[D]"),
+            close=frame["close"].to_numpy(dtype=np.float64),
+            high=frame["high"].to_numpy(dtype=np.float64),
+            low=frame["low"].to_numpy(dtype=np.float64),
+            pct_change=frame["pct_change"].to_numpy(dtype=np.float64, na_value=np.nan),
+        )
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            {
+                "trade_date": pd.to_datetime(self.trade_date),
+                "close": self.close,
+                "high": self.high,
+                "low": self.low,
+                "pct_change": self.pct_change,
+            }
+        )
+
+
+def _standardize_history(df: pd.DataFrame) -> pd.DataFrame:
+    if df is None or df.empty:
+        return pd.DataFrame()
+
+    rename_map = {
+        "date": "trade_date",
+        "close": "close",
+        "high": "high",
+        "low": "low",
+        "pct_chg": "pct_change",
+        "日期": "trade_date",
+        "收盘": "close",
+        "最高": "high",
+        "最低": "low",
+        "涨跌幅": "pct_change",
+    }
+
+    normalized = df.rename(columns={k: v for k, v in rename_map.items() if k in df.columns}).copy()
+    if "trade_date" not in normalized.columns or "close" not in normalized.columns:
+        return pd.DataFrame()
+
+    normalized["trade_date"] = pd.to_datetime(normalized["trade_date"], errors="coerce")
+    normalized["close"] = pd.to_numeric(normalized["close"], errors="coerce")
+    normalized["high"] = pd.to_numeric(normalized.get("high", normalized["close"]), errors="coerce")
+    normalized["low"] = pd.to_numeric(normalized.get("low", normalized["close"]), errors="coerce")
+    normalized["pct_change"] = pd.to_numeric(normalized.get("pct_change"), errors="coerce")
+
+    normalized = normalized.dropna(subset=["trade_date", "close", "high", "low"])
+    normalized = normalized.sort_values("trade_date")
+    return normalized[["trade_date", "close", "high", "low", "pct_change"]]
+
+
+def _standardize_history_csindex(df: pd.DataFrame) -> pd.DataFrame:
+    if df is None or df.empty or len(df.columns) < 10:
+        return pd.DataFrame()
+
+    date_col = df.columns[0]
+    high_col = df.columns[7]
+    low_col = df.columns[8]
+    close_col = df.columns[9]
+    pct_col = df.columns[11] if len(df.columns) > 11 else None
+
+    normalized = pd.DataFrame(
+        {
+            "trade_date": df[date_col],
+            "close": df[close_col],
+            "high": df[high_col],
+            "low": df[low_col],
+            "pct_change": df[pct_col] if pct_col is not None else None,
+        }
+    )
+
+    normalized["trade_date"] = pd.to_datetime(normalized["trade_date"], errors="coerce")
+    normalized["close"] = pd.to_numeric(normalized["close"], errors="coerce")
+    normalized["high"] = pd.to_numeric(normalized["high"], errors="coerce")
+    normalized["low"] = pd.to_numeric(normalized["low"], errors="coerce")
+    normalized["pct_change"] = pd.to_numeric(normalized.get("pct_change"), errors="coerce")
+
+    normalized = normalized.dropna(subset=["trade_date", "close"])
+    normalized["high"] = normalized["high"].fillna(normalized["close"])
+    normalized["low"] = normalized["low"].fillna(normalized["close"])
+    normalized = normalized.dropna(subset=["high", "low"])
+    normalized = normalized.sort_values("trade_date")
+    return normalized[["trade_date", "close", "high", "low", "pct_change"]]
+
+
+def normalize_history(source_name: str, raw_df: pd.DataFrame | None) -> HistoryArrays:
+    if source_name == CSINDEX_SOURCE:
+        normalized = _standardize_history_csindex(raw_df)
+    else:
+        normalized = _standardize_history(raw_df)
+    return HistoryArrays.from_frame(normalized)
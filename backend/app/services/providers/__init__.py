@@ -0,0 +1,88 @@
+"""Upstream history providers.
+
+Implementations are imported on first use so that processes which never refresh
+(read-only API workers) do not pay akshare's import time and memory.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+from threading import Lock
+from typing import TYPE_CHECKING, Any, Protocol
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+class HistoryProvider(Protocol):
+    name: str
+
+    def history_sources(self, index_code: str) -> list[str]:
+        """Source names to try for ``index_code``, in priority order.
+
+        Raises ``UnknownSymbolError`` for a code no source can serve.
+        """
+        ...
+
+    def upstream_for(self, source_name: str) -> str:
+        """Rate-limit/circuit-breaker bucket that guards ``source_name``."""
+        ...
+
+    def fetch_raw(
+        self,
+        source_name: str,
+        index_code: str,
+        start_date: datetime,
+        end_date: datetime,
+    ) -> pd.DataFrame | None:
+        ...
+
+
+_PROVIDER_LOCK = Lock()
+_PROVIDER: HistoryProvider | None = None
+
+
+def build_history_provider(
+    name: str,
+    options: dict[str, Any] | None = None,
+    record_dir: str | None = None,
+) -> HistoryProvider:
+    provider: HistoryProvider
+    if name == "akshare":
+        from app.services.providers.akshare_provider import AkshareHistoryProvider
+
+        provider = AkshareHistoryProvider()
+    elif name == "replay":
+        from app.services.providers.replay_provider import ReplayHistoryProvider
+
+        provider = ReplayHistoryProvider(**(options or {}))
+    else:
+        raise ValueError(f"unknown history provider: {name}")
+
+    if record_dir:
+        from app.services.providers.replay_provider import RecordingHistoryProvider
+
+        provider = RecordingHistoryProvider(provider, record_dir)
+    return provider
+
+
+def get_history_provider() -> HistoryProvider:
+    global _PROVIDER
+    with _PROVIDER_LOCK:
+        if _PROVIDER is None:
+            from app.core.config import load_app_config
+
+            config = load_app_config()
+            _PROVIDER = build_history_provider(
+                config.history_provider,
+                options=config.replay_options,
+                record_dir=config.history_record_dir,
+            )
+        return _PROVIDER
+
+
+def set_history_provider(provider: HistoryProvider | None):
+    """Install ``provider`` for the process; ``None`` restores the lazy default."""
+    global _PROVIDER
+    with _PROVIDER_LOCK:
+        _PROVIDER = provider
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import os
+import re
+from datetime import datetime
+from functools import lru_cache
+from types import ModuleType
+
+import pandas as pd
+
+from app.services.normalize import CSINDEX_SOURCE
+from app.services.retry import UnknownSymbolError
+
+SOURCE_UPSTREAMS: dict[str, str] = {
+    "ak_index_zh_a_hist": "eastmoney",
+    "ak_stock_zh_index_daily_em_csi": "eastmoney",
+    "ak_stock_zh_index_daily_em_plain": "eastmoney",
+    "ak_stock_zh_index_daily": "sina",
+    CSINDEX_SOURCE: "csindex",
+}
+
+DEFAULT_SOURCE_ORDER = list(SOURCE_UPSTREAMS)
+
+# Index codes are plain alphanumerics (``000300``, ``H30533``); anything else cannot be
+# served by any source.
+INDEX_CODE_PATTERN = re.compile(r"[0-9A-Za-z]+")
+
+
+@lru_cache(maxsize=1)
+def load_akshare() -> ModuleType:
+    os.environ["NO_PROXY"] = "*"
+    os.environ["HTTP_PROXY"] = ""
+    os.environ["HTTPS_PROXY"] = ""
+    import akshare
+
+    return akshare
+
+
+def check_index_code(index_code: str) -> str:
+    code_s = str(index_code)
+    if not INDEX_CODE_PATTERN.fullmatch(code_s):
+        raise UnknownSymbolError(code_s, reason="malformed index code")
+    return code_s
+
+
+class AkshareHistoryProvider:
+    name = "akshare"
+
+    def history_sources(self, index_code: str) -> list[str]:
+        # Rejected here, before any guarded call, so bad codes never count against a breaker.
+        code_s = check_index_code(index_code)
+        sources = list(DEFAULT_SOURCE_ORDER)
+        if code_s.startswith("399"):
+            sources = [sources[-2], *sources[:-2], sources[-1]]
+        elif code_s.startswith("93"):
+            sources = [sources[-1], *sources[:-1]]
+        return sources
+
+    def upstream_for(self, source_name: str) -> str:
+        return SOURCE_UPSTREAMS[source_name]
+
+    def fetch_raw(
+        self,
+        source_name: str,
+        index_code: str,
+        start_date: datetime,
+        end_date: datetime,
+    ) -> pd.DataFrame | None:
+        check_index_code(index_code)
+        ak = load_akshare()
+        start_s = start_date.strftime("%Y%m%d")
+        end_s = end_date.strftime("%Y%m%d")
+        if source_name == "ak_index_zh_a_hist":
+            return ak.index_zh_a_hist(symbol=index_code, period="daily", start_date=start_s, end_date=end_s)
+        if source_name == "ak_stock_zh_index_daily_em_csi":
+            return ak.stock_zh_index_daily_em(symbol=f"csi{index_code}", start_date=start_s, end_date=end_s)
+        if source_name == "ak_stock_zh_index_daily_em_plain":
+            return ak.stock_zh_index_daily_em(symbol=index_code, start_date=start_s, end_date=end_s)
+        if source_name == "ak_stock_zh_index_daily":
+            return ak.stock_zh_index_daily(symbol=f"{'sz' if str(index_code).startswith('399') else 'sh'}{index_code}")
+        if source_name == CSINDEX_SOURCE:
+            return ak.stock_zh_index_hist_csindex(symbol=index_code)
+        raise ValueError(f"unknown akshare source: {source_name}")
@@ -0,0 +1,154 @@
+"""Offline providers for benchmarks and load tests.
+
+``ReplayHistoryProvider`` serves frames recorded by ``RecordingHistoryProvider`` and,
+for anything not recorded, deterministic synthetic random-walk histories. Latency,
+transient failures and permanently dead codes are injected from a seeded RNG, so a
+run with the same settings always sees the same sequence of outcomes.
+"""
+
+from __future__ import annotations
+
+import pickle
+import random
+import time
+import zlib
+from collections import Counter
+from datetime import date, datetime
+from functools import lru_cache
+from pathlib import Path
+from threading import Lock
+
+import numpy as np
+import pandas as pd
+
+from app.services.providers import HistoryProvider
+from app.services.providers.akshare_provider import DEFAULT_SOURCE_ORDER, SOURCE_UPSTREAMS
+
+
+def _recording_path(directory: Path, source_name: str, index_code: str) -> Path:
+    return directory / source_name / f"{index_code}.pkl"
+
+
+@lru_cache(maxsize=8)
+def _business_days(start: date, end: date) -> pd.Index:
+    return pd.bdate_range(start, end).strftime("%Y-%m-%d")
+
+
+def synthetic_history(index_code: str, start_date: datetime, end_date: datetime, seed: int = 0) -> pd.DataFrame:
+    """Business-day random walk in eastmoney column layout, stable per code and seed."""
+    dates = _business_days(start_date.date(), end_date.date())
+    rng = np.random.default_rng(zlib.crc32(f"{seed}:{index_code}".encode()))
+    returns = rng.normal(0.0003, 0.013, size=len(dates))
+    close = 1000.0 * np.exp(np.cumsum(returns))
+    spread = np.abs(rng.normal(0.0, 0.006, size=len(dates)))
+    return pd.DataFrame(
+        {
+            "日期": dates,
+            "收盘": np.round(close, 2),
+            "最高": np.round(close * (1 + spread), 2),
+            "最低": np.round(close * (1 - spread), 2),
+            "涨跌幅": np.round(returns * 100, 2),
+        }
+    )
+
+
+class ReplayHistoryProvider:
+    name = "replay"
+
+    def __init__(
+        self,
+        recordings_dir: str | None = None,
+        synthetic: bool = True,
+        latency_ms: float = 0.0,
+        latency_jitter_ms: float = 0.0,
+        failure_rate: float = 0.0,
+        dead_rate: float = 0.0,
+        dead_codes: list[str] | None = None,
+        seed: int = 0,
+        sleep=time.sleep,
+    ):
+        self.recordings_dir = Path(recordings_dir) if recordings_dir else None
+        self.synthetic = synthetic
+        self.latency_ms = max(0.0, float(latency_ms))
+        self.latency_jitter_ms = max(0.0, float(latency_jitter_ms))
+        self.failure_rate = min(1.0, max(0.0, float(failure_rate)))
+        self.dead_rate = min(1.0, max(0.0, float(dead_rate)))
+        self.dead_codes = {str(code) for code in dead_codes or []}
+        self.seed = int(seed)
+        self._sleep = sleep
+        self._calls: Counter[tuple[str, str]] = Counter()
+        self._lock = Lock()
+
+    def history_sources(self, index_code: str) -> list[str]:
+        return list(DEFAULT_SOURCE_ORDER)
+
+    def upstream_for(self, source_name: str) -> str:
+        return SOURCE_UPSTREAMS.get(source_name, "eastmoney")
+
+    def is_dead(self, index_code: str) -> bool:
+        if index_code in self.dead_codes:
+            return True
+        return random.Random(f"{self.seed}:dead:{index_code}").random() < self.dead_rate
+
+    @property
+    def call_count(self) -> int:
+        with self._lock:
+            return sum(self._calls.values())
+
+    def fetch_raw(
+        self,
+        source_name: str,
+        index_code: str,
+        start_date: datetime,
+        end_date: datetime,
+    ) -> pd.DataFrame | None:
+        with self._lock:
+            self._calls[(source_name, index_code)] += 1
+            call_no = self._calls[(source_name, index_code)]
+        rng = random.Random(f"{self.seed}:{source_name}:{index_code}:{call_no}")
+
+        latency = self.latency_ms + self.latency_jitter_ms * rng.random()
+        if latency > 0:
+            self._sleep(latency / 1000.0)
+        if rng.random() < self.failure_rate:
+            raise ConnectionError(f"replay: injected failure for {source_name} {index_code}")
+
+        if self.recordings_dir is not None:
+            path = _recording_path(self.recordings_dir, source_name, index_code)
+            if path.exists():
+                with path.open("rb") as f:
+                    return pickle.load(f)
+
+        if not self.synthetic or self.is_dead(index_code):
+            return pd.DataFrame()
+        return synthetic_history(index_code, start_date, end_date, seed=self.seed)
+
+
+class RecordingHistoryProvider:
+    """Wraps another provider and pickles every non-empty raw frame for later replay."""
+
+    def __init__(self, inner: HistoryProvider, recordings_dir: str):
+        self.inner = inner
+        self.name = f"recording:{inner.name}"
+        self.recordings_dir = Path(recordings_dir)
+
+    def history_sources(self, index_code: str) -> list[str]:
+        return self.inner.history_sources(index_code)
+
+    def upstream_for(self, source_name: str) -> str:
+        return self.inner.upstream_for(source_name)
+
+    def fetch_raw(
+        self,
+        source_name: str,
+        index_code: str,
+        start_date: datetime,
+        end_date: datetime,
+    ) -> pd.DataFrame | None:
+        frame = self.inner.fetch_raw(source_name, index_code, start_date, end_date)
+        if frame is not None and not frame.empty:
+            path = _recording_path(self.recordings_dir, source_name, index_code)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with path.open("wb") as f:
+                pickle.dump(frame, f, protocol=pickle.HIGHEST_PROTOCOL)
+        return frame
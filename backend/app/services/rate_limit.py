@@ -0,0 +1,197 @@
+"""Per-upstream token-bucket rate limiting and circuit breaking.
+
+This module only depends on the standard library so that both the backend
+refresh pipeline and the legacy ``utils.DataFetcher`` can share one registry.
+"""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any, TypeVar
+
+T = TypeVar("T")
+
+UPSTREAM_DEFAULTS: dict[str, dict[str, float]] = {
+    "eastmoney": {"rate": 5.0, "burst": 5, "failure_threshold": 5, "cooldown_seconds": 60.0},
+    "sina": {"rate": 2.0, "burst": 2, "failure_threshold": 5, "cooldown_seconds": 60.0},
+    "csindex": {"rate": 2.0, "burst": 2, "failure_threshold": 3, "cooldown_seconds": 120.0},
+    "tushare": {"rate": 3.0, "burst": 3, "failure_threshold": 5, "cooldown_seconds": 60.0},
+}
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when a call is rejected because the upstream circuit is open."""
+
+    def __init__(self, upstream: str, retry_after: float):
+        super().__init__(f"circuit open for upstream {upstream}, retry after {retry_after:.1f}s")
+        self.upstream = upstream
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    def __init__(
+        self,
+        rate: float,
+        burst: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = max(1.0, float(burst))
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = Lock()
+
+    def _refill(self, now: float):
+        elapsed = max(0.0, now - self._updated)
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated = now
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            self._refill(self._clock())
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return True
+            return False
+
+    def acquire(self) -> float:
+        """Block until a token is available and return the time spent waiting."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill(self._clock())
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return waited
+                wait = (1.0 - self._tokens) / self.rate
+            self._sleep(wait)
+            waited += wait
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        cooldown_seconds: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.cooldown_seconds = float(cooldown_seconds)
+        self._clock = clock
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._lock = Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state(self._clock())
+
+    def _state(self, now: float) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if now - self._opened_at >= self.cooldown_seconds:
+            return "half_open"
+        return "open"
+
+    def retry_after(self) -> float:
+        with self._lock:
+            if self._opened_at is None:
+                return 0.0
+            return max(0.0, self.cooldown_seconds - (self._clock() - self._opened_at))
+
+    def allow(self) -> bool:
+        # A half-open breaker lets calls through; the next failure re-opens it immediately.
+        with self._lock:
+            return self._state(self._clock()) != "open"
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            now = self._clock()
+            if self._state(now) == "half_open":
+                self._opened_at = now
+                return
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                self._opened_at = now
+
+
+@dataclass
+class UpstreamGuard:
+    name: str
+    limiter: TokenBucket
+    breaker: CircuitBreaker
+
+    def call(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        if not self.breaker.allow():
+            raise CircuitOpenError(self.name, self.breaker.retry_after())
+        self.limiter.acquire()
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        return result
+
+
+_REGISTRY_LOCK = Lock()
+_REGISTRY: dict[str, UpstreamGuard] = {}
+_OVERRIDES: dict[str, dict[str, float]] = {}
+
+
+def _build_guard(name: str) -> UpstreamGuard:
+    settings = dict(UPSTREAM_DEFAULTS.get(name, UPSTREAM_DEFAULTS["eastmoney"]))
+    settings.update(_OVERRIDES.get(name, {}))
+    return UpstreamGuard(
+        name=name,
+        limiter=TokenBucket(rate=float(settings["rate"]), burst=int(settings["burst"])),
+        breaker=CircuitBreaker(
+            failure_threshold=int(settings["failure_threshold"]),
+            cooldown_seconds=float(settings["cooldown_seconds"]),
+        ),
+    )
+
+
+def configure_upstreams(settings: dict[str, dict[str, Any]] | None):
+    """Apply per-upstream overrides, e.g. ``{"sina": {"rate": 1}}``.
+
+    Guards whose settings change are rebuilt; untouched guards keep their state.
+    """
+    if not settings:
+        return
+    with _REGISTRY_LOCK:
+        for name, values in settings.items():
+            if not isinstance(values, dict):
+                continue
+            cleaned = {k: float(v) for k, v in values.items() if k in UPSTREAM_DEFAULTS["eastmoney"]}
+            if _OVERRIDES.get(name) == cleaned:
+                continue
+            _OVERRIDES[name] = cleaned
+            _REGISTRY.pop(name, None)
+
+
+def get_upstream_guard(name: str) -> UpstreamGuard:
+    with _REGISTRY_LOCK:
+        guard = _REGISTRY.get(name)
+        if guard is None:
+            guard = _build_guard(name)
+            _REGISTRY[name] = guard
+        return guard
+
+
+def guarded_call(upstream: str, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    return get_upstream_guard(upstream).call(func, *args, **kwargs)
@@ -0,0 +1,130 @@
+"""Per-task timers and counters for ``run_refresh``.
+
+``RefreshStats`` aggregates stage durations, per-source fetch outcomes and plain
+counters for one refresh task. ``to_dict`` produces the JSON stored on the
+``RefreshTask`` row and returned by the task API.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from contextlib import contextmanager
+from threading import Lock
+from typing import Any, Iterator
+
+# Upper bounds in milliseconds; the last bucket catches everything slower.
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class LatencyHistogram:
+    def __init__(self, buckets_ms: tuple[float, ...] = LATENCY_BUCKETS_MS):
+        self.buckets_ms = buckets_ms
+        self.counts = [0] * (len(buckets_ms) + 1)
+        self.count = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    def observe(self, seconds: float):
+        ms = seconds * 1000.0
+        slot = len(self.buckets_ms)
+        for i, bound in enumerate(self.buckets_ms):
+            if ms <= bound:
+                slot = i
+                break
+        self.counts[slot] += 1
+        self.count += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+    def to_dict(self) -> dict[str, Any]:
+        labels = [f"le_{bound}ms" for bound in self.buckets_ms] + ["inf"]
+        return {
+            "count": self.count,
+            "total_seconds": round(self.total_seconds, 4),
+            "mean_ms": round(self.total_seconds * 1000 / self.count, 2) if self.count else None,
+            "max_ms": round(self.max_seconds * 1000, 2),
+            "buckets": {label: n for label, n in zip(labels, self.counts) if n},
+        }
+
+
+class SourceStats:
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.ok = 0
+        self.empty = 0
+        self.errors = 0
+        self.rows = 0
+        self.bytes = 0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "ok": self.ok,
+            "empty": self.empty,
+            "errors": self.errors,
+            "rows": self.rows,
+            "bytes": self.bytes,
+            "latency": self.latency.to_dict(),
+        }
+
+
+class RefreshStats:
+    def __init__(self, clock=time.perf_counter):
+        self._clock = clock
+        self._lock = Lock()
+        self._started = clock()
+        self.stages: dict[str, LatencyHistogram] = {}
+        self.sources: dict[str, SourceStats] = {}
+        self.counters: dict[str, int] = {}
+
+    def observe(self, stage: str, seconds: float):
+        with self._lock:
+            self.stages.setdefault(stage, LatencyHistogram()).observe(seconds)
+
+    @contextmanager
+    def timer(self, stage: str) -> Iterator[None]:
+        start = self._clock()
+        try:
+            yield
+        finally:
+            self.observe(stage, self._clock() - start)
+
+    def incr(self, counter: str, amount: int = 1):
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def observe_source(self, source: str, seconds: float, outcome: str, rows: int = 0, nbytes: int = 0):
+        """Record one upstream call; ``outcome`` is ``ok``, ``empty`` or ``error``."""
+        with self._lock:
+            entry = self.sources.setdefault(source, SourceStats())
+            entry.latency.observe(seconds)
+            if outcome == "ok":
+                entry.ok += 1
+            elif outcome == "empty":
+                entry.empty += 1
+            else:
+                entry.errors += 1
+            entry.rows += rows
+            entry.bytes += nbytes
+
+    def to_dict(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "wall_seconds": round(self._clock() - self._started, 4),
+                "stages": {name: hist.to_dict() for name, hist in self.stages.items()},
+                "sources": {name: entry.to_dict() for name, entry in self.sources.items()},
+                "counters": dict(self.counters),
+            }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False, separators=(",", ":"))
+
+
+def load_stats_json(raw: str | None) -> dict[str, Any] | None:
+    if not raw:
+        return None
+    try:
+        value = json.loads(raw)
+    except ValueError:
+        return None
+    return value if isinstance(value, dict) else None
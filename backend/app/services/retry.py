@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import random
+from dataclasses import dataclass
+from threading import Lock
+
+from app.services.rate_limit import CircuitOpenError
+
+
+class UnknownSymbolError(LookupError):
+    """Raised by a history provider for a code it knows no source can serve.
+
+    Unlike parse errors on a throttle page or a truncated payload (``ValueError``,
+    ``KeyError`` ...), which are retried, this marks the attempt as permanent.
+    """
+
+    def __init__(self, index_code: str, reason: str = "unknown symbol"):
+        self.index_code = index_code
+        super().__init__(f"{reason}: {index_code}")
+
+
+class HistoryFetchError(RuntimeError):
+    """Raised when no source could serve history for an index code."""
+
+    def __init__(self, index_code: str, permanent: bool, reasons: list[str] | None = None):
+        self.index_code = index_code
+        self.permanent = permanent
+        self.reasons = reasons or []
+        kind = "permanent" if permanent else "transient"
+        detail = "; ".join(self.reasons) if self.reasons else "no source returned data"
+        super().__init__(f"{kind} history fetch failure for {index_code}: {detail}")
+
+
+def is_permanent_error(exc: BaseException) -> bool:
+    if isinstance(exc, HistoryFetchError):
+        return exc.permanent
+    if isinstance(exc, CircuitOpenError):
+        return False
+    # Everything else (network errors, unparsable upstream bodies) may succeed later.
+    return isinstance(exc, UnknownSymbolError)
+
+
+class RetryBudget:
+    """Caps the total number of retries a single task may spend across all codes."""
+
+    def __init__(self, total: int):
+        self.total = max(0, int(total))
+        self._used = 0
+        self._lock = Lock()
+
+    @property
+    def remaining(self) -> int:
+        with self._lock:
+            return self.total - self._used
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self._used >= self.total:
+                return False
+            self._used += 1
+            return True
+
+
+@dataclass
+class RetryPolicy:
+    max_attempts: int = 3
+    base_delay: float = 1.0
+    max_delay: float = 30.0
+    multiplier: float = 2.0
+    jitter: float = 0.5
+    budget: int = 100
+
+    def new_budget(self) -> RetryBudget:
+        return RetryBudget(self.budget)
+
+    def backoff(self, attempt: int, rng: random.Random | None = None) -> float:
+        """Delay before retrying after ``attempt`` failed attempts (1-based)."""
+        delay = min(self.max_delay, self.base_delay * self.multiplier ** max(0, attempt - 1))
+        jitter = min(1.0, max(0.0, self.jitter))
+        roll = (rng or random).random()
+        return delay * (1.0 - jitter * roll)
+
+    def should_retry(self, exc: BaseException, attempt: int, budget: RetryBudget) -> bool:
+        if attempt >= self.max_attempts or is_permanent_error(exc):
+            return False
+        return budget.try_spend()
@@ -0,0 +1,177 @@
+"""Refresh task progress shared between API workers.
+
+The running task updates an in-process entry on every index and writes it to the
+``task_progress`` table at most once per ``flush_seconds`` (and always on a status
+change), so per-index updates do not cost a commit each. Readers serve the local
+entry when this process runs the task and fall back to the table otherwise.
+Entries idle for longer than the TTL are evicted from memory and from the table,
+and memory holds at most ``max_entries`` tasks.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import Any, Callable
+
+from sqlalchemy import delete
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.models import TaskProgress
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = {"completed", "failed"}
+
+
+def _with_percent(progress: dict[str, Any]) -> dict[str, Any]:
+    total = int(progress.get("total_count", 0) or 0)
+    processed = int(progress.get("processed_count", 0) or 0)
+    progress["progress_percent"] = 100.0 if total <= 0 else round((processed / total) * 100, 2)
+    return progress
+
+
+class _Entry:
+    __slots__ = ("progress", "touched", "flushed", "dirty")
+
+    def __init__(self, progress: dict[str, Any], touched: float):
+        self.progress = progress
+        self.touched = touched
+        self.flushed = 0.0
+        self.dirty = True
+
+
+class ProgressRegistry:
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        ttl_seconds: float = 24 * 3600,
+        max_entries: int = 100,
+        flush_seconds: float = 2.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.session_factory = session_factory
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self.flush_seconds = flush_seconds
+        self._clock = clock
+        self._lock = Lock()
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+
+    def _evict(self, now: float):
+        while self._entries:
+            task_id, entry = next(iter(self._entries.items()))
+            if len(self._entries) > self.max_entries or now - entry.touched > self.ttl_seconds:
+                self._entries.pop(task_id)
+            else:
+                break
+
+    def update(self, task_id: str, **fields):
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.pop(task_id, None)
+            if entry is None:
+                entry = _Entry({}, now)
+            previous_status = entry.progress.get("status")
+            entry.progress.update(fields)
+            _with_percent(entry.progress)
+            entry.touched = now
+            entry.dirty = True
+            self._entries[task_id] = entry
+            self._evict(now)
+            status_changed = entry.progress.get("status") != previous_status
+            due = status_changed or now - entry.flushed >= self.flush_seconds
+            snapshot = dict(entry.progress) if due else None
+            if due:
+                entry.flushed = now
+                entry.dirty = False
+        if snapshot is not None:
+            self._write(task_id, snapshot, purge=snapshot.get("status") in TERMINAL_STATUSES)
+
+    def flush(self, task_id: str):
+        with self._lock:
+            entry = self._entries.get(task_id)
+            if entry is None or not entry.dirty:
+                return
+            entry.flushed = self._clock()
+            entry.dirty = False
+            snapshot = dict(entry.progress)
+        self._write(task_id, snapshot)
+
+    def get(self, task_id: str) -> dict[str, Any] | None:
+        now = self._clock()
+        with self._lock:
+            self._evict(now)
+            entry = self._entries.get(task_id)
+            if entry is not None:
+                return dict(entry.progress)
+        return self._read(task_id)
+
+    def _write(self, task_id: str, progress: dict[str, Any], purge: bool = False):
+        now = datetime.utcnow()
+        db = self.session_factory()
+        try:
+            row = db.get(TaskProgress, task_id)
+            if row is None:
+                row = TaskProgress(task_id=task_id)
+                db.add(row)
+            row.status = str(progress.get("status") or "running")
+            row.payload = json.dumps(progress, ensure_ascii=False, default=str)
+            row.updated_at = now
+            if purge:
+                cutoff = now - timedelta(seconds=self.ttl_seconds)
+                db.execute(delete(TaskProgress).where(TaskProgress.updated_at < cutoff))
+            db.commit()
+        except SQLAlchemyError as exc:
+            # Progress is advisory; a locked or missing table must not fail the refresh.
+            db.rollback()
+            logger.warning("task progress write failed for %s: %s", task_id, exc)
+        finally:
+            db.close()
+
+    def _read(self, task_id: str) -> dict[str, Any] | None:
+        db = self.session_factory()
+        try:
+            row = db.get(TaskProgress, task_id)
+        except SQLAlchemyError:
+            return None
+        finally:
+            db.close()
+        if row is None or row.updated_at < datetime.utcnow() - timedelta(seconds=self.ttl_seconds):
+            return None
+        try:
+            return json.loads(row.payload)
+        except ValueError:
+            return None
+
+
+_REGISTRY_LOCK = Lock()
+_REGISTRY: ProgressRegistry | None = None
+
+
+def get_progress_registry() -> ProgressRegistry:
+    global _REGISTRY
+    with _REGISTRY_LOCK:
+        if _REGISTRY is None:
+            from app.core.config import load_app_config
+            from app.core.database import SessionLocal
+
+            config = load_app_config()
+            _REGISTRY = ProgressRegistry(
+                SessionLocal,
+                ttl_seconds=config.progress_ttl_hours * 3600,
+                max_entries=config.progress_max_entries,
+                flush_seconds=config.progress_flush_seconds,
+            )
+        return _REGISTRY
+
+
+def set_progress_registry(registry: ProgressRegistry | None):
+    global _REGISTRY
+    with _REGISTRY_LOCK:
+        _REGISTRY = registry
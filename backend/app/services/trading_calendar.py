@@ -0,0 +1,95 @@
+"""SSE/SZSE trading calendar backed by a local JSON cache.
+
+The cache is built offline by ``scripts/build_trade_calendar.py``. Dates outside the
+cached range (or every date when no cache exists) fall back to a Monday-Friday rule.
+"""
+
+from __future__ import annotations
+
+import json
+from collections.abc import Iterable
+from datetime import date, datetime, time, timedelta, timezone
+from pathlib import Path
+from threading import Lock
+
+SHANGHAI_TZ = timezone(timedelta(hours=8), "Asia/Shanghai")
+# Daily bars are usually published by the upstreams shortly after the 15:00 close.
+SESSION_READY = time(15, 30)
+
+
+def shanghai_now() -> datetime:
+    return datetime.now(SHANGHAI_TZ)
+
+
+def to_shanghai(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(SHANGHAI_TZ)
+
+
+class TradingCalendar:
+    def __init__(self, sessions: Iterable[date] = (), source: str = "weekdays"):
+        self.sessions = frozenset(sessions)
+        self.source = source
+        self.first = min(self.sessions) if self.sessions else None
+        self.last = max(self.sessions) if self.sessions else None
+
+    def is_session(self, day: date) -> bool:
+        if self.first is not None and self.first <= day <= self.last:
+            return day in self.sessions
+        return day.weekday() < 5
+
+    def previous_session(self, day: date) -> date:
+        day -= timedelta(days=1)
+        while not self.is_session(day):
+            day -= timedelta(days=1)
+        return day
+
+    def session_ready_at(self, day: date) -> datetime:
+        return datetime.combine(day, SESSION_READY, tzinfo=SHANGHAI_TZ)
+
+    def latest_session(self, now: datetime | None = None) -> date:
+        """Most recent session whose daily bar should already be published."""
+        local = to_shanghai(now) if now is not None else shanghai_now()
+        day = local.date()
+        if self.is_session(day) and local >= self.session_ready_at(day):
+            return day
+        return self.previous_session(day)
+
+
+_CACHE_LOCK = Lock()
+_CACHE: dict[str, tuple[float, TradingCalendar]] = {}
+
+
+def save_trading_calendar(path: str | Path, sessions: Iterable[date], source: str):
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    payload = {
+        "source": source,
+        "built_at": datetime.utcnow().isoformat(timespec="seconds"),
+        "sessions": sorted(d.isoformat() for d in set(sessions)),
+    }
+    tmp = target.with_suffix(target.suffix + ".tmp")
+    tmp.write_text(json.dumps(payload), encoding="utf-8")
+    tmp.replace(target)
+
+
+def load_trading_calendar(path: str | Path | None) -> TradingCalendar:
+    if path is None or not Path(path).exists():
+        return TradingCalendar()
+    target = Path(path)
+    mtime = target.stat().st_mtime
+    key = str(target.resolve())
+    with _CACHE_LOCK:
+        cached = _CACHE.get(key)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+    try:
+        payload = json.loads(target.read_text(encoding="utf-8"))
+        sessions = [date.fromisoformat(v) for v in payload.get("sessions", [])]
+        calendar = TradingCalendar(sessions, source=str(payload.get("source", "cache")))
+    except (OSError, ValueError):
+        calendar = TradingCalendar()
+    with _CACHE_LOCK:
+        _CACHE[key] = (mtime, calendar)
+    return calendar
@@ -0,0 +1,188 @@
+"""Durable refresh queue on the ``refresh_tasks`` table.
+
+The API enqueues ``queued`` rows; ``backend/scripts/refresh_worker.py`` claims them
+with a lease, renews the lease while the refresh runs and leaves the final status
+to ``run_refresh``. A ``running`` task whose lease expired (the worker died) is
+claimed again until ``max_attempts`` is reached, after which it is marked failed.
+"""
+
+from __future__ import annotations
+
+import json
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core.database import SessionLocal
+from app.models import RefreshTask
+from app.tasks.update_indices import claim_scheduled_slot, scheduled_refresh_key
+
+QUEUED = "queued"
+RUNNING = "running"
+
+
+def _claimable(now: datetime):
+    return or_(
+        RefreshTask.status == QUEUED,
+        and_(RefreshTask.status == RUNNING, RefreshTask.lease_expires_at.is_not(None), RefreshTask.lease_expires_at < now),
+    )
+
+
+def find_active_task(db: Session, now: datetime | None = None) -> RefreshTask | None:
+    """A queued task, or a running one whose lease is still held.
+
+    Tasks run inline by the API or ``refresh_data.py`` carry no lease and never block the queue.
+    """
+    now = now or datetime.utcnow()
+    return db.execute(
+        select(RefreshTask)
+        .where(
+            or_(
+                RefreshTask.status == QUEUED,
+                and_(RefreshTask.status == RUNNING, RefreshTask.lease_expires_at >= now),
+            )
+        )
+        .order_by(RefreshTask.started_at)
+        .limit(1)
+    ).scalar_one_or_none()
+
+
+def _queued_task(force_all: bool = False, force_codes: list[str] | None = None) -> RefreshTask:
+    options = {"force_all": force_all, "force_codes": force_codes or None}
+    return RefreshTask(
+        task_id=uuid4().hex,
+        status=QUEUED,
+        started_at=datetime.utcnow(),
+        finished_at=None,
+        message="Task queued",
+        options_json=json.dumps(options, ensure_ascii=False),
+        attempts=0,
+    )
+
+
+def enqueue_refresh(
+    db: Session,
+    force_all: bool = False,
+    force_codes: list[str] | None = None,
+    dedupe: bool = True,
+) -> RefreshTask:
+    """Queue a refresh; with ``dedupe`` an already queued or running task is returned instead."""
+    if dedupe:
+        active = find_active_task(db)
+        if active is not None:
+            return active
+    task = _queued_task(force_all, force_codes)
+    db.add(task)
+    db.commit()
+    db.refresh(task)
+    return task
+
+
+def task_options(task: RefreshTask) -> dict[str, object]:
+    try:
+        options = json.loads(task.options_json) if task.options_json else {}
+    except ValueError:
+        options = {}
+    return {
+        "force_all": bool(options.get("force_all")),
+        "force_codes": options.get("force_codes") or None,
+    }
+
+
+def fail_exhausted(db: Session, max_attempts: int, now: datetime | None = None) -> int:
+    """Mark tasks whose lease expired ``max_attempts`` times as failed."""
+    now = now or datetime.utcnow()
+    result = db.execute(
+        update(RefreshTask)
+        .where(_claimable(now), RefreshTask.status == RUNNING, RefreshTask.attempts >= max_attempts)
+        .values(
+            status="failed",
+            finished_at=now,
+            message=f"Task abandoned after {max_attempts} expired lease(s)",
+            lease_owner=None,
+            lease_expires_at=None,
+            schedule_key=None,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount or 0
+
+
+def claim_next(db: Session, owner: str, lease_seconds: float, now: datetime | None = None) -> RefreshTask | None:
+    """Atomically take the oldest claimable task; returns ``None`` when the queue is empty."""
+    now = now or datetime.utcnow()
+    while True:
+        candidate = db.execute(
+            select(RefreshTask.task_id).where(_claimable(now)).order_by(RefreshTask.started_at).limit(1)
+        ).scalar_one_or_none()
+        if candidate is None:
+            return None
+        # The guarded UPDATE is the claim: another worker that got here first makes rowcount 0.
+        result = db.execute(
+            update(RefreshTask)
+            .where(RefreshTask.task_id == candidate, _claimable(now))
+            .values(
+                status=RUNNING,
+                lease_owner=owner,
+                lease_expires_at=now + timedelta(seconds=lease_seconds),
+                attempts=RefreshTask.attempts + 1,
+                message="Task started",
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        if result.rowcount == 1:
+            return db.get(RefreshTask, candidate, populate_existing=True)
+
+
+def renew_lease(db: Session, task_id: str, owner: str, lease_seconds: float, now: datetime | None = None) -> bool:
+    now = now or datetime.utcnow()
+    result = db.execute(
+        update(RefreshTask)
+        .where(RefreshTask.task_id == task_id, RefreshTask.lease_owner == owner, RefreshTask.status == RUNNING)
+        .values(lease_expires_at=now + timedelta(seconds=lease_seconds))
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount == 1
+
+
+def release_lease(db: Session, task_id: str, owner: str):
+    db.execute(
+        update(RefreshTask)
+        .where(RefreshTask.task_id == task_id, RefreshTask.lease_owner == owner)
+        .values(lease_owner=None, lease_expires_at=None)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+
+def enqueue_scheduled_session(db: Session, schedule_key: str) -> RefreshTask | None:
+    """Queue the scheduled run for ``schedule_key`` unless a task is active or the slot is taken.
+
+    Every worker runs the scheduler; the unique ``schedule_key`` makes one of them win.
+    """
+    if find_active_task(db) is not None:
+        return None
+    return claim_scheduled_slot(db, _queued_task(), schedule_key)
+
+
+def enqueue_scheduled_refresh(log=None) -> RefreshTask | None:
+    """Scheduler entry point for the refresh worker: queue a run when a new session closed."""
+    schedule_key = scheduled_refresh_key(log=log)
+    if schedule_key is None:
+        return None
+    db = SessionLocal()
+    try:
+        task = enqueue_scheduled_session(db, schedule_key)
+    finally:
+        db.close()
+    if log:
+        if task is None:
+            log(f"skip scheduled refresh: session {schedule_key} already queued or running")
+        else:
+            log(f"scheduled refresh queued: {task.task_id}")
+    return task
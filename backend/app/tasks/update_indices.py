@@ -1,36 +1,69 @@
 from __future__ import annotations
 
-from datetime import date, datetime, timedelta
-from threading import Lock
+import time
+from datetime import date, datetime
+from threading import Event
 from uuid import uuid4
 
 from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
-from app.core.config import load_app_config
+from app.core.config import AppConfig, load_app_config
 from app.core.database import SessionLocal
+from app.core.metrics import REFRESH_IN_FLIGHT, REFRESH_PROCESSED, REFRESH_RATE, record_cache
+from app.core.profiling import profile_refresh
 from app.models import Index, IndexMetric, RefreshTask
-from app.services.analytics import calculate_percentile
-from app.services.data_provider import fetch_index_history, read_index_list
+from app.services.analytics import compute_index_metrics
+from app.services.data_provider import fetch_index_history
+from app.services.index_list import diff_index_list, load_index_list
+from app.services.negative_cache import clear_negative, is_suppressed, load_negative_cache, record_negative
+from app.services.rate_limit import configure_upstreams
+from app.services.refresh_stats import RefreshStats
+from app.services.retry import HistoryFetchError, RetryPolicy
+from app.services.task_progress import get_progress_registry
+from app.services.trading_calendar import load_trading_calendar, shanghai_now, to_shanghai
 
-_TASK_PROGRESS_LOCK = Lock()
-_TASK_PROGRESS: dict[str, dict[str, object]] = {}
 
+class RefreshCancelled(RuntimeError):
+    """Raised inside a refresh when its ``cancel`` event is set (e.g. the worker lost its lease)."""
 
-def create_refresh_task(db: Session) -> RefreshTask:
-    task = RefreshTask(
+
+def new_refresh_task() -> RefreshTask:
+    return RefreshTask(
         task_id=uuid4().hex,
         status="running",
         started_at=datetime.utcnow(),
         finished_at=None,
         message="Task started",
     )
+
+
+def create_refresh_task(db: Session) -> RefreshTask:
+    task = new_refresh_task()
     db.add(task)
     db.commit()
     db.refresh(task)
     return task
 
 
+def claim_scheduled_slot(db: Session, task: RefreshTask, schedule_key: str) -> RefreshTask | None:
+    """Insert ``task`` as the scheduled run for ``schedule_key``; ``None`` if another process took the slot.
+
+    ``schedule_key`` is unique, so when several API processes or workers fire the same
+    cron tick exactly one insert succeeds. A failed run gives its key back.
+    """
+    task.schedule_key = schedule_key
+    db.add(task)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return None
+    db.refresh(task)
+    return task
+
+
 def _upsert_index(db: Session, code: str, name: str, full_name: str | None) -> Index:
     index = db.get(Index, code)
     if index is None:
@@ -43,13 +76,20 @@ def _upsert_index(db: Session, code: str, name: str, full_name: str | None) -> I
     return index
 
 
-def _has_metric_for_date(db: Session, code: str, as_of_date: date) -> bool:
-    stmt = (
-        select(IndexMetric.id)
-        .where(IndexMetric.index_code == code, IndexMetric.as_of_date == as_of_date)
-        .limit(1)
-    )
-    return db.execute(stmt).scalar_one_or_none() is not None
+def _load_metric_dates(db: Session) -> dict[str, tuple[date, date | None]]:
+    rows = db.execute(select(IndexMetric.index_code, IndexMetric.as_of_date, IndexMetric.last_bar_date)).all()
+    return {code: (as_of_date, last_bar_date) for code, as_of_date, last_bar_date in rows}
+
+
+def _skip_reason(metric_dates: tuple[date, date | None] | None, today: date, latest_session: date) -> str | None:
+    if metric_dates is None:
+        return None
+    as_of_date, last_bar_date = metric_dates
+    if last_bar_date is not None and last_bar_date >= latest_session:
+        return f"last bar {last_bar_date} is the latest session"
+    if as_of_date == today:
+        return "already refreshed today"
+    return None
 
 
 def _normalize_force_codes(force_codes: list[str] | None) -> set[str]:
@@ -58,42 +98,104 @@ def _normalize_force_codes(force_codes: list[str] | None) -> set[str]:
     return {str(code).strip() for code in force_codes if str(code).strip()}
 
 
+def _retry_policy(config: AppConfig, max_retries: int | None) -> RetryPolicy:
+    return RetryPolicy(
+        max_attempts=max(1, max_retries if max_retries is not None else config.retry_max_attempts),
+        base_delay=config.retry_base_delay,
+        max_delay=config.retry_max_delay,
+        jitter=config.retry_jitter,
+        budget=config.retry_budget,
+    )
+
+
+def _check_cancel(cancel: Event | None, processed_count: int, total: int):
+    if cancel is not None and cancel.is_set():
+        raise RefreshCancelled(f"refresh cancelled after {processed_count}/{total} codes")
+
+
 def _set_task_progress(task_id: str, **kwargs):
-    with _TASK_PROGRESS_LOCK:
-        current = _TASK_PROGRESS.get(task_id, {}).copy()
-        current.update(kwargs)
-        total = int(current.get("total_count", 0) or 0)
-        processed = int(current.get("processed_count", 0) or 0)
-        current["progress_percent"] = 100.0 if total <= 0 else round((processed / total) * 100, 2)
-        _TASK_PROGRESS[task_id] = current
+    get_progress_registry().update(task_id, **kwargs)
 
 
 def get_task_progress(task_id: str) -> dict[str, object] | None:
-    with _TASK_PROGRESS_LOCK:
-        progress = _TASK_PROGRESS.get(task_id)
-        return progress.copy() if progress else None
+    return get_progress_registry().get(task_id)
+
+
+def _record_processed(outcome: str, processed_count: int, started: float):
+    REFRESH_PROCESSED.inc(outcome=outcome)
+    elapsed = time.perf_counter() - started
+    if elapsed > 0:
+        REFRESH_RATE.set(processed_count / elapsed)
 
 
 def run_refresh(
     task_id: str,
     progress=None,
     log=None,
-    max_retries: int = 3,
+    max_retries: int | None = None,
     force_all: bool = False,
     force_codes: list[str] | None = None,
+    cancel: Event | None = None,
+):
+    """Run a refresh task to completion.
+
+    When ``cancel`` is set the run stops before the next code and leaves the task
+    row alone: the caller no longer owns it.
+    """
+    with profile_refresh(task_id):
+        _run_refresh(
+            task_id,
+            progress=progress,
+            log=log,
+            max_retries=max_retries,
+            force_all=force_all,
+            force_codes=force_codes,
+            cancel=cancel,
+        )
+
+
+def _run_refresh(
+    task_id: str,
+    progress=None,
+    log=None,
+    max_retries: int | None = None,
+    force_all: bool = False,
+    force_codes: list[str] | None = None,
+    cancel: Event | None = None,
 ):
     config = load_app_config()
+    configure_upstreams(config.upstream_limits)
+    retry_policy = _retry_policy(config, max_retries)
+    retry_budget = retry_policy.new_budget()
     force_code_set = _normalize_force_codes(force_codes)
+    stats = RefreshStats()
+    started = time.perf_counter()
+    REFRESH_IN_FLIGHT.inc()
     db = SessionLocal()
     try:
-        index_list = read_index_list(config.excel_path)
-        if not index_list:
-            raise RuntimeError(f"No index list found at {config.excel_path}")
-
         def emit(message: str):
             if log:
                 log(message)
 
+        with stats.timer("index_list"):
+            snapshot = load_index_list(config.excel_path, cache_path=config.index_list_cache_path)
+        stats.incr("index_list_cache_hit" if snapshot.cache_hit else "index_list_cache_miss")
+        record_cache("index_list", snapshot.cache_hit)
+        index_list = snapshot.items
+        if not index_list:
+            raise RuntimeError(f"No index list found at {config.excel_path}")
+        emit(f"index list loaded from {'cache' if snapshot.cache_hit else 'excel'}: {len(index_list)} codes")
+
+        # Codes that have never been stored get a full backfill regardless of the negative cache.
+        with stats.timer("index_list_diff"):
+            list_diff = diff_index_list(set(db.execute(select(Index.code)).scalars().all()), snapshot.codes)
+        new_codes = set(list_diff.added)
+        if list_diff.changed:
+            emit(
+                f"index list changed: added={len(list_diff.added)} removed={len(list_diff.removed)}"
+                + (f" removed_codes={','.join(list_diff.removed[:20])}" if list_diff.removed else "")
+            )
+
         if force_code_set:
             source_codes = {item["code"] for item in index_list}
             missing_codes = sorted(force_code_set - source_codes)
@@ -104,9 +206,16 @@ def run_refresh(
                 raise RuntimeError("force refresh codes are all missing from index source")
 
         total = len(index_list)
-        today = datetime.utcnow().date()
+        with stats.timer("prepare"):
+            calendar = load_trading_calendar(config.calendar_path)
+            now_local = shanghai_now()
+            today = now_local.date()
+            latest_session = calendar.latest_session(now_local)
+            metric_dates = _load_metric_dates(db)
+            negative_entries = load_negative_cache(db)
         success_count = 0
         skipped_count = 0
+        negative_cached_count = 0
         failed_count = 0
         processed_count = 0
         _set_task_progress(
@@ -116,12 +225,14 @@ def run_refresh(
             processed_count=0,
             success_count=0,
             skipped_count=0,
+            negative_cached_count=0,
             failed_count=0,
             current_index_code=None,
             current_index_name=None,
         )
 
         for i, item in enumerate(index_list, start=1):
+            _check_cancel(cancel, processed_count, total)
             code = item["code"]
             name = item["name"]
             full_name = item.get("full_name") or None
@@ -129,95 +240,144 @@ def run_refresh(
                 progress(i, total, code, name)
             _set_task_progress(task_id, current_index_code=code, current_index_name=name)
 
-            if not force_all and not force_code_set and _has_metric_for_date(db, code, today):
+            skip_reason = None if force_all or force_code_set else _skip_reason(metric_dates.get(code), today, latest_session)
+            if skip_reason:
+                stats.incr("skipped")
                 skipped_count += 1
                 processed_count += 1
-                emit(f"skip already refreshed today: {code} {name}")
+                _record_processed("skipped", processed_count, started)
+                emit(f"skip {skip_reason}: {code} {name}")
                 _set_task_progress(
                     task_id,
                     processed_count=processed_count,
                     success_count=success_count,
                     skipped_count=skipped_count,
+                    negative_cached_count=negative_cached_count,
                     failed_count=failed_count,
                     current_index_code=code,
                     current_index_name=name,
                 )
                 continue
 
-            history_result = None
-            for attempt in range(1, max_retries + 1):
-                history_result = fetch_index_history(
-                    code,
-                    history_years=config.history_years,
-                    index_name=name,
-                    index_full_name=full_name,
+            negative_entry = negative_entries.get(code)
+            negative_applies = not force_all and not force_code_set and code not in new_codes
+            suppressed = negative_applies and is_suppressed(negative_entry, datetime.utcnow())
+            if negative_applies:
+                record_cache("negative_cache", suppressed)
+            if suppressed:
+                stats.incr("negative_cached")
+                negative_cached_count += 1
+                processed_count += 1
+                _record_processed("negative_cached", processed_count, started)
+                emit(
+                    f"skip negative-cached code until {negative_entry.next_probe_at:%Y-%m-%d %H:%M}: {code} {name}"
                 )
-                if history_result is not None and not history_result.frame.empty:
-                    if attempt > 1:
-                        emit(f"history fetch succeeded after retry {attempt}/{max_retries}: {code}")
-                    break
-                emit(f"history fetch retry {attempt}/{max_retries}: {code} {name}")
-            if history_result is None or history_result.frame.empty:
-                _upsert_index(db, code=code, name=name, full_name=full_name)
-                db.execute(delete(IndexMetric).where(IndexMetric.index_code == code))
-                db.commit()
-                emit(f"history fetch failed after retries, set empty metric: {code} {name}")
+                _set_task_progress(
+                    task_id,
+                    processed_count=processed_count,
+                    success_count=success_count,
+                    skipped_count=skipped_count,
+                    negative_cached_count=negative_cached_count,
+                    failed_count=failed_count,
+                    current_index_code=code,
+                    current_index_name=name,
+                )
+                continue
+
+            history_result = None
+            fetch_error: HistoryFetchError | None = None
+            attempt = 0
+            fetch_started = time.perf_counter()
+            while True:
+                attempt += 1
+                stats.incr("fetch_attempts")
+                try:
+                    history_result = fetch_index_history(
+                        code,
+                        history_years=config.history_years,
+                        index_name=name,
+                        index_full_name=full_name,
+                        stats=stats,
+                    )
+                except HistoryFetchError as exc:
+                    fetch_error = exc
+                    if not retry_policy.should_retry(exc, attempt, retry_budget):
+                        break
+                    delay = retry_policy.backoff(attempt)
+                    emit(f"history fetch retry {attempt}/{retry_policy.max_attempts} in {delay:.1f}s: {code} {name}")
+                    stats.incr("fetch_retries")
+                    with stats.timer("retry_sleep"):
+                        if cancel is not None:
+                            cancel.wait(delay)
+                        else:
+                            time.sleep(delay)
+                    _check_cancel(cancel, processed_count, total)
+                    continue
+                if attempt > 1:
+                    emit(f"history fetch succeeded after retry {attempt}/{retry_policy.max_attempts}: {code}")
+                break
+            stats.observe("fetch", time.perf_counter() - fetch_started)
+            if history_result is None:
+                kind = "permanent" if fetch_error is not None and fetch_error.permanent else "transient"
+                stats.incr(f"failed_{kind}")
+                with stats.timer("db_write"):
+                    _upsert_index(db, code=code, name=name, full_name=full_name)
+                    db.execute(delete(IndexMetric).where(IndexMetric.index_code == code))
+                    if fetch_error is not None and fetch_error.permanent:
+                        record_negative(
+                            db,
+                            code,
+                            reason=str(fetch_error),
+                            now=datetime.utcnow(),
+                            base_days=config.negative_cache_base_days,
+                            max_days=config.negative_cache_max_days,
+                        )
+                    db.commit()
+                emit(f"history fetch failed ({kind}) after {attempt} attempt(s), set empty metric: {code} {name}")
                 failed_count += 1
                 processed_count += 1
+                _record_processed("failed", processed_count, started)
                 _set_task_progress(
                     task_id,
                     processed_count=processed_count,
                     success_count=success_count,
                     skipped_count=skipped_count,
+                    negative_cached_count=negative_cached_count,
                     failed_count=failed_count,
                     current_index_code=code,
                     current_index_name=name,
                 )
                 continue
 
-            _upsert_index(db, code=code, name=name, full_name=full_name)
-
-            db.execute(delete(IndexMetric).where(IndexMetric.index_code == code))
-
-            df = history_result.frame
-            closes = [float(v) for v in df["close"].tolist()]
-            current_price = closes[-1]
-            percentile_since_inception = calculate_percentile(current_price, closes)
-
-            one_month_ago = today - timedelta(days=30)
-            df_1m = df[df["trade_date"] >= datetime.combine(one_month_ago, datetime.min.time())]
-            if df_1m.empty:
-                df_1m = df
-            percentile_1m = calculate_percentile(current_price, [float(v) for v in df_1m["close"].tolist()])
-
-            three_year_ago = today - timedelta(days=365 * 3)
-            df_3y = df[df["trade_date"] >= datetime.combine(three_year_ago, datetime.min.time())]
-            if df_3y.empty:
-                df_3y = df
-            percentile_3y = calculate_percentile(current_price, [float(v) for v in df_3y["close"].tolist()])
-
-            db.add(
-                IndexMetric(
-                    index_code=code,
-                    as_of_date=today,
-                    current_price=current_price,
-                    percentile_1m=percentile_1m,
-                    percentile_3y=percentile_3y,
-                    percentile_since_inception=percentile_since_inception,
-                    high_3y=float(df_3y["close"].max()),
-                    low_3y=float(df_3y["close"].min()),
-                    avg_3y=float(df_3y["close"].mean()),
-                )
-            )
+            history = history_result.history
+            stats.incr("history_rows", len(history))
+            with stats.timer("analytics"):
+                metrics = compute_index_metrics(history.trade_date, history.close, today)
 
-            db.commit()
+            with stats.timer("db_write"):
+                _upsert_index(db, code=code, name=name, full_name=full_name)
+                if negative_entry is not None:
+                    clear_negative(db, code)
+                db.execute(delete(IndexMetric).where(IndexMetric.index_code == code))
+                db.add(
+                    IndexMetric(
+                        index_code=code,
+                        as_of_date=today,
+                        last_bar_date=history.trade_date[-1].item(),
+                        **metrics,
+                    )
+                )
+                db.commit()
+            stats.incr("succeeded")
             success_count += 1
             processed_count += 1
+            _record_processed("succeeded", processed_count, started)
             _set_task_progress(
                 task_id,
                 processed_count=processed_count,
                 success_count=success_count,
                 skipped_count=skipped_count,
+                negative_cached_count=negative_cached_count,
                 failed_count=failed_count,
                 current_index_code=code,
                 current_index_name=name,
@@ -229,20 +389,31 @@ def run_refresh(
             task.finished_at = datetime.utcnow()
             task.message = (
                 f"Refresh completed: success={success_count}, "
-                f"skipped={skipped_count}, failed={failed_count}, total={total}"
+                f"skipped={skipped_count}, negative_cached={negative_cached_count}, "
+                f"failed={failed_count}, total={total}, "
+                f"added={len(list_diff.added)}, removed={len(list_diff.removed)}"
             )
+            task.stats_json = stats.to_json()
             db.commit()
             _set_task_progress(task_id, status="completed")
 
+    except RefreshCancelled as exc:
+        # Another worker may have claimed the task by now; its status is not ours to write.
+        db.rollback()
+        if log:
+            log(str(exc))
     except Exception as exc:
         task = db.get(RefreshTask, task_id)
         if task:
             task.status = "failed"
             task.finished_at = datetime.utcnow()
             task.message = str(exc)
+            task.stats_json = stats.to_json()
+            task.schedule_key = None
             db.commit()
         _set_task_progress(task_id, status="failed")
     finally:
+        REFRESH_IN_FLIGHT.dec()
         db.close()
 
 
@@ -274,6 +445,46 @@ def create_and_run_refresh(
         db2.close()
 
 
+def scheduled_refresh_key(log=None) -> str | None:
+    """The latest session's date as a schedule key; ``None`` when it was already refreshed."""
+    config = load_app_config()
+    calendar = load_trading_calendar(config.calendar_path)
+    latest_session = calendar.latest_session()
+    db = SessionLocal()
+    try:
+        last_finished = db.execute(
+            select(RefreshTask.finished_at)
+            .where(RefreshTask.status == "completed")
+            .order_by(RefreshTask.finished_at.desc())
+            .limit(1)
+        ).scalar_one_or_none()
+    finally:
+        db.close()
+    if last_finished is not None and to_shanghai(last_finished) >= calendar.session_ready_at(latest_session):
+        if log:
+            log(f"skip scheduled refresh: no new session since {latest_session}")
+        return None
+    return latest_session.isoformat()
+
+
+def run_scheduled_refresh(log=None) -> RefreshTask | None:
+    """In-process scheduler entry point (``worker.mode: inline``)."""
+    schedule_key = scheduled_refresh_key(log=log)
+    if schedule_key is None:
+        return None
+    db = SessionLocal()
+    try:
+        task = claim_scheduled_slot(db, new_refresh_task(), schedule_key)
+    finally:
+        db.close()
+    if task is None:
+        if log:
+            log(f"skip scheduled refresh: session {schedule_key} already claimed")
+        return None
+    run_refresh(task.task_id, log=log)
+    return get_task(task.task_id)
+
+
 def get_task(task_id: str) -> RefreshTask | None:
     db = SessionLocal()
     try:
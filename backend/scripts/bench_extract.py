@@ -0,0 +1,122 @@
+"""Per-index extraction overhead: row loops versus ``app.services.frame_extract``.
+
+Builds synthetic history and components frames shaped like the akshare ones and
+times the former ``iterrows`` implementations (components fetch and the legacy
+report scripts) against the column-wise helpers, reporting microseconds per index.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT / "backend") not in sys.path:
+    sys.path.insert(0, str(ROOT / "backend"))
+
+from app.services.frame_extract import recent_rows, top_components
+
+
+def synthetic_frames(history_rows: int, component_rows: int, seed: int) -> tuple[pd.DataFrame, pd.DataFrame]:
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end="2024-12-31", periods=history_rows)
+    close = 1000 * np.cumprod(1 + rng.normal(0, 0.01, history_rows))
+    change = rng.normal(0, 1, history_rows)
+    change[rng.random(history_rows) < 0.05] = np.nan
+    history = pd.DataFrame({"日期": dates.strftime("%Y-%m-%d"), "收盘": close, "涨跌幅": change, "成交量": rng.random(history_rows)})
+    components = pd.DataFrame(
+        {
+            "品种代码": [f"{600000 + i:06d}" for i in range(component_rows)],
+            "品种名称": [f"股票{i}" for i in range(component_rows)],
+            "权重": np.round(rng.random(component_rows) * 5, 3).astype(str),
+            "纳入日期": ["2020-01-01"] * component_rows,
+        }
+    )
+    return history, components
+
+
+def loop_components(df: pd.DataFrame, top_n: int) -> list[dict[str, Any]]:
+    rows = df.head(top_n).reset_index(drop=True)
+    result = []
+    for i, row in rows.iterrows():
+        weight = None
+        if len(row) > 2:
+            try:
+                weight = float(row.iloc[2])
+            except Exception:
+                weight = None
+        result.append({"stock_code": str(row.iloc[0]).strip(), "stock_name": str(row.iloc[1]).strip(), "weight": weight, "rank": i + 1})
+    return result
+
+
+def loop_report_rows(history: pd.DataFrame, components: pd.DataFrame) -> tuple[list, list]:
+    top_stocks = []
+    for _, row in components.head(10).iterrows():
+        top_stocks.append((str(row.iloc[0]), str(row.iloc[1])))
+    recent_df = history.tail(10)[["日期", "收盘", "涨跌幅"]]
+    recent_data = [
+        [str(row.iloc[0]), f"{row.iloc[1]:.2f}", f"{row.iloc[2]:.2f}" if pd.notna(row.iloc[2]) else "N/A"]
+        for _, row in recent_df.iterrows()
+    ]
+    return top_stocks, recent_data
+
+
+def vector_components(df: pd.DataFrame, top_n: int) -> list[dict[str, Any]]:
+    columns = top_components(df, top_n, strip=True)
+    return [
+        {"stock_code": code, "stock_name": name, "weight": weight, "rank": rank}
+        for rank, (code, name, weight) in enumerate(zip(columns.codes, columns.names, columns.weights), start=1)
+    ]
+
+
+def vector_report_rows(history: pd.DataFrame, components: pd.DataFrame) -> tuple[list, list]:
+    return top_components(components, 10, missing="N/A").pairs(), recent_rows(history, 10)
+
+
+def time_per_call(func: Callable[[], Any], repeat: int) -> float:
+    func()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-index components/recent-rows extraction")
+    parser.add_argument("--history-rows", type=int, default=730)
+    parser.add_argument("--component-rows", type=int, default=300)
+    parser.add_argument("--top-n", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    history, components = synthetic_frames(args.history_rows, args.component_rows, args.seed)
+    if loop_components(components, args.top_n) != vector_components(components, args.top_n):
+        raise SystemExit("components extraction differs from the row loop")
+    if loop_report_rows(history, components) != vector_report_rows(history, components):
+        raise SystemExit("report rows differ from the row loop")
+
+    results = {}
+    for name, loop, vector in [
+        ("fetch_index_components", lambda: loop_components(components, args.top_n), lambda: vector_components(components, args.top_n)),
+        ("report_rows", lambda: loop_report_rows(history, components), lambda: vector_report_rows(history, components)),
+    ]:
+        loop_us = time_per_call(loop, args.repeat)
+        vector_us = time_per_call(vector, args.repeat)
+        results[name] = {
+            "iterrows_us": round(loop_us, 1),
+            "vectorized_us": round(vector_us, 1),
+            "speedup": round(loop_us / vector_us, 2) if vector_us else None,
+        }
+    print(json.dumps({"params": vars(args), "per_index": results}, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Industry mapping in ``process_index_data``: ``Series.apply`` versus ``map_to_industry``.
+
+Builds synthetic index full names from the industry keywords plus filler words and
+times the former row-wise ``apply`` against ``map_to_industry``, once on names that
+are all distinct (like a real index list) and once on a list with heavy repetition.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from process_index_data import industry_of, keywords, map_to_industry
+
+FILLER = ["中证", "指数", "全收益", "主题", "龙头", "消费", "地"]
+
+
+def synthetic_names(size: int, distinct: int, seed: int) -> pd.Series:
+    rng = random.Random(seed)
+    words = keywords + FILLER
+    pool = ["".join(rng.choice(words) for _ in range(4)) for _ in range(distinct)]
+    return pd.Series(pool if distinct >= size else rng.choices(pool, k=size))
+
+
+def best_of(func: Callable[[], Any], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark index name to industry mapping")
+    parser.add_argument("--size", type=int, default=100_000)
+    parser.add_argument("--repeated-distinct", type=int, default=3000, help="distinct names in the repeated case")
+    parser.add_argument("--repeat", type=int, default=9)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    results = {}
+    for case, distinct in [("distinct", args.size), ("repeated", args.repeated_distinct)]:
+        names = synthetic_names(args.size, distinct, args.seed)
+        expected = [industry_of(name) for name in names]
+        if map_to_industry(names).tolist() != expected:
+            raise SystemExit(f"{case}: map_to_industry differs from the row-wise mapping")
+        apply_s = best_of(lambda: names.apply(industry_of), args.repeat)
+        mapped_s = best_of(lambda: map_to_industry(names), args.repeat)
+        results[case] = {
+            "apply_ms": round(apply_s * 1000, 2),
+            "map_to_industry_ms": round(mapped_s * 1000, 2),
+            "speedup": round(apply_s / mapped_s, 2) if mapped_s else None,
+        }
+    print(json.dumps({"params": vars(args), "results": results}, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
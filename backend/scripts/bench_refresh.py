@@ -0,0 +1,246 @@
+"""Refresh pipeline benchmark on synthetic index universes.
+
+Generates an index list of N codes, then times each stage of the refresh pipeline
+against the offline replay provider: index list read (cold and cached), fetch,
+normalization, analytics and DB writes. ``--end-to-end`` additionally runs
+``run_refresh`` in a subprocess against a throwaway config and database.
+Results are written as JSON; ``--compare`` prints per-stage ratios against an
+earlier result file.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pandas as pd
+import yaml
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT / "backend") not in sys.path:
+    sys.path.insert(0, str(ROOT / "backend"))
+
+from sqlalchemy import create_engine, delete
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import CONFIG_ENV_VAR
+from app.core.database import Base
+from app.models import Index, IndexMetric
+from app.services.analytics import compute_index_metrics
+from app.services.index_list import load_index_list
+from app.services.normalize import normalize_history
+from app.services.providers.replay_provider import ReplayHistoryProvider
+
+SOURCE = "ak_index_zh_a_hist"
+
+END_TO_END_PROBE = """
+import json, sys, time
+from app.core.database import Base, engine
+from app.core.schema import ensure_runtime_schema
+from app.tasks.update_indices import create_and_run_refresh
+Base.metadata.create_all(bind=engine)
+ensure_runtime_schema(engine)
+t0 = time.perf_counter()
+task = create_and_run_refresh()
+elapsed = time.perf_counter() - t0
+print("BENCH " + json.dumps({"seconds": elapsed, "status": task.status, "message": task.message}))
+"""
+
+
+def synthetic_codes(size: int) -> list[str]:
+    return [f"B{i:06d}" for i in range(size)]
+
+
+def write_index_list(path: Path, codes: list[str]):
+    pd.DataFrame(
+        {
+            "代码": codes,
+            "简称": [f"合成指数{c}" for c in codes],
+            "全称": [f"合成全称指数{c}" for c in codes],
+        }
+    ).to_excel(path, index=False)
+
+
+def git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=str(ROOT), capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class StageTimer:
+    def __init__(self):
+        self.totals: dict[str, float] = {}
+
+    def add(self, stage: str, seconds: float):
+        self.totals[stage] = self.totals.get(stage, 0.0) + seconds
+
+
+def bench_stages(size: int, years: int, workdir: Path, seed: int) -> dict[str, object]:
+    codes = synthetic_codes(size)
+    excel_path = workdir / "index_list.xlsx"
+    cache_path = workdir / "index_list.cache.pkl"
+    write_index_list(excel_path, codes)
+    timer = StageTimer()
+
+    t0 = time.perf_counter()
+    snapshot = load_index_list(str(excel_path), cache_path=str(cache_path))
+    timer.add("list_read_cold", time.perf_counter() - t0)
+    t0 = time.perf_counter()
+    load_index_list(str(excel_path), cache_path=str(cache_path))
+    timer.add("list_read_cached", time.perf_counter() - t0)
+
+    provider = ReplayHistoryProvider(seed=seed)
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=years * 365)
+    as_of_date = end_date.date()
+    metric_rows: list[dict[str, object]] = []
+    total_rows = 0
+    for code in snapshot.codes:
+        t0 = time.perf_counter()
+        raw = provider.fetch_raw(SOURCE, code, start_date, end_date)
+        t1 = time.perf_counter()
+        history = normalize_history(SOURCE, raw)
+        t2 = time.perf_counter()
+        metrics = compute_index_metrics(history.trade_date, history.close, as_of_date)
+        t3 = time.perf_counter()
+        timer.add("fetch_stub", t1 - t0)
+        timer.add("normalize", t2 - t1)
+        timer.add("analytics", t3 - t2)
+        total_rows += len(history)
+        metric_rows.append({"index_code": code, "last_bar_date": history.trade_date[-1].item(), **metrics})
+
+    engine = create_engine(f"sqlite:///{(workdir / 'bench.db').as_posix()}")
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    names = {item["code"]: item for item in snapshot.items}
+    db = Session()
+    try:
+        t0 = time.perf_counter()
+        # Mirrors run_refresh: upsert, replace the metric and commit once per index.
+        for row in metric_rows:
+            code = str(row["index_code"])
+            item = names[code]
+            index = db.get(Index, code)
+            if index is None:
+                db.add(Index(code=code, name=item["name"], full_name=item["full_name"], market="CN"))
+            db.flush()
+            db.execute(delete(IndexMetric).where(IndexMetric.index_code == code))
+            db.add(IndexMetric(as_of_date=as_of_date, **row))
+            db.commit()
+        timer.add("db_write", time.perf_counter() - t0)
+    finally:
+        db.close()
+        engine.dispose()
+
+    return {
+        "size": size,
+        "history_rows": total_rows,
+        "stages": {k: round(v, 4) for k, v in timer.totals.items()},
+        "per_code_ms": {k: round(v * 1000 / size, 4) for k, v in timer.totals.items()},
+    }
+
+
+def bench_end_to_end(size: int, years: int, workdir: Path, seed: int) -> dict[str, object]:
+    excel_path = workdir / "e2e_index_list.xlsx"
+    write_index_list(excel_path, synthetic_codes(size))
+    config = {
+        "database": {"url": f"sqlite:///{(workdir / 'e2e.db').as_posix()}"},
+        "data": {
+            "history_years": years,
+            "excel_path": str(excel_path),
+            "calendar_path": str(workdir / "trade_calendar.json"),
+            "index_list_cache_path": str(workdir / "e2e_index_list.cache.pkl"),
+        },
+        "upstream": {name: {"rate": 1e9, "burst": 1e9} for name in ("eastmoney", "sina", "csindex")},
+        "retry": {"base_delay": 0, "max_delay": 0},
+        "provider": {"name": "replay", "replay": {"seed": seed}},
+    }
+    config_path = workdir / "bench_config.yaml"
+    config_path.write_text(yaml.safe_dump(config, allow_unicode=True), encoding="utf-8")
+    env = {**os.environ, CONFIG_ENV_VAR: str(config_path)}
+    proc = subprocess.run(
+        [sys.executable, "-c", END_TO_END_PROBE],
+        cwd=str(ROOT / "backend"),
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    line = next(line for line in proc.stdout.splitlines() if line.startswith("BENCH "))
+    result = json.loads(line[len("BENCH "):])
+    result["seconds"] = round(result["seconds"], 4)
+    result["per_code_ms"] = round(result["seconds"] * 1000 / size, 4)
+    return result
+
+
+def compare(current: dict[str, object], baseline_path: Path):
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    previous = {r["size"]: r for r in baseline.get("results", [])}
+    print(f"compare with {baseline_path} (commit {baseline.get('commit')})")
+    for result in current["results"]:
+        old = previous.get(result["size"])
+        if old is None:
+            continue
+        for stage, seconds in result["stages"].items():
+            before = old.get("stages", {}).get(stage)
+            if before:
+                print(f"  size={result['size']:<6} {stage:<18} {before:9.3f}s -> {seconds:9.3f}s  x{seconds / before:5.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark refresh pipeline stages on synthetic universes")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[100, 1000, 10000])
+    parser.add_argument("--years", type=int, default=5, help="years of synthetic history per code")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--end-to-end", action="store_true", help="also time run_refresh in a subprocess")
+    parser.add_argument("--output", default=None, help="result JSON path")
+    parser.add_argument("--compare", default=None, help="earlier result JSON to compare against")
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory(prefix="bench_refresh_") as tmp:
+            workdir = Path(tmp)
+            result = bench_stages(size, args.years, workdir, args.seed)
+            if args.end_to_end:
+                result["end_to_end"] = bench_end_to_end(size, args.years, workdir, args.seed)
+        results.append(result)
+        stages = ", ".join(f"{k}={v:.3f}s" for k, v in result["stages"].items())
+        print(f"size={size}: {stages}")
+        if "end_to_end" in result:
+            print(f"size={size}: end_to_end={result['end_to_end']['seconds']:.3f}s ({result['end_to_end']['message']})")
+
+    commit = git_revision()
+    payload = {
+        "benchmark": "refresh",
+        "commit": commit,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {"years": args.years, "seed": args.seed},
+        "results": results,
+    }
+    output = Path(args.output) if args.output else (
+        ROOT / "backend" / "bench_results" / f"refresh_{commit or 'unknown'}_{datetime.now():%Y%m%d_%H%M%S}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"results written to {output}")
+
+    if args.compare:
+        compare(payload, Path(args.compare))
+
+
+if __name__ == "__main__":
+    main()
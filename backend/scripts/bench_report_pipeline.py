@@ -0,0 +1,92 @@
+"""Report generation in ``index_analyzer_fixed``: serial loop versus ``_process_pipelined``.
+
+``collect_index`` is replaced by a stub that sleeps ``--fetch-latency-ms`` (standing in
+for the upstream requests) and returns synthetic report data; rendering of the gauge
+and the HTML report is real. The serial run is the ``process_index`` loop without the
+fixed 2 s pause of ``_process_serial``, so only the fetch/render overlap is compared.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from index_analyzer_fixed import IndexAnalyzer
+
+
+def synthetic_indices(count: int) -> list[tuple[str, str]]:
+    return [(f"{930000 + i:06d}", f"合成指数{i}") for i in range(count)]
+
+
+def stub_collect(latency: float):
+    def collect_index(index_code: str, index_name: str) -> dict[str, object]:
+        time.sleep(latency)
+        return {
+            "index_code": index_code,
+            "index_name": index_name,
+            "percentile": 42.0,
+            "temperature_color": "#FFC107",
+            "current_price": 3800.0,
+            "three_year_high": 4200.0,
+            "three_year_low": 3100.0,
+            "three_year_avg": 3650.0,
+            "top_stocks": [(f"{600000 + i}", f"股票{i}") for i in range(10)],
+            "recent_data": [[f"2025-12-{d:02d}", "3800.00", "0.50"] for d in range(18, 28)],
+        }
+
+    return collect_index
+
+
+def analyzer(output_dir: Path, latency: float, plotly_js: str) -> IndexAnalyzer:
+    result = IndexAnalyzer(output_dir=str(output_dir), plotly_js=plotly_js)
+    result.collect_index = stub_collect(latency)
+    return result
+
+
+def run_serial(indices: list[tuple[str, str]], output_dir: Path, latency: float, plotly_js: str) -> tuple[int, int]:
+    target = analyzer(output_dir, latency, plotly_js)
+    ok = sum(1 for code, name in indices if target.process_index(code, name))
+    return ok, len(indices) - ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark serial vs pipelined index report generation")
+    parser.add_argument("--count", type=int, default=40)
+    parser.add_argument("--fetch-latency-ms", type=float, default=200.0)
+    parser.add_argument("--fetch-workers", type=int, default=4)
+    parser.add_argument("--render-workers", nargs="+", type=int, default=[0, 2])
+    parser.add_argument("--plotly-js", default="shared")
+    args = parser.parse_args()
+
+    indices = synthetic_indices(args.count)
+    latency = args.fetch_latency_ms / 1000.0
+    runs = {}
+    with tempfile.TemporaryDirectory(prefix="bench_report_") as tmp:
+        started = time.perf_counter()
+        counts = run_serial(indices, Path(tmp) / "serial", latency, args.plotly_js)
+        runs["serial"] = {"seconds": round(time.perf_counter() - started, 3), "success_fail": counts}
+        for render_workers in args.render_workers:
+            name = f"pipelined_fetch{args.fetch_workers}_render{render_workers}"
+            target = analyzer(Path(tmp) / name, latency, args.plotly_js)
+            started = time.perf_counter()
+            counts = target._process_pipelined(indices, args.fetch_workers, render_workers)
+            runs[name] = {"seconds": round(time.perf_counter() - started, 3), "success_fail": counts}
+
+    baseline = runs["serial"]["seconds"]
+    for run in runs.values():
+        run["speedup"] = round(baseline / run["seconds"], 2) if run["seconds"] else None
+        if run["success_fail"] != runs["serial"]["success_fail"]:
+            raise SystemExit(f"success/fail counts differ from the serial run: {runs}")
+    print(json.dumps({"params": vars(args), "runs": runs}, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
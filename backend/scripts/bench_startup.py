@@ -0,0 +1,98 @@
+"""Cold-start benchmark for the API process.
+
+Runs ``python -X importtime -c "import app.main"`` in a fresh interpreter and reports
+total import time, peak RSS and the slowest modules. Exits non-zero when a budget is
+exceeded or a module that must stay lazy (akshare by default) gets imported.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+import subprocess
+import sys
+
+ROOT = Path(__file__).resolve().parents[2]
+BACKEND_DIR = ROOT / "backend"
+
+PROBE = (
+    "import json, sys, time\n"
+    "t0 = time.perf_counter()\n"
+    "import {module}\n"
+    "elapsed = time.perf_counter() - t0\n"
+    "try:\n"
+    "    import resource\n"
+    "    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss\n"
+    "    rss_mb = rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024\n"
+    "except ImportError:\n"
+    "    rss_mb = None\n"
+    "print('BENCH ' + json.dumps([elapsed, rss_mb, sorted(m for m in sys.modules if '.' not in m)]))\n"
+)
+
+
+def parse_importtime(stderr: str) -> list[tuple[str, int, int]]:
+    rows: list[tuple[str, int, int]] = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = (part.strip() for part in line.split(":", 1)[1].split("|"))
+        rows.append((name, int(self_us), int(cumulative_us)))
+    return rows
+
+
+def run_probe(module: str) -> dict[str, object]:
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE.format(module=module)],
+        cwd=str(BACKEND_DIR),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    bench_line = next(line for line in proc.stdout.splitlines() if line.startswith("BENCH "))
+    elapsed, rss_mb, top_level_modules = json.loads(bench_line[len("BENCH "):])
+    rows = parse_importtime(proc.stderr)
+    slowest = sorted(rows, key=lambda row: row[2], reverse=True)[:15]
+    return {
+        "module": module,
+        "import_seconds": round(elapsed, 4),
+        "peak_rss_mb": round(rss_mb, 1) if rss_mb is not None else None,
+        "top_level_modules": top_level_modules,
+        "slowest": [{"module": name, "self_us": s, "cumulative_us": c} for name, s, c in slowest],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark API cold start (import time and RSS)")
+    parser.add_argument("--module", default="app.main", help="module to import")
+    parser.add_argument("--max-seconds", type=float, default=None, help="fail when import takes longer")
+    parser.add_argument("--max-rss-mb", type=float, default=None, help="fail when peak RSS is larger")
+    parser.add_argument("--forbid", nargs="*", default=["akshare"], help="top-level modules that must not load")
+    parser.add_argument("--json", action="store_true", help="print the full result as JSON")
+    args = parser.parse_args()
+
+    result = run_probe(args.module)
+    problems: list[str] = []
+    loaded = set(result["top_level_modules"])
+    for name in args.forbid:
+        if name in loaded:
+            problems.append(f"{name} imported at startup")
+    if args.max_seconds is not None and result["import_seconds"] > args.max_seconds:
+        problems.append(f"import took {result['import_seconds']}s > {args.max_seconds}s")
+    rss = result["peak_rss_mb"]
+    if args.max_rss_mb is not None and rss is not None and rss > args.max_rss_mb:
+        problems.append(f"peak RSS {rss}MB > {args.max_rss_mb}MB")
+
+    if args.json:
+        print(json.dumps({**result, "problems": problems}, ensure_ascii=False, indent=2))
+    else:
+        print(f"import {args.module}: {result['import_seconds']}s, peak RSS {rss}MB")
+        for row in result["slowest"]:
+            print(f"  {row['cumulative_us'] / 1000:9.1f} ms  {row['module']}")
+        for problem in problems:
+            print(f"FAIL: {problem}")
+    raise SystemExit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
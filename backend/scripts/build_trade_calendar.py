@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import argparse
+from datetime import date
+from pathlib import Path
+import sys
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT / "backend") not in sys.path:
+    sys.path.insert(0, str(ROOT / "backend"))
+
+from app.core.config import load_app_config
+from app.services.trading_calendar import load_trading_calendar, save_trading_calendar
+
+
+def fetch_sessions() -> list[date]:
+    import akshare as ak
+
+    df = ak.tool_trade_date_hist_sina()
+    dates = pd.to_datetime(df.iloc[:, 0], errors="coerce").dropna()
+    return [d.date() for d in dates]
+
+
+def main():
+    config = load_app_config()
+    parser = argparse.ArgumentParser(description="Build the local SSE/SZSE trading calendar cache")
+    parser.add_argument("--output", default=config.calendar_path, help="calendar JSON path")
+    args = parser.parse_args()
+
+    sessions = fetch_sessions()
+    if not sessions:
+        raise SystemExit("upstream returned no trading dates")
+    save_trading_calendar(args.output, sessions, source="sina")
+    calendar = load_trading_calendar(args.output)
+    print(f"saved {len(calendar.sessions)} sessions ({calendar.first} ~ {calendar.last}) to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,334 @@
+"""Load test for the read endpoints against a synthetic database.
+
+Seeds a throwaway SQLite database with N ``Index``/``IndexMetric`` rows, then drives
+``/api/v1/indices``, ``/indices/{code}``, ``/stats/heatmap`` and ``/stats/distribution``
+with concurrent clients, either in-process through httpx's ASGI transport or against
+uvicorn on localhost (``--uvicorn``). With ``--writer`` a background thread rewrites
+metrics the way ``run_refresh`` does (delete, insert, commit per index) while the
+readers run. Reports throughput and p50/p95/p99 latency per endpoint mix as JSON.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime
+from pathlib import Path
+
+import numpy as np
+import yaml
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT / "backend") not in sys.path:
+    sys.path.insert(0, str(ROOT / "backend"))
+
+from app.core.config import CONFIG_ENV_VAR
+
+# (name, weight, path template). "{code}" is filled with a random seeded code and
+# "{q}" with a random code prefix, so cache-friendly and cache-hostile requests mix.
+DEFAULT_MIX = [
+    ("indices_default", 30, "/api/v1/indices"),
+    ("indices_search", 15, "/api/v1/indices?q={q}&page_size=50"),
+    ("indices_sort_pct_desc", 10, "/api/v1/indices?sort_by=percentile_3y&sort_order=desc&page_size=100"),
+    ("indices_deep_page", 5, "/api/v1/indices?page={page}&page_size=200"),
+    ("index_detail", 30, "/api/v1/indices/{code}"),
+    ("stats_heatmap", 5, "/api/v1/stats/heatmap"),
+    ("stats_distribution", 5, "/api/v1/stats/distribution"),
+]
+
+
+def synthetic_codes(size: int) -> list[str]:
+    return [f"L{i:06d}" for i in range(size)]
+
+
+def synthetic_metric(rng: random.Random, code: str, as_of_date: date) -> dict[str, object]:
+    low = rng.uniform(500, 3000)
+    high = low * rng.uniform(1.1, 2.5)
+    price = rng.uniform(low, high)
+    return {
+        "index_code": code,
+        "as_of_date": as_of_date,
+        "current_price": round(price, 2),
+        "percentile_1m": round(rng.uniform(0, 100), 2),
+        "percentile_3y": round(rng.uniform(0, 100), 2),
+        "percentile_since_inception": round(rng.uniform(0, 100), 2),
+        "high_3y": round(high, 2),
+        "low_3y": round(low, 2),
+        "avg_3y": round((high + low) / 2, 2),
+        "last_bar_date": as_of_date,
+    }
+
+
+def seed_database(codes: list[str], seed: int):
+    from app.core.database import Base, SessionLocal, engine
+    from app.core.schema import ensure_runtime_schema
+    from app.models import Index, IndexMetric
+
+    Base.metadata.create_all(bind=engine)
+    ensure_runtime_schema(engine)
+    rng = random.Random(seed)
+    today = date.today()
+    now = datetime.utcnow()
+    with SessionLocal() as db:
+        db.execute(
+            Index.__table__.insert(),
+            [
+                {"code": c, "name": f"合成指数{c}", "full_name": f"合成全称指数{c}", "market": "CN",
+                 "created_at": now, "updated_at": now}
+                for c in codes
+            ],
+        )
+        db.execute(IndexMetric.__table__.insert(), [synthetic_metric(rng, c, today) for c in codes])
+        db.commit()
+
+
+class RefreshWriter(threading.Thread):
+    """Rewrites one metric per commit, like run_refresh, until stopped."""
+
+    def __init__(self, codes: list[str], rate: float, seed: int):
+        super().__init__(name="loadtest-writer", daemon=True)
+        self.codes = codes
+        self.rate = rate
+        self.rng = random.Random(seed + 1)
+        self.stop_event = threading.Event()
+        self.writes = 0
+        self.commit_seconds: list[float] = []
+
+    def run(self):
+        from sqlalchemy import delete
+
+        from app.core.database import SessionLocal
+        from app.models import Index, IndexMetric
+
+        interval = 1.0 / self.rate if self.rate > 0 else 0.0
+        today = date.today()
+        with SessionLocal() as db:
+            while not self.stop_event.is_set():
+                code = self.rng.choice(self.codes)
+                t0 = time.perf_counter()
+                index = db.get(Index, code)
+                if index is not None:
+                    index.updated_at = datetime.utcnow()
+                db.execute(delete(IndexMetric).where(IndexMetric.index_code == code))
+                db.add(IndexMetric(**synthetic_metric(self.rng, code, today)))
+                db.commit()
+                self.commit_seconds.append(time.perf_counter() - t0)
+                self.writes += 1
+                if interval:
+                    self.stop_event.wait(interval)
+
+    def stop(self):
+        self.stop_event.set()
+        self.join()
+
+
+def render_path(template: str, rng: random.Random, codes: list[str]) -> str:
+    code = rng.choice(codes)
+    max_page = max(1, len(codes) // 200)
+    return template.format(code=code, q=code[: rng.randint(3, 5)], page=rng.randint(1, max_page))
+
+
+def summarize(latencies: list[float], errors: int, seconds: float) -> dict[str, object]:
+    arr = np.asarray(latencies, dtype=float) * 1000
+    if arr.size == 0:
+        return {"requests": 0, "errors": errors, "rps": 0.0}
+    p50, p95, p99 = np.percentile(arr, [50, 95, 99])
+    return {
+        "requests": int(arr.size),
+        "errors": errors,
+        "rps": round(arr.size / seconds, 2) if seconds > 0 else None,
+        "mean_ms": round(float(arr.mean()), 2),
+        "p50_ms": round(float(p50), 2),
+        "p95_ms": round(float(p95), 2),
+        "p99_ms": round(float(p99), 2),
+        "max_ms": round(float(arr.max()), 2),
+    }
+
+
+async def drive(client, codes: list[str], mix, concurrency: int, duration: float, seed: int) -> dict[str, object]:
+    names = [name for name, _, _ in mix]
+    weights = [weight for _, weight, _ in mix]
+    templates = {name: template for name, _, template in mix}
+    latencies: dict[str, list[float]] = {name: [] for name in names}
+    errors: dict[str, int] = {name: 0 for name in names}
+    deadline = time.perf_counter() + duration
+
+    async def client_loop(worker: int):
+        rng = random.Random(seed * 1000 + worker)
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights)[0]
+            path = render_path(templates[name], rng, codes)
+            t0 = time.perf_counter()
+            try:
+                response = await client.get(path)
+                ok = response.status_code == 200
+            except Exception:
+                ok = False
+            latencies[name].append(time.perf_counter() - t0)
+            if not ok:
+                errors[name] += 1
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(client_loop(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - t0
+    all_latencies = [x for values in latencies.values() for x in values]
+    return {
+        "seconds": round(elapsed, 3),
+        "overall": summarize(all_latencies, sum(errors.values()), elapsed),
+        "endpoints": {name: summarize(latencies[name], errors[name], elapsed) for name in names},
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_uvicorn(port: int, env: dict[str, str]) -> subprocess.Popen:
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=str(ROOT / "backend"),
+        env=env,
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return proc
+        except OSError:
+            if proc.poll() is not None:
+                raise SystemExit("uvicorn exited during startup")
+            time.sleep(0.2)
+    proc.terminate()
+    raise SystemExit("uvicorn did not start within 30s")
+
+
+def run_phase(label: str, args, codes: list[str], base_url: str | None) -> dict[str, object]:
+    import httpx
+
+    writer = RefreshWriter(codes, args.writer_rate, args.seed) if label == "with_writer" else None
+
+    async def go():
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        if base_url:
+            client = httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60)
+        else:
+            from app.main import app
+
+            client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://loadtest", timeout=60)
+        async with client:
+            if args.warmup > 0:
+                await drive(client, codes, DEFAULT_MIX, args.concurrency, args.warmup, args.seed + 99)
+            if writer is not None:
+                writer.start()
+            try:
+                return await drive(client, codes, DEFAULT_MIX, args.concurrency, args.duration, args.seed)
+            finally:
+                if writer is not None:
+                    writer.stop()
+
+    result = asyncio.run(go())
+    if writer is not None:
+        result["writer"] = {"writes": writer.writes, **summarize(writer.commit_seconds, 0, result["seconds"])}
+    return result
+
+
+def print_phase(label: str, result: dict[str, object]):
+    overall = result["overall"]
+    print(f"[{label}] {overall['requests']} requests in {result['seconds']}s, {overall['rps']} req/s, "
+          f"errors={overall['errors']}")
+    for name, row in result["endpoints"].items():
+        if not row["requests"]:
+            continue
+        print(f"  {name:<24} n={row['requests']:<6} p50={row['p50_ms']:8.2f}ms p95={row['p95_ms']:8.2f}ms "
+              f"p99={row['p99_ms']:8.2f}ms err={row['errors']}")
+    if "writer" in result:
+        w = result["writer"]
+        print(f"  writer commits={w['writes']} p50={w.get('p50_ms')}ms p99={w.get('p99_ms')}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the read API on a synthetic database")
+    parser.add_argument("--indices", type=int, default=10000, help="number of synthetic indices to seed")
+    parser.add_argument("--concurrency", type=int, default=100, help="concurrent clients")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds per phase")
+    parser.add_argument("--warmup", type=float, default=2.0, help="warm-up seconds before each phase")
+    parser.add_argument("--writer", action="store_true", help="add a phase with a concurrent refresh writer")
+    parser.add_argument("--writer-rate", type=float, default=50.0, help="writer commits per second (0 = flat out)")
+    parser.add_argument("--uvicorn", action="store_true", help="serve through uvicorn on localhost")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="result JSON path")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="loadtest_api_") as tmp:
+        workdir = Path(tmp)
+        config_path = workdir / "loadtest_config.yaml"
+        config = {
+            "database": {"url": f"sqlite:///{(workdir / 'loadtest.db').as_posix()}"},
+            "data": {"excel_path": str(workdir / "missing.xlsx")},
+            "provider": {"name": "replay"},
+        }
+        config_path.write_text(yaml.safe_dump(config, allow_unicode=True), encoding="utf-8")
+        # app.core.database builds its engine at import time, so the override must be set first.
+        os.environ[CONFIG_ENV_VAR] = str(config_path)
+
+        codes = synthetic_codes(args.indices)
+        t0 = time.perf_counter()
+        seed_database(codes, args.seed)
+        print(f"seeded {len(codes)} indices in {time.perf_counter() - t0:.2f}s")
+
+        server = None
+        base_url = None
+        if args.uvicorn:
+            port = free_port()
+            server = start_uvicorn(port, dict(os.environ))
+            base_url = f"http://127.0.0.1:{port}"
+        try:
+            phases = {"read_only": run_phase("read_only", args, codes, base_url)}
+            print_phase("read_only", phases["read_only"])
+            if args.writer:
+                phases["with_writer"] = run_phase("with_writer", args, codes, base_url)
+                print_phase("with_writer", phases["with_writer"])
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait(timeout=10)
+
+    payload = {
+        "benchmark": "loadtest_api",
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {
+            "indices": args.indices,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+            "writer_rate": args.writer_rate if args.writer else None,
+            "transport": "uvicorn" if args.uvicorn else "asgi",
+            "seed": args.seed,
+        },
+        "mix": [{"name": n, "weight": w, "path": p} for n, w, p in DEFAULT_MIX],
+        "phases": phases,
+    }
+    output = Path(args.output) if args.output else (
+        ROOT / "backend" / "bench_results" / f"loadtest_{datetime.now():%Y%m%d_%H%M%S}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
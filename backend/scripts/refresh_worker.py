@@ -0,0 +1,166 @@
+"""Standalone refresh worker.
+
+Claims queued refresh tasks from the ``refresh_tasks`` table with a lease, runs them
+outside the API process and renews the lease from a heartbeat thread while the
+refresh runs. It also owns the refresh schedule (``worker.mode: queue``), so the
+schedule fires once regardless of how many API workers are running. Several workers
+may run side by side; each task is claimed by exactly one of them.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import signal
+import socket
+import threading
+from datetime import datetime
+from pathlib import Path
+import sys
+
+ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT / "backend") not in sys.path:
+    sys.path.insert(0, str(ROOT / "backend"))
+
+from app.core.config import load_app_config
+from app.core.database import Base, SessionLocal, engine
+from app.core.schema import ensure_runtime_schema
+from app.scheduler import start_scheduler, stop_scheduler
+from app.tasks.refresh_queue import (
+    claim_next,
+    enqueue_scheduled_refresh,
+    fail_exhausted,
+    release_lease,
+    renew_lease,
+    task_options,
+)
+from app.tasks.update_indices import run_refresh
+
+
+def setup_logger() -> logging.Logger:
+    log_dir = ROOT / "backend" / "logs"
+    log_dir.mkdir(parents=True, exist_ok=True)
+    log_path = log_dir / f"refresh_worker_{datetime.now().strftime('%Y%m%d')}.log"
+
+    logger = logging.getLogger("refresh_worker")
+    logger.setLevel(logging.INFO)
+
+    formatter = logging.Formatter("[%(asctime)s] %(message)s", datefmt="%Y-%m-%dT%H:%M:%S")
+
+    file_handler = logging.FileHandler(log_path, encoding="utf-8")
+    file_handler.setFormatter(formatter)
+    logger.addHandler(file_handler)
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(formatter)
+    logger.addHandler(stream_handler)
+
+    logger.info("log_file=%s", log_path)
+    return logger
+
+
+class LeaseHeartbeat(threading.Thread):
+    def __init__(self, task_id: str, owner: str, lease_seconds: float, logger: logging.Logger):
+        super().__init__(name=f"lease-{task_id[:8]}", daemon=True)
+        self.task_id = task_id
+        self.owner = owner
+        self.lease_seconds = lease_seconds
+        self.logger = logger
+        self.stop_event = threading.Event()
+        # Set when another worker holds the task now; the refresh checks it between codes.
+        self.lost = threading.Event()
+
+    def run(self):
+        interval = max(1.0, self.lease_seconds / 3)
+        while not self.stop_event.wait(interval):
+            db = SessionLocal()
+            try:
+                if not renew_lease(db, self.task_id, self.owner, self.lease_seconds):
+                    self.logger.warning("lease lost, cancelling refresh: task_id=%s", self.task_id)
+                    self.lost.set()
+                    return
+            except Exception as exc:
+                self.logger.warning("lease renewal failed: task_id=%s error=%s", self.task_id, exc)
+            finally:
+                db.close()
+
+    def stop(self):
+        self.stop_event.set()
+        self.join()
+
+
+def run_claimed(task, owner: str, lease_seconds: float, logger: logging.Logger):
+    options = task_options(task)
+    logger.info("task claimed: task_id=%s attempt=%s options=%s", task.task_id, task.attempts, options)
+    heartbeat = LeaseHeartbeat(task.task_id, owner, lease_seconds, logger)
+    heartbeat.start()
+    try:
+        run_refresh(task.task_id, log=logger.info, cancel=heartbeat.lost, **options)
+    finally:
+        heartbeat.stop()
+        db = SessionLocal()
+        try:
+            release_lease(db, task.task_id, owner)
+        finally:
+            db.close()
+    if heartbeat.lost.is_set():
+        logger.info("task abandoned after lease loss: task_id=%s", task.task_id)
+    else:
+        logger.info("task finished: task_id=%s", task.task_id)
+
+
+def poll_once(owner: str, logger: logging.Logger) -> bool:
+    config = load_app_config()
+    db = SessionLocal()
+    try:
+        abandoned = fail_exhausted(db, config.worker_max_attempts)
+        if abandoned:
+            logger.info("marked %s task(s) with exhausted leases as failed", abandoned)
+        task = claim_next(db, owner, config.worker_lease_seconds)
+    finally:
+        db.close()
+    if task is None:
+        return False
+    run_claimed(task, owner, config.worker_lease_seconds, logger)
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run queued refresh tasks and the refresh schedule")
+    parser.add_argument("--once", action="store_true", help="drain the queue once and exit")
+    parser.add_argument("--no-scheduler", action="store_true", help="only consume the queue")
+    args = parser.parse_args()
+
+    logger = setup_logger()
+    config = load_app_config()
+    owner = f"{socket.gethostname()}:{os.getpid()}"
+    Base.metadata.create_all(bind=engine)
+    ensure_runtime_schema(engine)
+    logger.info("refresh worker start: owner=%s mode=%s", owner, config.worker_mode)
+
+    stop = threading.Event()
+
+    def request_stop(signum, frame):
+        logger.info("stop requested (signal %s), finishing current task", signum)
+        stop.set()
+
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+
+    if not args.once and not args.no_scheduler:
+        start_scheduler(job=enqueue_scheduled_refresh)
+    try:
+        while not stop.is_set():
+            ran = poll_once(owner, logger)
+            if args.once and not ran:
+                break
+            if not ran:
+                stop.wait(config.worker_poll_seconds)
+    finally:
+        stop_scheduler()
+    logger.info("refresh worker stopped")
+
+
+if __name__ == "__main__":
+    main()
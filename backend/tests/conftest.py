@@ -1,8 +1,28 @@
 import sys
 from pathlib import Path
 
+import pytest
+
 ROOT = Path(__file__).resolve().parents[2]
 BACKEND_DIR = ROOT / "backend"
-if str(BACKEND_DIR) not in sys.path:
-    sys.path.insert(0, str(BACKEND_DIR))
+for path in (ROOT, BACKEND_DIR / "scripts", BACKEND_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+
+class FakeClock:
+    """Manually advanced clock for code that takes ``clock``/``sleep`` callables."""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.now += seconds
+
 
+@pytest.fixture
+def clock() -> FakeClock:
+    return FakeClock()
@@ -15,3 +15,11 @@ def test_temperature_status():
     assert get_temperature_status(50, low=30, high=70) == "medium"
     assert get_temperature_status(90, low=30, high=70) == "high"
 
+
+def test_calculate_percentile_strict_and_nan():
+    history = [1, 2, 3, 3, float("nan"), 5]
+    assert calculate_percentile(3, history) == 80.0
+    assert calculate_percentile(3, history, inclusive=False) == 40.0
+    assert calculate_percentile(1, [1, 2, 4], inclusive=False, decimals=None) == 0.0
+    assert calculate_percentile(2, [1, 2, 4], decimals=None) == (2 / 3) * 100
+    assert calculate_percentile(2, [float("nan")]) == 50.0
@@ -0,0 +1,92 @@
+import threading
+import time
+from datetime import date
+
+import pytest
+
+from utils.etf_cache import EtfMemo
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not reached")
+        time.sleep(0.005)
+
+
+def _call_concurrently(memo, fetch, callers):
+    results, errors = [], []
+
+    def worker():
+        try:
+            results.append(memo.get_or_fetch("etf_quote", "510300", fetch))
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=worker) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    return threads, results, errors
+
+
+def test_concurrent_callers_share_one_load():
+    memo = EtfMemo()
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(5)
+        return {"price": 4.2}
+
+    threads, results, errors = _call_concurrently(memo, fetch, callers=8)
+    # Every caller but the loader is parked on the in-flight future before the load finishes.
+    _wait_for(lambda: memo.hits == 7)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert calls == [1]
+    assert errors == []
+    assert results == [{"price": 4.2}] * 8
+    results[0]["price"] = 0
+    assert memo.get_or_fetch("etf_quote", "510300", fetch) == {"price": 4.2}
+
+
+def test_loader_error_reaches_waiters_and_is_not_cached():
+    memo = EtfMemo()
+    release = threading.Event()
+
+    def failing():
+        release.wait(5)
+        raise ConnectionError("upstream reset")
+
+    threads, results, errors = _call_concurrently(memo, failing, callers=4)
+    _wait_for(lambda: memo.hits == 3)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == []
+    assert len(errors) == 4
+    assert all(isinstance(exc, ConnectionError) for exc in errors)
+    assert memo.get_or_fetch("etf_quote", "510300", lambda: {"price": 4.3}) == {"price": 4.3}
+    assert memo.misses == 2
+
+
+def test_day_rollover_ignores_and_drops_previous_pickle(tmp_path):
+    monday = EtfMemo(cache_dir=str(tmp_path), today=date(2026, 1, 5))
+    monday.get_or_fetch("etf_quote", "510300", lambda: {"price": 4.2})
+    monday.get_or_fetch("etf_quote", "510500", lambda: None)
+    monday.save()
+    assert [p.name for p in tmp_path.iterdir()] == ["etf_memo_2026-01-05.pkl"]
+
+    same_day = EtfMemo(cache_dir=str(tmp_path), today=date(2026, 1, 5))
+    assert same_day.get_or_fetch("etf_quote", "510300", pytest.fail) == {"price": 4.2}
+    assert same_day.get_or_fetch("etf_quote", "510500", lambda: {"price": 6.1}) == {"price": 6.1}
+
+    tuesday = EtfMemo(cache_dir=str(tmp_path), today=date(2026, 1, 6))
+    assert tuesday.get_or_fetch("etf_quote", "510300", lambda: {"price": 4.4}) == {"price": 4.4}
+    tuesday.save()
+    assert [p.name for p in tmp_path.iterdir()] == ["etf_memo_2026-01-06.pkl"]
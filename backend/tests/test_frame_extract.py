@@ -0,0 +1,58 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from app.services.frame_extract import recent_rows, top_components
+
+
+def _iterrows_components(df: pd.DataFrame, top_n: int) -> list[tuple[str, str, float | None]]:
+    result = []
+    for _, row in df.head(top_n).iterrows():
+        weight = None
+        if len(row) > 2:
+            try:
+                weight = float(row.iloc[2])
+            except Exception:
+                weight = None
+        result.append((str(row.iloc[0]).strip(), str(row.iloc[1]).strip(), weight))
+    return result
+
+
+def test_top_components_matches_row_loop():
+    df = pd.DataFrame(
+        {
+            "品种代码": [" 600000", "000001", "300750", "688981"],
+            "品种名称": ["浦发银行 ", "平安银行", "宁德时代", "中芯国际"],
+            "权重": ["1.5", "bad", 2, 0.25],
+        }
+    )
+    columns = top_components(df, 3, strip=True)
+    assert list(zip(columns.codes, columns.names, columns.weights)) == _iterrows_components(df, 3)
+    assert columns.pairs() == [("600000", "浦发银行"), ("000001", "平安银行"), ("300750", "宁德时代")]
+
+
+def test_top_components_fills_missing_columns():
+    df = pd.DataFrame({"code": ["600000", "000001"]})
+    columns = top_components(df, missing="N/A")
+    assert columns.pairs() == [("600000", "N/A"), ("000001", "N/A")]
+    assert columns.weights == [None, None]
+    assert len(top_components(None)) == 0
+    assert len(top_components(pd.DataFrame())) == 0
+
+
+def test_recent_rows_formats_like_row_loop():
+    df = pd.DataFrame(
+        {
+            "日期": [date(2024, 1, d) for d in range(2, 7)],
+            "收盘": [10.0, 10.125, 10.555, np.nan, 11.0],
+            "涨跌幅": [None, 1.25, -0.3, 0.0, 4.999],
+        }
+    )
+    expected = [
+        [str(row[0]), f"{row[1]:.2f}", f"{row[2]:.2f}" if pd.notna(row[2]) else "N/A"]
+        for row in df.tail(3)[["日期", "收盘", "涨跌幅"]].values.tolist()
+    ]
+    assert recent_rows(df, 3) == expected
+    assert recent_rows(df.drop(columns=["涨跌幅"]), 2) == [["2024-01-05", "nan", "N/A"], ["2024-01-06", "11.00", "N/A"]]
+    assert recent_rows(df.drop(columns=["日期"])) == []
@@ -0,0 +1,39 @@
+import os
+
+import pandas as pd
+
+from app.services.index_list import diff_index_list, load_index_list, parse_index_frame
+
+
+def test_parse_index_frame_cleans_columns():
+    df = pd.DataFrame({"code": [" 000300 ", None, "930050"], "name": ["沪深300", "x", None], "full": [None, "x", "全称"]})
+    assert parse_index_frame(df) == [
+        {"code": "000300", "name": "沪深300", "full_name": ""},
+        {"code": "930050", "name": "INDEX-930050", "full_name": "全称"},
+    ]
+
+
+def test_load_index_list_uses_sidecar_until_content_changes(tmp_path):
+    excel = tmp_path / "list.xlsx"
+    cache = tmp_path / "list.pkl"
+    pd.DataFrame({"code": ["000300"], "name": ["沪深300"]}).to_excel(excel, index=False)
+
+    first = load_index_list(str(excel), cache_path=str(cache))
+    assert not first.cache_hit
+    assert load_index_list(str(excel), cache_path=str(cache)).cache_hit
+
+    # Touching the file without changing content still hits the cache via the hash check.
+    os.utime(excel, ns=(excel.stat().st_atime_ns, excel.stat().st_mtime_ns + 10**9))
+    assert load_index_list(str(excel), cache_path=str(cache)).cache_hit
+
+    pd.DataFrame({"code": ["000300", "000905"], "name": ["沪深300", "中证500"]}).to_excel(excel, index=False)
+    changed = load_index_list(str(excel), cache_path=str(cache))
+    assert not changed.cache_hit
+    assert len(changed.items) == 2
+
+
+def test_diff_index_list():
+    diff = diff_index_list({"000300", "399006"}, ["000300", "000905"])
+    assert diff.added == ["000905"]
+    assert diff.removed == ["399006"]
+    assert diff.changed
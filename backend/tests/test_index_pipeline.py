@@ -0,0 +1,56 @@
+import pytest
+
+import index_analyzer_fixed
+from index_analyzer_fixed import IndexAnalyzer
+
+INDICES = [
+    ("000300", "沪深300"),
+    ("000905", "中证500"),
+    ("NODATA", "无数据"),
+    ("RAISES", "获取出错"),
+    ("BADREP", "渲染出错"),
+    ("399006", "创业板指"),
+]
+
+
+def _stub_collect(index_code, index_name):
+    if index_code == "NODATA":
+        return None
+    if index_code == "RAISES":
+        raise ConnectionError("upstream reset")
+    report = {
+        "index_code": index_code,
+        "index_name": index_name,
+        "percentile": 42.0,
+        "temperature_color": "#FFC107",
+        "current_price": 3800.0,
+        "three_year_high": 4200.0,
+        "three_year_low": 3100.0,
+        "three_year_avg": 3650.0,
+        "top_stocks": [("600519", "贵州茅台")],
+        "recent_data": [["2025-12-31", "3800.00", "0.50"]],
+    }
+    if index_code == "BADREP":
+        del report["current_price"]
+    return report
+
+
+def _analyzer(output_dir):
+    analyzer = IndexAnalyzer(output_dir=str(output_dir), plotly_js="cdn")
+    analyzer.collect_index = _stub_collect
+    return analyzer
+
+
+@pytest.mark.parametrize("fetch_workers,render_workers", [(4, 0), (3, 2)])
+def test_pipelined_matches_serial_counts(tmp_path, monkeypatch, fetch_workers, render_workers):
+    monkeypatch.setattr(index_analyzer_fixed.time, "sleep", lambda seconds: None)
+    serial_dir = tmp_path / "serial"
+    pipelined_dir = tmp_path / "pipelined"
+
+    serial = _analyzer(serial_dir)._process_serial(INDICES)
+    pipelined = _analyzer(pipelined_dir)._process_pipelined(INDICES, fetch_workers, render_workers)
+
+    assert serial == pipelined == (3, 3)
+    reports = sorted(p.name for p in serial_dir.glob("*_report.html"))
+    assert reports == sorted(p.name for p in pipelined_dir.glob("*_report.html"))
+    assert reports == ["000300_沪深300_report.html", "000905_中证500_report.html", "399006_创业板指_report.html"]
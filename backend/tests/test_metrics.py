@@ -0,0 +1,78 @@
+import time
+
+from fastapi import BackgroundTasks, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+from app.core.metrics import (
+    HTTP_LATENCY,
+    SQL_PER_REQUEST,
+    SQL_QUERIES,
+    MetricsMiddleware,
+    MetricsRegistry,
+    instrument_engine,
+)
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = MetricsRegistry()
+    latency = registry.histogram("req_seconds", "Request latency.", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        latency.observe(value, route="/a")
+
+    text = registry.render()
+    assert "# TYPE req_seconds histogram" in text
+    assert 'req_seconds_bucket{route="/a",le="0.1"} 1' in text
+    assert 'req_seconds_bucket{route="/a",le="1"} 3' in text
+    assert 'req_seconds_bucket{route="/a",le="+Inf"} 4' in text
+    assert 'req_seconds_count{route="/a"} 4' in text
+    assert latency.count(route="/a") == 4
+
+
+def test_counter_and_gauge_labels():
+    registry = MetricsRegistry()
+    calls = registry.counter("calls_total", "Calls.", ("source", "outcome"))
+    in_flight = registry.gauge("in_flight", "In flight.")
+    calls.inc(source="sina", outcome="ok")
+    calls.inc(2, source="sina", outcome="ok")
+    calls.inc(source='we"ird', outcome="error")
+    in_flight.inc()
+    in_flight.inc()
+    in_flight.dec()
+
+    text = registry.render()
+    assert 'calls_total{source="sina",outcome="ok"} 3' in text
+    assert 'calls_total{source="we\\"ird",outcome="error"} 1' in text
+    assert "in_flight 1" in text
+    assert registry.counter("calls_total", "Calls.", ("source", "outcome")) is calls
+
+
+def test_background_tasks_are_not_billed_to_the_request():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    instrument_engine(engine)
+
+    def slow_background_work():
+        time.sleep(0.3)
+        with engine.connect() as conn:
+            for _ in range(20):
+                conn.execute(text("SELECT 1"))
+
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.post("/metrics-test/background")
+    def start(background_tasks: BackgroundTasks):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        background_tasks.add_task(slow_background_work)
+        return {"ok": True}
+
+    background_before = SQL_QUERIES.value(context="background")
+    labels = {"method": "POST", "route": "/metrics-test/background"}
+    assert TestClient(app).post("/metrics-test/background").status_code == 200
+
+    assert HTTP_LATENCY.count(**labels) == 1
+    assert HTTP_LATENCY.sum(**labels) < 0.25
+    assert SQL_PER_REQUEST.sum(**labels) == 1
+    assert SQL_QUERIES.value(context="background") - background_before == 20
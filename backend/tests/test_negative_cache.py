@@ -0,0 +1,32 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.core.database import Base
+from app.services.negative_cache import clear_negative, is_suppressed, load_negative_cache, probe_interval, record_negative
+
+
+def test_probe_interval_doubles_and_caps():
+    assert [probe_interval(n).days for n in (1, 2, 3)] == [1, 2, 4]
+    assert probe_interval(10, max_days=30) == timedelta(days=30)
+
+
+def test_record_and_clear_negative_entry():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    now = datetime(2026, 1, 5, 12, 0)
+    with Session(engine) as db:
+        record_negative(db, "930000", reason="empty", now=now)
+        entry = record_negative(db, "930000", reason="empty", now=now)
+        db.commit()
+        assert entry.failure_count == 2
+        assert entry.next_probe_at == now + timedelta(days=2)
+
+        entries = load_negative_cache(db)
+        assert is_suppressed(entries["930000"], now + timedelta(days=1))
+        assert not is_suppressed(entries["930000"], now + timedelta(days=2))
+
+        clear_negative(db, "930000")
+        db.commit()
+        assert load_negative_cache(db) == {}
@@ -0,0 +1,40 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from app.services.analytics import compute_index_metrics
+from app.services.normalize import normalize_history
+
+
+def _raw_frame() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "日期": ["2024-01-03", "2024-01-02", "bad", "2024-01-04"],
+            "收盘": ["11.0", "10.0", "12.0", None],
+            "最高": [11.5, 10.5, 12.5, 13.0],
+            "最低": [10.5, 9.5, 11.5, 12.0],
+            "涨跌幅": [10.0, None, 1.0, 1.0],
+        }
+    )
+
+
+def test_normalize_history_returns_sorted_arrays():
+    history = normalize_history("ak_index_zh_a_hist", _raw_frame())
+    assert len(history) == 2
+    assert history.trade_date.dtype == np.dtype("datetime64[D]")
+    assert history.close.tolist() == [10.0, 11.0]
+    assert np.isnan(history.pct_change[0])
+    assert normalize_history("ak_index_zh_a_hist", pd.DataFrame()).empty
+
+
+def test_compute_index_metrics_windows():
+    dates = np.array(["2020-01-01", "2023-06-01", "2024-05-20", "2024-06-01"], dtype="datetime64[D]")
+    closes = np.array([4.0, 1.0, 2.0, 3.0])
+    metrics = compute_index_metrics(dates, closes, date(2024, 6, 1))
+    assert metrics["current_price"] == 3.0
+    assert metrics["percentile_since_inception"] == 75.0
+    assert metrics["percentile_1m"] == 100.0
+    assert metrics["high_3y"] == 3.0
+    assert metrics["low_3y"] == 1.0
+
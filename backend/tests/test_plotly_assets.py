@@ -0,0 +1,20 @@
+from pathlib import Path
+
+import plotly
+import plotly.graph_objects as go
+
+from utils.plotly_assets import PLOTLY_BUNDLE, ensure_plotly_bundle, write_figure_html
+
+
+def test_shared_bundle_is_versioned(tmp_path):
+    # A bundle left by an older plotly must not be reused by the current one.
+    (tmp_path / "plotly.min.js").write_text("/* stale */", encoding="utf-8")
+    (tmp_path / "plotly-0.0.1.min.js").write_text("/* stale */", encoding="utf-8")
+
+    html_path = write_figure_html(go.Figure(go.Indicator(value=42)), str(tmp_path / "gauge.html"))
+
+    assert PLOTLY_BUNDLE == f"plotly-{plotly.__version__}.min.js"
+    bundle = tmp_path / PLOTLY_BUNDLE
+    assert bundle.stat().st_size > 1_000_000
+    assert f'src="{PLOTLY_BUNDLE}"' in Path(html_path).read_text(encoding="utf-8")
+    assert ensure_plotly_bundle(str(tmp_path)) == str(bundle)
@@ -0,0 +1,27 @@
+import random
+
+import numpy as np
+import pandas as pd
+
+from process_index_data import industry_of, map_to_industry
+
+
+def test_earlier_category_wins_when_several_match():
+    names = pd.Series(
+        ["中证金融能源指数", "中证信息材料指数", "中证医药制造指数", "中证消费服务农业指数", "中证电力房地产指数", "中证主要消费指数"],
+        index=[10, 11, 12, 13, 14, 15],
+    )
+    result = map_to_industry(names)
+    assert result.tolist() == ["能源", "材料", "工业", "可选消费", "公用事业", None]
+    assert result.index.tolist() == names.index.tolist()
+
+
+def test_matches_row_wise_on_random_names():
+    words = ["能源", "材料", "制造", "可选消费", "消费服务", "农业", "制药", "非银", "软件", "传媒", "燃气", "地产",
+             "中证", "指数", "全收益", "主题", "消费", "地"]
+    rng = random.Random(0)
+    names = pd.Series(["".join(rng.choice(words) for _ in range(rng.randint(0, 4))) for _ in range(2000)] + [np.nan, None])
+    result = map_to_industry(names)
+    assert result.index.equals(names.index)
+    assert result.tolist() == [industry_of(name) for name in names]
+    assert result.iloc[-2:].tolist() == [None, None]
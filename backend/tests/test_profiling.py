@@ -0,0 +1,38 @@
+import os
+import threading
+import time
+
+from app.core.profiling import StackSampler, rotate_profiles
+
+
+def _busy_loop(stop: threading.Event):
+    while not stop.is_set():
+        sum(i * i for i in range(1000))
+
+
+def test_sampler_collects_stacks_from_other_threads():
+    sampler = StackSampler(interval=0.001)
+    stop = threading.Event()
+    worker = threading.Thread(target=_busy_loop, args=(stop,))
+    worker.start()
+    session = sampler.open()
+    try:
+        time.sleep(0.1)
+    finally:
+        sampler.close(session)
+        stop.set()
+        worker.join()
+
+    assert session.samples > 0
+    assert any("_busy_loop (test_profiling.py" in stack for stack in session.stacks)
+
+
+def test_rotate_profiles_keeps_newest(tmp_path):
+    for i in range(5):
+        path = tmp_path / f"p{i}.folded"
+        path.write_text("x", encoding="utf-8")
+        os.utime(path, (1000 + i, 1000 + i))
+
+    rotate_profiles(tmp_path, keep=2)
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["p3.folded", "p4.folded"]
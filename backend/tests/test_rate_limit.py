@@ -0,0 +1,43 @@
+import pytest
+
+from app.services.rate_limit import CircuitBreaker, CircuitOpenError, TokenBucket, UpstreamGuard
+
+
+def test_token_bucket_waits_for_refill(clock):
+    bucket = TokenBucket(rate=2, burst=2, clock=clock, sleep=clock.sleep)
+    assert bucket.acquire() == 0.0
+    assert bucket.acquire() == 0.0
+    assert bucket.try_acquire() is False
+    assert bucket.acquire() == pytest.approx(0.5)
+
+
+def test_circuit_breaker_opens_and_recovers(clock):
+    breaker = CircuitBreaker(failure_threshold=2, cooldown_seconds=10, clock=clock)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    clock.now += 10
+    assert breaker.state == "half_open"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    clock.now += 10
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_guard_rejects_calls_while_open(clock):
+    guard = UpstreamGuard(
+        name="sina",
+        limiter=TokenBucket(rate=100, burst=10, clock=clock, sleep=clock.sleep),
+        breaker=CircuitBreaker(failure_threshold=1, cooldown_seconds=30, clock=clock),
+    )
+
+    def boom():
+        raise ConnectionError("down")
+
+    with pytest.raises(ConnectionError):
+        guard.call(boom)
+    with pytest.raises(CircuitOpenError):
+        guard.call(lambda: 1)
@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.core.database import Base
+from app.models import RefreshTask
+from app.tasks.refresh_queue import (
+    claim_next,
+    enqueue_refresh,
+    enqueue_scheduled_session,
+    fail_exhausted,
+    renew_lease,
+    task_options,
+)
+from app.tasks.update_indices import claim_scheduled_slot, new_refresh_task
+
+
+def _session() -> Session:
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    return Session(engine)
+
+
+def test_enqueue_dedupes_and_claim_takes_task_once():
+    with _session() as db:
+        task = enqueue_refresh(db, force_codes=["000300"])
+        assert enqueue_refresh(db).task_id == task.task_id
+        assert task_options(task) == {"force_all": False, "force_codes": ["000300"]}
+
+        now = datetime(2026, 1, 5, 16, 0)
+        claimed = claim_next(db, "w1", lease_seconds=60, now=now)
+        assert claimed.task_id == task.task_id
+        assert claimed.status == "running"
+        assert claimed.attempts == 1
+        assert claim_next(db, "w2", lease_seconds=60, now=now) is None
+        assert renew_lease(db, task.task_id, "w1", 60, now=now + timedelta(seconds=30))
+        assert not renew_lease(db, task.task_id, "w2", 60, now=now)
+
+
+def test_expired_lease_is_reclaimed_then_abandoned():
+    with _session() as db:
+        task = enqueue_refresh(db)
+        now = datetime(2026, 1, 5, 16, 0)
+        claim_next(db, "w1", lease_seconds=60, now=now)
+
+        later = now + timedelta(seconds=120)
+        reclaimed = claim_next(db, "w2", lease_seconds=60, now=later)
+        assert reclaimed.lease_owner == "w2"
+        assert reclaimed.attempts == 2
+
+        much_later = later + timedelta(seconds=120)
+        assert fail_exhausted(db, max_attempts=2, now=much_later) == 1
+        db.expire_all()
+        assert db.get(RefreshTask, task.task_id).status == "failed"
+        assert claim_next(db, "w3", lease_seconds=60, now=much_later) is None
+
+
+def test_scheduled_slot_is_claimed_once_per_session():
+    with _session() as db:
+        first = enqueue_scheduled_session(db, "2026-01-09")
+        assert first is not None and first.schedule_key == "2026-01-09"
+        # A second worker firing the same tick loses the slot, even past the active-task check.
+        assert claim_scheduled_slot(db, new_refresh_task(), "2026-01-09") is None
+        assert enqueue_scheduled_session(db, "2026-01-09") is None
+
+        now = datetime(2026, 1, 9, 16, 0)
+        claim_next(db, "w1", lease_seconds=60, now=now)
+        fail_exhausted(db, max_attempts=1, now=now + timedelta(seconds=120))
+        retry = enqueue_scheduled_session(db, "2026-01-09")
+        assert retry is not None and retry.task_id != first.task_id
+        assert len(db.query(RefreshTask).all()) == 2
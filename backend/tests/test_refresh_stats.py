@@ -0,0 +1,33 @@
+from app.services.refresh_stats import RefreshStats, load_stats_json
+
+
+def test_stage_timer_and_histogram_buckets(clock):
+    stats = RefreshStats(clock=clock)
+    with stats.timer("db_write"):
+        clock.now += 0.004
+    stats.observe("db_write", 0.3)
+    stats.observe("db_write", 20.0)
+
+    stage = stats.to_dict()["stages"]["db_write"]
+    assert stage["count"] == 3
+    assert stage["buckets"] == {"le_5ms": 1, "le_500ms": 1, "inf": 1}
+    assert stage["max_ms"] == 20000.0
+
+
+def test_source_outcomes_and_json_round_trip():
+    stats = RefreshStats()
+    stats.observe_source("sina", 0.02, "ok", rows=100, nbytes=4000)
+    stats.observe_source("sina", 0.01, "empty")
+    stats.observe_source("sina", 0.5, "error")
+    stats.incr("fetch_attempts")
+    stats.incr("fetch_attempts", 2)
+
+    payload = load_stats_json(stats.to_json())
+    assert payload["sources"]["sina"]["ok"] == 1
+    assert payload["sources"]["sina"]["empty"] == 1
+    assert payload["sources"]["sina"]["errors"] == 1
+    assert payload["sources"]["sina"]["rows"] == 100
+    assert payload["sources"]["sina"]["latency"]["count"] == 3
+    assert payload["counters"] == {"fetch_attempts": 3}
+    assert load_stats_json(None) is None
+    assert load_stats_json("not json") is None
@@ -0,0 +1,58 @@
+import dataclasses
+import logging
+
+import pandas as pd
+from sqlalchemy import create_engine, func, select, update
+from sqlalchemy.orm import sessionmaker
+
+import refresh_worker
+from app.core.config import load_app_config
+from app.core.database import Base
+from app.models import IndexMetric, RefreshTask
+from app.services.providers import set_history_provider
+from app.services.providers.replay_provider import ReplayHistoryProvider
+from app.services.task_progress import ProgressRegistry, set_progress_registry
+from app.tasks import update_indices
+from app.tasks.refresh_queue import claim_next, enqueue_refresh
+
+
+def test_lost_lease_cancels_running_refresh(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{(tmp_path / 'worker.db').as_posix()}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine, autoflush=False)
+    codes = [f"B{i:06d}" for i in range(200)]
+    excel_path = tmp_path / "index_list.xlsx"
+    pd.DataFrame({"代码": codes, "简称": codes, "全称": codes}).to_excel(excel_path, index=False)
+    config = dataclasses.replace(
+        load_app_config(),
+        excel_path=str(excel_path),
+        index_list_cache_path=str(tmp_path / "index_list.cache.pkl"),
+        calendar_path=str(tmp_path / "missing_calendar.json"),
+        upstream_limits={},
+        profiling_refresh=False,
+    )
+    monkeypatch.setattr(update_indices, "load_app_config", lambda: config)
+    monkeypatch.setattr(update_indices, "SessionLocal", factory)
+    monkeypatch.setattr(refresh_worker, "SessionLocal", factory)
+    set_history_provider(ReplayHistoryProvider(seed=0, latency_ms=20))
+    set_progress_registry(ProgressRegistry(factory))
+    try:
+        with factory() as db:
+            task = enqueue_refresh(db)
+            claimed = claim_next(db, "w1", lease_seconds=3)
+        with factory() as db:
+            # Simulate w1 stalling past its lease and w2 taking the task over.
+            db.execute(update(RefreshTask).where(RefreshTask.task_id == task.task_id).values(lease_owner="w2"))
+            db.commit()
+
+        refresh_worker.run_claimed(claimed, "w1", lease_seconds=3, logger=logging.getLogger("test_refresh_worker"))
+
+        with factory() as db:
+            stored = db.get(RefreshTask, task.task_id)
+            assert stored.status == "running"
+            assert stored.lease_owner == "w2"
+            assert 0 < db.execute(select(func.count()).select_from(IndexMetric)).scalar_one() < len(codes)
+    finally:
+        set_history_provider(None)
+        set_progress_registry(None)
+        engine.dispose()
@@ -0,0 +1,48 @@
+from datetime import datetime
+
+import pytest
+
+from app.services.data_provider import fetch_index_history
+from app.services.providers import set_history_provider
+from app.services.providers.replay_provider import RecordingHistoryProvider, ReplayHistoryProvider
+from app.services.retry import HistoryFetchError
+
+START = datetime(2022, 1, 1)
+END = datetime(2024, 12, 31)
+
+
+def test_replay_is_deterministic_and_injects_failures():
+    def outcomes(provider):
+        result = []
+        for _ in range(20):
+            try:
+                result.append(len(provider.fetch_raw("ak_index_zh_a_hist", "000300", START, END)))
+            except ConnectionError:
+                result.append("error")
+        return result
+
+    first = outcomes(ReplayHistoryProvider(failure_rate=0.3, seed=1))
+    assert first == outcomes(ReplayHistoryProvider(failure_rate=0.3, seed=1))
+    assert "error" in first
+    assert any(isinstance(v, int) and v > 700 for v in first)
+
+
+def test_fetch_index_history_through_replay_provider():
+    set_history_provider(ReplayHistoryProvider(dead_codes=["999999"]))
+    try:
+        result = fetch_index_history("000300", history_years=3)
+        assert result.source == "ak_index_zh_a_hist"
+        assert len(result.history) > 700
+        with pytest.raises(HistoryFetchError) as info:
+            fetch_index_history("999999", history_years=3)
+        assert info.value.permanent
+    finally:
+        set_history_provider(None)
+
+
+def test_recorded_frames_are_replayed(tmp_path):
+    recorder = RecordingHistoryProvider(ReplayHistoryProvider(seed=3), str(tmp_path))
+    recorded = recorder.fetch_raw("ak_stock_zh_index_daily", "000905", START, END)
+    replay = ReplayHistoryProvider(recordings_dir=str(tmp_path), synthetic=False)
+    assert replay.fetch_raw("ak_stock_zh_index_daily", "000905", START, END).equals(recorded)
+    assert replay.fetch_raw("ak_stock_zh_index_daily", "000300", START, END).empty
@@ -0,0 +1,100 @@
+import json
+import random
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from app.services.data_provider import fetch_index_history
+from app.services.providers import set_history_provider
+from app.services.providers.akshare_provider import SOURCE_UPSTREAMS, AkshareHistoryProvider
+from app.services.providers.replay_provider import synthetic_history
+from app.services.rate_limit import CircuitOpenError, get_upstream_guard
+from app.services.retry import HistoryFetchError, RetryPolicy, UnknownSymbolError, is_permanent_error
+
+
+def test_backoff_grows_and_is_capped():
+    policy = RetryPolicy(base_delay=1.0, max_delay=5.0, multiplier=2.0, jitter=0.0)
+    assert [policy.backoff(n) for n in (1, 2, 3, 4)] == [1.0, 2.0, 4.0, 5.0]
+
+    jittered = RetryPolicy(base_delay=4.0, jitter=0.5)
+    delay = jittered.backoff(1, rng=random.Random(7))
+    assert 2.0 <= delay <= 4.0
+
+
+def test_error_classification():
+    assert is_permanent_error(HistoryFetchError("000001", permanent=True))
+    assert not is_permanent_error(HistoryFetchError("000001", permanent=False))
+    assert is_permanent_error(UnknownSymbolError("00 300"))
+    assert not is_permanent_error(KeyError("data"))
+    assert not is_permanent_error(json.JSONDecodeError("Expecting value", "<html>", 0))
+    assert not is_permanent_error(ConnectionError("reset"))
+    assert not is_permanent_error(CircuitOpenError("sina", 10.0))
+
+
+def test_permanent_errors_and_exhausted_budget_stop_retries():
+    policy = RetryPolicy(max_attempts=3, budget=1)
+    budget = policy.new_budget()
+    transient = HistoryFetchError("000001", permanent=False)
+    assert not policy.should_retry(HistoryFetchError("000001", permanent=True), 1, budget)
+    assert policy.should_retry(transient, 1, budget)
+    assert not policy.should_retry(transient, 1, budget)
+    assert not policy.should_retry(transient, 3, policy.new_budget())
+
+
+class _ThrottledOnceProvider:
+    """First call to the primary source fails to parse a throttle page, later calls succeed."""
+
+    name = "throttled"
+
+    def __init__(self):
+        self.calls = 0
+
+    def history_sources(self, index_code):
+        return ["ak_index_zh_a_hist", "ak_stock_zh_index_daily"]
+
+    def upstream_for(self, source_name):
+        return "eastmoney"
+
+    def fetch_raw(self, source_name, index_code, start_date, end_date):
+        self.calls += 1
+        if source_name == "ak_stock_zh_index_daily":
+            return pd.DataFrame()
+        if self.calls == 1:
+            raise json.JSONDecodeError("Expecting value", "<html>busy</html>", 0)
+        return synthetic_history(index_code, start_date, end_date)
+
+
+def test_unparsable_upstream_body_is_retried():
+    policy = RetryPolicy(max_attempts=3, budget=5)
+    budget = policy.new_budget()
+    set_history_provider(_ThrottledOnceProvider())
+    try:
+        with pytest.raises(HistoryFetchError) as info:
+            fetch_index_history("000300", history_years=1)
+        assert not info.value.permanent
+        assert policy.should_retry(info.value, 1, budget)
+        assert len(fetch_index_history("000300", history_years=1).history) > 200
+    finally:
+        set_history_provider(None)
+
+
+def test_malformed_code_is_permanent_without_network():
+    provider = AkshareHistoryProvider()
+    with pytest.raises(UnknownSymbolError) as info:
+        provider.fetch_raw("ak_index_zh_a_hist", "00 300", datetime(2024, 1, 1), datetime(2024, 6, 1))
+    assert is_permanent_error(info.value)
+
+
+def test_malformed_codes_do_not_trip_upstream_breakers():
+    set_history_provider(AkshareHistoryProvider())
+    try:
+        for code in ("BAD-1", "BAD-2", "BAD-3"):
+            with pytest.raises(HistoryFetchError) as info:
+                fetch_index_history(code, history_years=1)
+            assert info.value.permanent
+    finally:
+        set_history_provider(None)
+    for upstream in set(SOURCE_UPSTREAMS.values()):
+        breaker = get_upstream_guard(upstream).breaker
+        assert breaker.allow() and breaker.retry_after() == 0.0
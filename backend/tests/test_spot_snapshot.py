@@ -0,0 +1,66 @@
+import pandas as pd
+
+import index_analyzer_v2
+from index_analyzer_v2 import SpotSnapshot
+
+
+class FakeSpot:
+    """Stands in for ``ak.stock_zh_index_spot_em``; each entry of ``responses`` is a frame or an exception."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = 0
+
+    def __call__(self, symbol):
+        response = self.responses[min(self.calls, len(self.responses) - 1)]
+        self.calls += 1
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+def _board(*rows):
+    return pd.DataFrame(rows, columns=["代码", "名称", "最新价"])
+
+
+def test_snapshot_refreshes_only_after_ttl(monkeypatch, clock):
+    fake = FakeSpot(_board(("000300", "沪深300", 3800.0)), _board(("000300", "沪深300", 3850.0)))
+    monkeypatch.setattr(index_analyzer_v2.ak, "stock_zh_index_spot_em", fake)
+    snapshot = SpotSnapshot(ttl_seconds=60, clock=clock)
+
+    assert snapshot.get("000300")["最新价"] == 3800.0
+    clock.now += 59
+    assert snapshot.get(300) is None
+    assert snapshot.get("000300")["最新价"] == 3800.0
+    assert fake.calls == 1
+
+    clock.now += 1
+    assert snapshot.get("000300")["最新价"] == 3850.0
+    assert fake.calls == 2
+
+
+def test_failed_download_is_cached_until_expiry(monkeypatch, clock):
+    fake = FakeSpot(ConnectionError("reset"), _board(("000905", "中证500", 5600.0)))
+    monkeypatch.setattr(index_analyzer_v2.ak, "stock_zh_index_spot_em", fake)
+    snapshot = SpotSnapshot(ttl_seconds=30, clock=clock)
+
+    assert snapshot.get("000905") is None
+    assert snapshot.get("000300") is None
+    assert fake.calls == 1
+
+    clock.now += 30
+    assert snapshot.get("000905")["名称"] == "中证500"
+    assert fake.calls == 2
+
+
+def test_duplicate_codes_resolve_to_first_row(monkeypatch, clock):
+    board = _board(("000300", "沪深300", 3800.0), ("000905", "中证500", 5600.0), ("000300", "沪深300旧", 1.0))
+    fake = FakeSpot(board)
+    monkeypatch.setattr(index_analyzer_v2.ak, "stock_zh_index_spot_em", fake)
+    snapshot = SpotSnapshot(clock=clock)
+
+    row = snapshot.get("000300")
+    first = board[board["代码"] == "000300"].iloc[0]
+    pd.testing.assert_series_equal(row, first)
+    assert snapshot.get("000905")["最新价"] == 5600.0
+    assert fake.calls == 1
@@ -0,0 +1,63 @@
+import json
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.database import Base
+from app.models import TaskProgress
+from app.services.task_progress import ProgressRegistry
+
+
+def _session_factory():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine)
+
+
+def _stored(factory, task_id):
+    with factory() as db:
+        row = db.execute(select(TaskProgress).where(TaskProgress.task_id == task_id)).scalar_one_or_none()
+        return json.loads(row.payload) if row else None
+
+
+def test_updates_are_batched_until_interval_or_status_change(clock):
+    factory = _session_factory()
+    registry = ProgressRegistry(factory, flush_seconds=5, clock=clock)
+
+    registry.update("t1", status="running", total_count=10, processed_count=0)
+    registry.update("t1", processed_count=3)
+    assert _stored(factory, "t1")["processed_count"] == 0
+    assert registry.get("t1")["progress_percent"] == 30.0
+
+    clock.now += 6
+    registry.update("t1", processed_count=4)
+    assert _stored(factory, "t1")["processed_count"] == 4
+
+    registry.update("t1", processed_count=10, status="completed")
+    assert _stored(factory, "t1")["status"] == "completed"
+
+
+def test_other_workers_read_from_table_and_memory_is_bounded(clock):
+    factory = _session_factory()
+    writer = ProgressRegistry(factory, max_entries=2, clock=clock)
+    reader = ProgressRegistry(factory, clock=clock)
+
+    for task_id in ("a", "b", "c"):
+        writer.update(task_id, status="running", total_count=4, processed_count=1)
+
+    assert list(writer._entries) == ["b", "c"]
+    assert writer.get("a")["progress_percent"] == 25.0
+    assert reader.get("c")["status"] == "running"
+    assert reader.get("missing") is None
+
+
+def test_idle_entries_expire(clock):
+    factory = _session_factory()
+    registry = ProgressRegistry(factory, ttl_seconds=60, clock=clock)
+    registry.update("old", status="running", total_count=1, processed_count=0)
+
+    clock.now += 61
+    registry.update("new", status="running", total_count=1, processed_count=0)
+
+    assert "old" not in registry._entries
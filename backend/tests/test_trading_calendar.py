@@ -0,0 +1,30 @@
+from datetime import date, datetime, timezone
+
+from app.services.trading_calendar import SHANGHAI_TZ, TradingCalendar, load_trading_calendar, save_trading_calendar
+
+# 2024-10-01 ~ 10-07 is the National Day holiday; 10-08 (Tue) reopens.
+SESSIONS = [date(2024, 9, 27), date(2024, 9, 30), date(2024, 10, 8), date(2024, 10, 9)]
+
+
+def test_latest_session_skips_weekends_and_holidays():
+    calendar = TradingCalendar(SESSIONS)
+    assert calendar.latest_session(datetime(2024, 10, 5, 12, 0, tzinfo=SHANGHAI_TZ)) == date(2024, 9, 30)
+    assert calendar.latest_session(datetime(2024, 10, 8, 10, 0, tzinfo=SHANGHAI_TZ)) == date(2024, 9, 30)
+    assert calendar.latest_session(datetime(2024, 10, 8, 16, 0, tzinfo=SHANGHAI_TZ)) == date(2024, 10, 8)
+
+
+def test_naive_utc_times_are_converted_to_shanghai():
+    calendar = TradingCalendar(SESSIONS)
+    # 2024-10-08 08:00 UTC is 16:00 in Shanghai, after the session is ready.
+    assert calendar.latest_session(datetime(2024, 10, 8, 8, 0)) == date(2024, 10, 8)
+    assert calendar.latest_session(datetime(2024, 10, 8, 1, 0, tzinfo=timezone.utc)) == date(2024, 9, 30)
+
+
+def test_calendar_cache_round_trip_and_weekday_fallback(tmp_path):
+    path = tmp_path / "calendar.json"
+    save_trading_calendar(path, SESSIONS, source="test")
+    calendar = load_trading_calendar(path)
+    assert calendar.source == "test"
+    assert not calendar.is_session(date(2024, 10, 2))
+    assert calendar.is_session(date(2025, 1, 6))
+    assert load_trading_calendar(tmp_path / "missing.json").is_session(date(2024, 10, 2))
@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+
+from utils.data_fetcher import DataFetcher
+
+
+class FakePro:
+    """``index_daily`` that returns ``rows_per_code`` bars per known code, cut at ``max_rows`` like tushare."""
+
+    def __init__(self, rows_per_code, max_rows, missing=(), failing=(), missing_in_bulk=()):
+        self.rows_per_code = rows_per_code
+        self.max_rows = max_rows
+        self.missing = set(missing)
+        self.failing = set(failing)
+        self.missing_in_bulk = set(missing_in_bulk)
+        self.requests = []
+
+    def frame(self, ts_code):
+        dates = pd.bdate_range(end="2025-12-31", periods=self.rows_per_code)
+        close = 1000 + np.arange(self.rows_per_code, dtype=float)
+        return pd.DataFrame(
+            {"ts_code": ts_code, "trade_date": dates.strftime("%Y%m%d"), "close": close, "high": close + 1, "low": close - 1}
+        )
+
+    def index_daily(self, ts_code, start_date, end_date):
+        codes = ts_code.split(",")
+        self.requests.append(codes)
+        if self.failing & set(codes):
+            raise ConnectionError("tushare timeout")
+        missing = self.missing | (self.missing_in_bulk if len(codes) > 1 else set())
+        frames = [self.frame(code) for code in codes if code not in missing]
+        if not frames:
+            return pd.DataFrame(columns=["ts_code", "trade_date", "close", "high", "low"])
+        return pd.concat(frames, ignore_index=True).head(self.max_rows)
+
+
+def _fetcher(pro, bulk_max_rows):
+    fetcher = DataFetcher({"data": {"history_years": 1}, "tushare": {"bulk_max_rows": bulk_max_rows}})
+    fetcher.pro = pro
+    fetcher.akshare_calls = []
+
+    def fake_akshare(sector_code, sector_name, index_name, start_date, end_date):
+        fetcher.akshare_calls.append(sector_code)
+        return {"name": sector_name, "code": sector_code, "data": None}
+
+    fetcher._get_from_akshare = fake_akshare
+    return fetcher
+
+
+def test_truncated_bulk_results_are_halved_until_complete():
+    codes = [f"93{i:04d}" for i in range(10)]
+    pro = FakePro(rows_per_code=700, max_rows=2600, missing={"930004.SH"})
+    fetcher = _fetcher(pro, bulk_max_rows=2600)
+
+    fetcher.prefetch_tushare_indices([{"code": code} for code in codes])
+
+    # 1 year estimates 260 rows per code, so all 10 codes go in one request; 10 and then 5 codes
+    # still hit the row cap and are split, while 2 and 3 codes fit.
+    assert [len(request) for request in pro.requests] == [10, 5, 2, 3, 5, 2, 3]
+    for code in codes:
+        ts_code = f"{code}.SH"
+        if ts_code in pro.missing:
+            assert ts_code not in fetcher._tushare_prefetched
+        else:
+            pd.testing.assert_frame_equal(fetcher._tushare_prefetched[ts_code], pro.frame(ts_code))
+
+
+def test_codes_missing_or_failed_in_bulk_fall_back():
+    pro = FakePro(rows_per_code=250, max_rows=8000, missing={"930001.SH"})
+    fetcher = _fetcher(pro, bulk_max_rows=8000)
+    fetcher.prefetch_tushare_indices([{"code": "930000"}, {"code": "930001"}])
+    assert len(pro.requests) == 1
+
+    served = fetcher.get_sector_indices("930000", "板块A")
+    assert served["current_price"] == 1249.0
+    assert len(pro.requests) == 1
+    # A code the bulk answer left out is not cached, so it gets its own tushare request before akshare.
+    fetcher.get_sector_indices("930001", "板块B")
+    assert pro.requests[1:] == [["930001.SH"]]
+    assert fetcher.akshare_calls == ["930001"]
+
+    failing = FakePro(rows_per_code=250, max_rows=8000, failing={"930003.SH"})
+    fetcher = _fetcher(failing, bulk_max_rows=8000)
+    fetcher.prefetch_tushare_indices([{"code": "930002"}, {"code": "930003"}])
+    assert fetcher._tushare_prefetched == {}
+
+    # A failed bulk request leaves its codes to per-code requests.
+    assert fetcher.get_sector_indices("930002", "板块C")["current_price"] == 1249.0
+    fetcher.get_sector_indices("930003", "板块D")
+    assert failing.requests == [["930002.SH", "930003.SH"], ["930002.SH"], ["930003.SH"]]
+    assert fetcher.akshare_calls == ["930003"]
+
+
+def test_code_omitted_from_bulk_answer_uses_per_code_tushare():
+    pro = FakePro(rows_per_code=250, max_rows=8000, missing_in_bulk={"930006.SH"})
+    fetcher = _fetcher(pro, bulk_max_rows=8000)
+    fetcher.prefetch_tushare_indices([{"code": "930005"}, {"code": "930006"}])
+    assert list(fetcher._tushare_prefetched) == ["930005.SH"]
+
+    served = fetcher.get_sector_indices("930006", "板块E")
+    assert served["current_price"] == 1249.0
+    assert pro.requests == [["930005.SH", "930006.SH"], ["930006.SH"]]
+    assert fetcher.akshare_calls == []
@@ -2,15 +2,26 @@ import pandas as pd
 import akshare as ak
 from datetime import datetime, timedelta
 import numpy as np
-from jinja2 import Template
+from utils.plotly_assets import write_figure_html
+from utils.templates import get_template
 import plotly.graph_objects as go
 import os
+import sys
 import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent / "backend"
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from app.services.frame_extract import recent_rows, top_components
 
 class IndexAnalyzer:
-    def __init__(self, excel_path='data/指数列表.xlsx', output_dir='output'):
+    def __init__(self, excel_path='data/指数列表.xlsx', output_dir='output', plotly_js='shared'):
         self.excel_path = excel_path
         self.output_dir = output_dir
+        # 温度计图表的 plotly.js 加载方式: shared (输出目录共用一份) / cdn / inline
+        self.plotly_js = plotly_js
         os.makedirs(output_dir, exist_ok=True)
         
     def read_index_codes(self):
@@ -94,7 +105,7 @@ class IndexAnalyzer:
         )
         
         html_path = os.path.join(self.output_dir, f"{index_name}_temperature.html")
-        fig.write_html(html_path)
+        write_figure_html(fig, html_path, self.plotly_js)
         return html_path
     
     def generate_html_report(self, index_data):
@@ -300,13 +311,11 @@ class IndexAnalyzer:
         temp_chart_path = self.create_temperature_gauge(percentile, f"{index_name}_{index_code}")
         temp_chart_name = os.path.basename(temp_chart_path)
         
-        top_stocks = []
-        if components_df is not None and not components_df.empty:
-            top_stocks = [(row[0], row[1]) for _, row in components_df.head(10).iterrows()]
+        top_stocks = top_components(components_df, 10).pairs()
         
-        recent_data = history_df.tail(10)[['日期', '收盘', '涨跌幅']].values.tolist()
+        recent_data = recent_rows(history_df, 10)
         
-        template = Template(self.generate_html_report({}))
+        template = get_template('index_analyzer/report.html', lambda: self.generate_html_report({}))
         html_content = template.render(
             index_name=index_name,
             index_code=index_code,
@@ -318,7 +327,7 @@ class IndexAnalyzer:
             three_year_avg=f"{three_year_avg:.2f}",
             top_stocks=top_stocks,
             temperature_chart=temp_chart_name,
-            recent_data=[[str(row[0]), f"{row[1]:.2f}", f"{row[2]:.2f}" if pd.notna(row[2]) else "N/A"] for row in recent_data]
+            recent_data=recent_data
         )
         
         output_path = os.path.join(self.output_dir, f"{index_code}_{index_name}_report.html")
@@ -2,15 +2,28 @@ import pandas as pd
 import akshare as ak
 from datetime import datetime, timedelta
 import numpy as np
-from jinja2 import Template
+from utils.plotly_assets import PLOTLY_JS_MODES, write_figure_html
+from utils.templates import get_template
 import plotly.graph_objects as go
+import argparse
+import multiprocessing
 import os
+import sys
 import time
 import warnings
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from pathlib import Path
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+BACKEND_DIR = Path(__file__).resolve().parent / "backend"
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from app.services.frame_extract import recent_rows, top_components
+from app.services.rate_limit import guarded_call
+
 warnings.filterwarnings('ignore')
 
 # 禁用代理
@@ -84,7 +97,9 @@ class CSIndexAPI:
             end_date = datetime.now()
             start_date = end_date - timedelta(days=365*3)
             
-            df = ak.index_zh_a_hist(
+            df = guarded_call(
+                "eastmoney",
+                ak.index_zh_a_hist,
                 symbol=index_code,
                 period="daily",
                 start_date=start_date.strftime("%Y%m%d"),
@@ -99,7 +114,9 @@ class CSIndexAPI:
         
         # 方法2: stock_zh_index_daily_em
         try:
-            df = ak.stock_zh_index_daily_em(
+            df = guarded_call(
+                "eastmoney",
+                ak.stock_zh_index_daily_em,
                 symbol=f"csi{index_code}",
                 start_date="20200201",
                 end_date="20250101"
@@ -128,7 +145,9 @@ class CSIndexAPI:
         """从东方财富获取数据"""
         print("  尝试东方财富数据源...")
         try:
-            df = ak.stock_zh_index_daily_em(
+            df = guarded_call(
+                "eastmoney",
+                ak.stock_zh_index_daily_em,
                 symbol=f"000{index_code}",
                 start_date="20200201",
                 end_date="20250101"
@@ -162,7 +181,7 @@ class CSIndexAPI:
         try:
             # 中证指数在新浪上的格式是 sh000xxx
             symbol = f"sh{index_code}"
-            df = ak.stock_zh_index_daily(symbol=symbol)
+            df = guarded_call("sina", ak.stock_zh_index_daily, symbol=symbol)
             
             if df is not None and not df.empty:
                 df = df.sort_values('date')
@@ -188,7 +207,7 @@ class CSIndexAPI:
             
             # 方法1: index_stock_cons
             try:
-                df = ak.index_stock_cons(symbol=index_code)
+                df = guarded_call("sina", ak.index_stock_cons, symbol=index_code)
                 if df is not None and not df.empty:
                     print(f"  成功获取 {len(df)} 只成份股")
                     return df
@@ -197,7 +216,7 @@ class CSIndexAPI:
             
             # 方法2: index_stock_cons_sina
             try:
-                df = ak.index_stock_cons_sina(symbol=index_code)
+                df = guarded_call("sina", ak.index_stock_cons_sina, symbol=index_code)
                 if df is not None and not df.empty:
                     print(f"  成功获取 {len(df)} 只成份股 (sina)")
                     return df
@@ -228,52 +247,22 @@ class CSIndexAPI:
                 print(f"  {url}: 失败 - {e}")
 
 
-class IndexAnalyzer:
-    def __init__(self, excel_path='data/指数列表.xlsx', output_dir='output'):
-        self.excel_path = excel_path
-        self.output_dir = output_dir
-        self.api = CSIndexAPI()
-        os.makedirs(output_dir, exist_ok=True)
-    
-    def read_index_codes(self):
-        """读取 Excel 文件中的指数代码和名称"""
-        try:
-            df = pd.read_excel(self.excel_path)
-            if df.empty:
-                print("Excel 文件为空")
-                return []
-            
-            index_codes = df.iloc[:, 0].tolist()
-            index_names = df.iloc[:, 1].tolist() if len(df.columns) > 1 else [f"指数{code}" for code in index_codes]
-            
-            indices = []
-            for code, name in zip(index_codes, index_names):
-                if pd.notna(code):
-                    indices.append((str(code).strip(), str(name).strip() if pd.notna(name) else f"指数{code}"))
-            
-            return indices
-        except FileNotFoundError:
-            print(f"找不到文件: {self.excel_path}")
-            return []
-        except Exception as e:
-            print(f"读取 Excel 文件失败: {e}")
-            return []
-    
-    def calculate_percentile(self, current_value, history_values):
-        """计算当前值在历史数据中的百分位"""
-        sorted_values = np.sort(history_values)
-        rank = np.searchsorted(sorted_values, current_value)
-        percentile = (rank / len(sorted_values)) * 100
-        return percentile
+def get_temperature_color(percentile):
+    """根据百分位返回颜色"""
+    if percentile < 30:
+        return '#4CAF50'
+    elif percentile < 70:
+        return '#FFC107'
+    else:
+        return '#F44336'
+
+
+class ReportRenderer:
+    """温度计图表和 HTML 报告的渲染, 只依赖输出目录和 plotly.js 加载方式, 可直接传给渲染进程"""
     
-    def get_temperature_color(self, percentile):
-        """根据百分位返回颜色"""
-        if percentile < 30:
-            return '#4CAF50'
-        elif percentile < 70:
-            return '#FFC107'
-        else:
-            return '#F44336'
+    def __init__(self, output_dir, plotly_js='shared'):
+        self.output_dir = output_dir
+        self.plotly_js = plotly_js
     
     def create_temperature_gauge(self, percentile, index_name, index_code):
         """创建温度计图表"""
@@ -284,7 +273,7 @@ class IndexAnalyzer:
             title={'text': f"{index_name} 温度计"},
             gauge={
                 'axis': {'range': [None, 100]},
-                'bar': {'color': self.get_temperature_color(percentile)},
+                'bar': {'color': get_temperature_color(percentile)},
                 'steps': [
                     {'range': [0, 30], 'color': "#d4edda"},
                     {'range': [30, 70], 'color': "#fff3cd"},
@@ -313,7 +302,7 @@ class IndexAnalyzer:
         )
         
         html_path = os.path.join(self.output_dir, f"{index_code}_{index_name}_temperature.html")
-        fig.write_html(html_path)
+        write_figure_html(fig, html_path, self.plotly_js)
         return html_path
     
     def generate_html_report(self):
@@ -569,8 +558,91 @@ class IndexAnalyzer:
         
         return template_str
     
+    def render_index(self, report_data):
+        """生成温度计图表和 HTML 报告 (渲染阶段, 只依赖 collect_index 的结果)"""
+        index_code = report_data['index_code']
+        index_name = report_data['index_name']
+        percentile = report_data['percentile']
+        
+        # 创建温度计图表
+        temp_chart_path = self.create_temperature_gauge(percentile, index_name, index_code)
+        temp_chart_name = os.path.basename(temp_chart_path)
+        
+        # 生成 HTML 报告
+        template = get_template('index_analyzer_fixed/report.html', self.generate_html_report)
+        html_content = template.render(
+            index_name=index_name,
+            index_code=index_code,
+            percentile=f"{percentile:.1f}",
+            temperature_color=report_data['temperature_color'],
+            current_price=f"{report_data['current_price']:.2f}",
+            three_year_high=f"{report_data['three_year_high']:.2f}",
+            three_year_low=f"{report_data['three_year_low']:.2f}",
+            three_year_avg=f"{report_data['three_year_avg']:.2f}",
+            top_stocks=report_data['top_stocks'],
+            temperature_chart=temp_chart_name,
+            recent_data=report_data['recent_data'],
+            generate_time=datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        )
+        
+        output_path = os.path.join(self.output_dir, f"{index_code}_{index_name}_report.html")
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(html_content)
+        
+        print(f"已生成报告: {output_path}")
+        return output_path
+
+
+class IndexAnalyzer:
+    def __init__(self, excel_path='data/指数列表.xlsx', output_dir='output', plotly_js='shared'):
+        self.excel_path = excel_path
+        self.output_dir = output_dir
+        # 温度计图表的 plotly.js 加载方式: shared (输出目录共用一份) / cdn / inline
+        self.plotly_js = plotly_js
+        self.renderer = ReportRenderer(output_dir, plotly_js)
+        self.api = CSIndexAPI()
+        os.makedirs(output_dir, exist_ok=True)
+    
+    def read_index_codes(self):
+        """读取 Excel 文件中的指数代码和名称"""
+        try:
+            df = pd.read_excel(self.excel_path)
+            if df.empty:
+                print("Excel 文件为空")
+                return []
+            
+            index_codes = df.iloc[:, 0].tolist()
+            index_names = df.iloc[:, 1].tolist() if len(df.columns) > 1 else [f"指数{code}" for code in index_codes]
+            
+            indices = []
+            for code, name in zip(index_codes, index_names):
+                if pd.notna(code):
+                    indices.append((str(code).strip(), str(name).strip() if pd.notna(name) else f"指数{code}"))
+            
+            return indices
+        except FileNotFoundError:
+            print(f"找不到文件: {self.excel_path}")
+            return []
+        except Exception as e:
+            print(f"读取 Excel 文件失败: {e}")
+            return []
+    
+    def calculate_percentile(self, current_value, history_values):
+        """计算当前值在历史数据中的百分位"""
+        sorted_values = np.sort(history_values)
+        rank = np.searchsorted(sorted_values, current_value)
+        percentile = (rank / len(sorted_values)) * 100
+        return percentile
+    
     def process_index(self, index_code, index_name):
         """处理单个指数"""
+        report_data = self.collect_index(index_code, index_name)
+        if report_data is None:
+            return None
+        return self.renderer.render_index(report_data)
+    
+    def collect_index(self, index_code, index_name):
+        """获取单个指数的数据并计算报告所需的统计信息 (网络请求阶段)"""
         print(f"正在处理指数: {index_name} ({index_code})")
         
         # 获取历史数据
@@ -591,66 +663,36 @@ class IndexAnalyzer:
             three_year_avg = float(history_df['收盘'].mean())
             
             percentile = self.calculate_percentile(current_price, history_df['收盘'].values)
-            temperature_color = self.get_temperature_color(percentile)
+            temperature_color = get_temperature_color(percentile)
         else:
             print(f"历史数据中没有'收盘'列")
             return None
         
-        # 创建温度计图表
-        temp_chart_path = self.create_temperature_gauge(percentile, index_name, index_code)
-        temp_chart_name = os.path.basename(temp_chart_path)
-        
         # 获取前十成份股
-        top_stocks = []
-        if components_df is not None and not components_df.empty:
-            components_df = components_df.head(10)
-            for idx, row in components_df.iterrows():
-                stock_code = str(row[0]) if len(row) > 0 else "N/A"
-                stock_name = str(row[1]) if len(row) > 1 else "N/A"
-                top_stocks.append((stock_code, stock_name))
+        top_stocks = top_components(components_df, 10, missing="N/A").pairs()
         
         # 获取最近的数据
-        recent_data = []
-        if '日期' in history_df.columns and '收盘' in history_df.columns:
-            recent_df = history_df.tail(10)[['日期', '收盘']]
-            if '涨跌幅' in history_df.columns:
-                recent_df = history_df.tail(10)[['日期', '收盘', '涨跌幅']]
-                recent_data = [
-                    [str(row[0]), f"{row[1]:.2f}", f"{row[2]:.2f}" if pd.notna(row[2]) else "N/A"]
-                    for _, row in recent_df.iterrows()
-                ]
-            else:
-                recent_data = [
-                    [str(row[0]), f"{row[1]:.2f}", "N/A"]
-                    for _, row in recent_df.iterrows()
-                ]
-        
-        # 生成 HTML 报告
-        template = Template(self.generate_html_report())
-        html_content = template.render(
-            index_name=index_name,
-            index_code=index_code,
-            percentile=f"{percentile:.1f}",
-            temperature_color=temperature_color,
-            current_price=f"{current_price:.2f}",
-            three_year_high=f"{three_year_high:.2f}",
-            three_year_low=f"{three_year_low:.2f}",
-            three_year_avg=f"{three_year_avg:.2f}",
-            top_stocks=top_stocks,
-            temperature_chart=temp_chart_name,
-            recent_data=recent_data,
-            generate_time=datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        )
-        
-        output_path = os.path.join(self.output_dir, f"{index_code}_{index_name}_report.html")
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(html_content)
-        
-        print(f"已生成报告: {output_path}")
-        return output_path
+        recent_data = recent_rows(history_df, 10)
+        
+        return {
+            'index_code': index_code,
+            'index_name': index_name,
+            'percentile': float(percentile),
+            'temperature_color': temperature_color,
+            'current_price': current_price,
+            'three_year_high': three_year_high,
+            'three_year_low': three_year_low,
+            'three_year_avg': three_year_avg,
+            'top_stocks': top_stocks,
+            'recent_data': recent_data,
+        }
     
-    def process_all_indices(self, limit=None):
-        """处理所有指数"""
+    def process_all_indices(self, limit=None, fetch_workers=1, render_workers=0):
+        """处理所有指数
+        
+        fetch_workers > 1 或 render_workers > 0 时使用流水线模式: 数据获取在线程池中并发执行
+        (请求速率由上游限流器控制, 不再固定 sleep), 图表和报告渲染交给进程池
+        """
         indices = self.read_index_codes()
         
         if not indices:
@@ -666,6 +708,17 @@ class IndexAnalyzer:
         # 测试网络连接
         self.api.test_connection()
         
+        if fetch_workers > 1 or render_workers > 0:
+            success_count, fail_count = self._process_pipelined(indices, fetch_workers, render_workers)
+        else:
+            success_count, fail_count = self._process_serial(indices)
+        
+        print(f"\n处理完成！")
+        print(f"成功: {success_count}")
+        print(f"失败: {fail_count}")
+        print(f"报告已保存在 {self.output_dir} 目录中")
+    
+    def _process_serial(self, indices):
         success_count = 0
         fail_count = 0
         
@@ -684,21 +737,84 @@ class IndexAnalyzer:
                 fail_count += 1
                 continue
         
-        print(f"\n处理完成！")
-        print(f"成功: {success_count}")
-        print(f"失败: {fail_count}")
-        print(f"报告已保存在 {self.output_dir} 目录中")
+        return success_count, fail_count
+    
+    def _process_pipelined(self, indices, fetch_workers, render_workers):
+        success_count = 0
+        fail_count = 0
+        names = {}
+        render_futures = []
+        
+        if render_workers > 0:
+            # ReportRenderer 只保存输出目录和 plotly.js 加载方式, 随任务一起序列化到渲染进程
+            # 使用 spawn 启动渲染进程: 获取线程运行中 fork 会复制其持有的锁, 子进程可能死锁
+            render_pool = ProcessPoolExecutor(
+                max_workers=render_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        else:
+            render_pool = ThreadPoolExecutor(max_workers=1)
+        
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, fetch_workers)) as fetch_pool:
+                fetch_futures = {
+                    fetch_pool.submit(self.collect_index, index_code, index_name): (index_code, index_name)
+                    for index_code, index_name in indices
+                }
+                # 每个指数取到数据后立即提交渲染, 获取与渲染重叠执行
+                for future in as_completed(fetch_futures):
+                    index_code, index_name = fetch_futures[future]
+                    try:
+                        report_data = future.result()
+                    except Exception as e:
+                        print(f"处理指数 {index_name} ({index_code}) 时出错: {e}")
+                        fail_count += 1
+                        continue
+                    if report_data is None:
+                        fail_count += 1
+                        continue
+                    render_future = render_pool.submit(self.renderer.render_index, report_data)
+                    names[render_future] = (index_code, index_name)
+                    render_futures.append(render_future)
+            
+            for render_future in as_completed(render_futures):
+                index_code, index_name = names[render_future]
+                try:
+                    if render_future.result():
+                        success_count += 1
+                    else:
+                        fail_count += 1
+                except Exception as e:
+                    print(f"生成指数 {index_name} ({index_code}) 报告时出错: {e}")
+                    fail_count += 1
+        finally:
+            render_pool.shutdown(wait=True)
+        
+        return success_count, fail_count
+
 
 def main():
     print("=" * 60)
     print("指数分析工具 (修复版)")
     print("=" * 60)
     
-    analyzer = IndexAnalyzer()
+    parser = argparse.ArgumentParser(description='指数分析工具 (修复版)')
+    parser.add_argument('--limit', type=int, default=5, help='只处理前 N 个指数, 0 为全部')
+    parser.add_argument('--fetch-workers', type=int, default=1, help='并发获取数据的线程数')
+    parser.add_argument('--render-workers', type=int, default=0, help='渲染图表和报告的进程数, 0 为不使用进程池')
+    parser.add_argument('--plotly-js', choices=PLOTLY_JS_MODES, default='shared',
+                        help='plotly.js 加载方式: shared 输出目录共用一份本地文件, cdn 在线加载, inline 每个文件内嵌')
+    args = parser.parse_args()
+    
+    analyzer = IndexAnalyzer(plotly_js=args.plotly_js)
     
     print("\n开始处理指数数据...")
-    print("限制处理前 5 个指数进行测试")
-    analyzer.process_all_indices(limit=5)
+    if args.limit:
+        print(f"限制处理前 {args.limit} 个指数进行测试")
+    analyzer.process_all_indices(
+        limit=args.limit or None,
+        fetch_workers=args.fetch_workers,
+        render_workers=args.render_workers
+    )
     
     print("\n" + "=" * 60)
     print("处理完成！")
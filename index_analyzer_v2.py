@@ -2,18 +2,81 @@ import pandas as pd
 import akshare as ak
 from datetime import datetime, timedelta
 import numpy as np
-from jinja2 import Template
+from utils.plotly_assets import write_figure_html
+from utils.templates import get_template
 import plotly.graph_objects as go
 import os
+import sys
+import threading
 import time
 import warnings
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent / "backend"
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from app.services.frame_extract import recent_rows, top_components
 
 warnings.filterwarnings('ignore')
 
+class SpotSnapshot:
+    """指数实时行情快照
+    
+    整个板块的行情只下载一次 (设置 ttl_seconds 时每 ttl_seconds 秒最多一次), 并按代码建立索引,
+    之后按代码查询只是一次字典查找
+    """
+    
+    def __init__(self, symbol="中证系列指数", ttl_seconds=None, clock=time.monotonic):
+        self.symbol = symbol
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._spot_df = None
+        self._positions = {}
+        self._fetched_at = None
+    
+    def _expired(self):
+        if self._fetched_at is None:
+            return True
+        return self.ttl_seconds is not None and self._clock() - self._fetched_at >= self.ttl_seconds
+    
+    def _refresh(self):
+        self._fetched_at = self._clock()
+        self._spot_df = None
+        self._positions = {}
+        try:
+            spot_df = ak.stock_zh_index_spot_em(symbol=self.symbol)
+        except Exception as e:
+            # 失败结果同样缓存到下次过期, 避免每个指数都重新下载一遍
+            print(f"获取 {self.symbol} 实时行情失败: {e}")
+            return
+        if spot_df is None or spot_df.empty:
+            return
+        self._spot_df = spot_df
+        codes = spot_df['代码'].astype(str)
+        # 代码重复时与逐条过滤一样取第一条
+        first = ~codes.duplicated()
+        self._positions = dict(zip(codes[first], np.flatnonzero(first.to_numpy())))
+    
+    def get(self, index_code):
+        """返回指数的行情行 (pandas.Series), 不存在时返回 None"""
+        with self._lock:
+            if self._expired():
+                self._refresh()
+            position = self._positions.get(str(index_code))
+            if position is None:
+                return None
+            return self._spot_df.iloc[position]
+
 class IndexAnalyzer:
-    def __init__(self, excel_path='data/指数列表.xlsx', output_dir='output'):
+    def __init__(self, excel_path='data/指数列表.xlsx', output_dir='output', plotly_js='shared', spot_ttl_seconds=None):
         self.excel_path = excel_path
         self.output_dir = output_dir
+        # 温度计图表的 plotly.js 加载方式: shared (输出目录共用一份) / cdn / inline
+        self.plotly_js = plotly_js
+        # 实时行情快照, spot_ttl_seconds 为空时整个运行期间只下载一次
+        self.spot_snapshot = SpotSnapshot(ttl_seconds=spot_ttl_seconds)
         os.makedirs(output_dir, exist_ok=True)
         
     def read_index_codes(self):
@@ -76,12 +139,7 @@ class IndexAnalyzer:
     def get_index_spot_data(self, index_code):
         """获取指数实时行情数据"""
         try:
-            spot_df = ak.stock_zh_index_spot_em(symbol="中证系列指数")
-            if spot_df is not None and not spot_df.empty:
-                index_data = spot_df[spot_df['代码'] == index_code]
-                if not index_data.empty:
-                    return index_data.iloc[0]
-            return None
+            return self.spot_snapshot.get(index_code)
         except Exception as e:
             print(f"获取指数 {index_code} 实时数据失败: {e}")
             return None
@@ -140,7 +198,7 @@ class IndexAnalyzer:
         )
         
         html_path = os.path.join(self.output_dir, f"{index_code}_{index_name}_temperature.html")
-        fig.write_html(html_path)
+        write_figure_html(fig, html_path, self.plotly_js)
         return html_path
     
     def generate_html_report(self):
@@ -406,19 +464,11 @@ class IndexAnalyzer:
         temp_chart_path = self.create_temperature_gauge(percentile, index_name, index_code)
         temp_chart_name = os.path.basename(temp_chart_path)
         
-        top_stocks = []
-        if components_df is not None and not components_df.empty:
-            components_df = components_df.head(10)
-            for idx, row in components_df.iterrows():
-                stock_code = str(row[0]) if len(row) > 0 else "N/A"
-                stock_name = str(row[1]) if len(row) > 1 else "N/A"
-                top_stocks.append((stock_code, stock_name))
+        top_stocks = top_components(components_df, 10, missing="N/A").pairs()
         
-        recent_data = []
-        if history_df is not None and not history_df.empty:
-            recent_data = history_df.tail(10)[['日期', '收盘', '涨跌幅']].values.tolist()
+        recent_data = recent_rows(history_df, 10)
         
-        template = Template(self.generate_html_report())
+        template = get_template('index_analyzer_v2/report.html', self.generate_html_report)
         html_content = template.render(
             index_name=index_name,
             index_code=index_code,
@@ -429,7 +479,7 @@ class IndexAnalyzer:
             three_year_low=f"{three_year_low:.2f}",
             three_year_avg=f"{three_year_avg:.2f}",
             top_stocks=top_stocks,
-            recent_data=[[str(row[0]), f"{row[1]:.2f}", f"{row[2]:.2f}" if pd.notna(row[2]) else "N/A"] for row in recent_data],
+            recent_data=recent_data,
             generate_time=datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         )
         
@@ -1,27 +1,20 @@
 """
 整理中证指数数据并映射行业估值
+
+Excel 文件首次读取后按文件内容哈希缓存为 pickle, 文件不变时后续运行直接加载;
+指数到行业类别的映射对名称列表逐个判断, 省去 Series.apply 的逐行开销
 """
 
-import pandas as pd
+import argparse
+import hashlib
 import os
-import numpy as np
-
-# 读取数据
-df_index = pd.read_excel('data/指数列表.xlsx')
-df_valuation = pd.read_excel('data/csi20260209_20260209230824.xls')
-
-# 整理指数数据
-df_index_clean = df_index.iloc[:, :3].copy()
-df_index_clean.columns = ['代码', '简称', '全称']
 
-# 整理行业估值 - 转换数值列
-df_valuation.columns = ['行业代码', '行业名称', '市盈率_静态', '股票数量', '变化', '市盈率_TTM', '市净率', '市销率', '股息率']
-
-# 转换为数值
-for col in ['市盈率_TTM', '市净率', '股息率']:
-    df_valuation[col] = pd.to_numeric(df_valuation[col], errors='coerce')
+import pandas as pd
 
-df_industry = df_valuation[df_valuation['行业代码'].astype(str).str.len() == 4].copy()
+INDEX_FILE = 'data/指数列表.xlsx'
+VALUATION_FILE = 'data/csi20260209_20260209230824.xls'
+OUTPUT_FILE = 'data/中证行业指数估值汇总.xlsx'
+CACHE_DIR = 'data/.cache'
 
 # 中证一级行业代码与行业类别映射
 industry_map = {
@@ -62,19 +55,6 @@ industry_map = {
     '6010': '房地产',
 }
 
-# 添加行业类别
-df_industry['行业类别'] = df_industry['行业代码'].astype(str).map(industry_map)
-
-# 计算行业类别平均估值
-df_industry_avg = df_industry.groupby('行业类别').agg({
-    '市盈率_TTM': 'mean',
-    '市净率': 'mean',
-    '股息率': 'mean'
-}).reset_index()
-
-print("=== 行业类别平均估值 ===")
-print(df_industry_avg.to_string(index=False))
-
 # 筛选中证一级行业指数
 keywords = ['能源', '材料', '工业', '制造', '可选消费', '必需消费', '食品', '饮料',
             '医药', '医疗', '卫生', '制药',
@@ -84,14 +64,45 @@ keywords = ['能源', '材料', '工业', '制造', '可选消费', '必需消
             '公用', '电力', '水务', '燃气',
             '房地产', '地产']
 
-df_csi = df_index_clean[
-    df_index_clean['全称'].str.contains('|'.join(keywords), na=False) &
-    df_index_clean['全称'].str.contains('中证', na=False) &
-    df_index_clean['全称'].str.contains('指数', na=False)
-].copy()
-
-# 手动映射指数到行业类别
-def map_to_industry(name):
+def file_digest(path):
+    """文件内容的 sha256, 用作缓存键"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_excel_cached(path, cache_dir=CACHE_DIR):
+    """读取 Excel 文件; 同一内容只解析一次, 之后从缓存目录中的 pickle 加载"""
+    if not cache_dir:
+        return pd.read_excel(path)
+    
+    stem = os.path.splitext(os.path.basename(path))[0]
+    cache_path = os.path.join(cache_dir, f"{stem}_{file_digest(path)[:16]}.pkl")
+    if os.path.exists(cache_path):
+        try:
+            return pd.read_pickle(cache_path)
+        except Exception as e:
+            print(f"缓存读取失败, 重新解析 {path}: {e}")
+    
+    df = pd.read_excel(path)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{cache_path}.tmp"
+        df.to_pickle(tmp_path)
+        os.replace(tmp_path, cache_path)
+        # 同一文件的旧版本缓存不再需要
+        for name in os.listdir(cache_dir):
+            if name.startswith(f"{stem}_") and name.endswith('.pkl') and os.path.join(cache_dir, name) != cache_path:
+                os.remove(os.path.join(cache_dir, name))
+    except OSError as e:
+        print(f"缓存写入失败: {e}")
+    return df
+
+
+def industry_of(name):
+    """按关键词把单个指数全称映射为行业类别, 先命中的类别优先, 未命中为 None"""
     name = str(name)
     if '能源' in name:
         return '能源'
@@ -117,22 +128,97 @@ def map_to_industry(name):
         return '房地产'
     return None
 
-df_csi['行业类别'] = df_csi['全称'].apply(map_to_industry)
-df_csi = df_csi[df_csi['行业类别'].notna()].copy()
-
-# 合并行业平均估值
-df_final = df_csi.merge(df_industry_avg, on='行业类别', how='left')
-
-# 选择并排序列
-df_result = df_final[['代码', '简称', '全称', '行业类别', '市盈率_TTM', '市净率', '股息率']].copy()
-df_result.columns = ['指数代码', '指数简称', '指数全称', '对应行业', '市盈率(TTM)', '市净率', '股息率(%)']
-
-# 按行业类别和代码排序
-df_result = df_result.sort_values(['对应行业', '指数代码']).reset_index(drop=True)
-
-print("\n=== 中证行业指数估值汇总 ===")
-print(df_result.to_string(index=False))
 
-# 保存
-df_result.to_excel('data/中证行业指数估值汇总.xlsx', index=False)
-print("\n已保存: data/中证行业指数估值汇总.xlsx")
+def map_to_industry(names):
+    """把一列指数全称映射为行业类别, 结果与 names.apply(industry_of) 相同
+    
+    纯 Python 的 in 判断已是最快的逐名称匹配方式 (正则/np.select/码点扫描都更慢),
+    这里只省去 Series.apply 的逐行调度开销
+    """
+    if not isinstance(names, pd.Series):
+        names = pd.Series(names, dtype=object)
+    return pd.Series(list(map(industry_of, names.tolist())), index=names.index, dtype=object)
+
+
+def load_index_list(path=INDEX_FILE, cache_dir=CACHE_DIR):
+    df_index = read_excel_cached(path, cache_dir)
+    df_index_clean = df_index.iloc[:, :3].copy()
+    df_index_clean.columns = ['代码', '简称', '全称']
+    return df_index_clean
+
+
+def load_industry_valuation(path=VALUATION_FILE, cache_dir=CACHE_DIR):
+    """读取中证行业估值文件, 返回各行业类别的平均估值"""
+    df_valuation = read_excel_cached(path, cache_dir).copy()
+    
+    # 整理行业估值 - 转换数值列
+    df_valuation.columns = ['行业代码', '行业名称', '市盈率_静态', '股票数量', '变化', '市盈率_TTM', '市净率', '市销率', '股息率']
+    
+    # 转换为数值
+    for col in ['市盈率_TTM', '市净率', '股息率']:
+        df_valuation[col] = pd.to_numeric(df_valuation[col], errors='coerce')
+    
+    df_industry = df_valuation[df_valuation['行业代码'].astype(str).str.len() == 4].copy()
+    
+    # 添加行业类别
+    df_industry['行业类别'] = df_industry['行业代码'].astype(str).map(industry_map)
+    
+    # 计算行业类别平均估值
+    return df_industry.groupby('行业类别').agg({
+        '市盈率_TTM': 'mean',
+        '市净率': 'mean',
+        '股息率': 'mean'
+    }).reset_index()
+
+
+def build_summary(df_index_clean, df_industry_avg):
+    """筛选中证行业指数并合并所属行业的平均估值"""
+    df_csi = df_index_clean[
+        df_index_clean['全称'].str.contains('|'.join(keywords), na=False) &
+        df_index_clean['全称'].str.contains('中证', na=False) &
+        df_index_clean['全称'].str.contains('指数', na=False)
+    ].copy()
+    
+    df_csi['行业类别'] = map_to_industry(df_csi['全称'])
+    df_csi = df_csi[df_csi['行业类别'].notna()].copy()
+    
+    # 合并行业平均估值
+    df_final = df_csi.merge(df_industry_avg, on='行业类别', how='left')
+    
+    # 选择并排序列
+    df_result = df_final[['代码', '简称', '全称', '行业类别', '市盈率_TTM', '市净率', '股息率']].copy()
+    df_result.columns = ['指数代码', '指数简称', '指数全称', '对应行业', '市盈率(TTM)', '市净率', '股息率(%)']
+    
+    # 按行业类别和代码排序
+    return df_result.sort_values(['对应行业', '指数代码']).reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='整理中证指数数据并映射行业估值')
+    parser.add_argument('--index-file', default=INDEX_FILE)
+    parser.add_argument('--valuation-file', default=VALUATION_FILE)
+    parser.add_argument('--output', default=OUTPUT_FILE)
+    parser.add_argument('--cache-dir', default=CACHE_DIR, help='Excel 解析结果缓存目录')
+    parser.add_argument('--no-cache', action='store_true', help='每次重新解析 Excel 文件')
+    args = parser.parse_args()
+    cache_dir = None if args.no_cache else args.cache_dir
+    
+    # 读取数据
+    df_index_clean = load_index_list(args.index_file, cache_dir)
+    df_industry_avg = load_industry_valuation(args.valuation_file, cache_dir)
+    
+    print("=== 行业类别平均估值 ===")
+    print(df_industry_avg.to_string(index=False))
+    
+    df_result = build_summary(df_index_clean, df_industry_avg)
+    
+    print("\n=== 中证行业指数估值汇总 ===")
+    print(df_result.to_string(index=False))
+    
+    # 保存
+    df_result.to_excel(args.output, index=False)
+    print(f"\n已保存: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -31,12 +31,14 @@ if ($RefreshData) {
     python backend/scripts/refresh_data.py
 }
 
-Write-Host "[4/4] Starting backend and frontend..."
+Write-Host "[4/4] Starting backend, refresh worker and frontend..."
 
 $backendCmd = "Set-Location -LiteralPath `"$Root`"; python -m uvicorn app.main:app --app-dir backend --reload --host 127.0.0.1 --port 8000"
+$workerCmd = "Set-Location -LiteralPath `"$Root`"; python backend/scripts/refresh_worker.py"
 $frontendCmd = "Set-Location -LiteralPath `"$FrontendDir`"; npm.cmd run dev"
 
 Start-Process -FilePath "powershell.exe" -ArgumentList "-NoExit", "-Command", $backendCmd | Out-Null
+Start-Process -FilePath "powershell.exe" -ArgumentList "-NoExit", "-Command", $workerCmd | Out-Null
 Start-Sleep -Seconds 1
 Start-Process -FilePath "powershell.exe" -ArgumentList "-NoExit", "-Command", $frontendCmd | Out-Null
 
@@ -45,4 +47,4 @@ Write-Host "Started:"
 Write-Host "- Backend:  http://127.0.0.1:8000/health"
 Write-Host "- Frontend: http://127.0.0.1:5173"
 Write-Host ""
-Write-Host "Tip: close the two opened PowerShell windows to stop the app."
+Write-Host "Tip: close the three opened PowerShell windows to stop the app."
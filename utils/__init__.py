@@ -3,13 +3,21 @@ A股板块分析器工具包
 """
 
 from .data_fetcher import DataFetcher, calculate_percentile, get_color_by_percentile
+from .etf_cache import EtfMemo
 from .percentile_analyzer import PercentileAnalyzer
 from .html_generator import HTMLGenerator
+from .plotly_assets import ensure_plotly_bundle, write_figure_html
+from .templates import configure_template_cache, get_template
 
 __all__ = [
     'DataFetcher',
+    'EtfMemo',
     'calculate_percentile',
     'get_color_by_percentile',
     'PercentileAnalyzer',
-    'HTMLGenerator'
+    'HTMLGenerator',
+    'ensure_plotly_bundle',
+    'write_figure_html',
+    'configure_template_cache',
+    'get_template'
 ]
@@ -7,11 +7,21 @@
 import tushare as ts
 import akshare as ak
 import pandas as pd
-import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
+from pathlib import Path
 import logging
-import time
+import sys
+
+BACKEND_DIR = Path(__file__).resolve().parents[1] / "backend"
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from app.services.analytics import calculate_percentile as history_percentile
+from app.services.rate_limit import configure_upstreams, guarded_call
+
+from .etf_cache import EtfMemo
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -21,7 +31,17 @@ class DataFetcher:
     def __init__(self, config: dict):
         self.config = config
         self.history_years = config.get('data', {}).get('history_years', 5)
+        # 并发获取的线程数, 1 为逐个串行获取; 上游请求统一经过限流器, 并发不会突破限速
+        self.fetch_workers = max(1, int(config.get('data', {}).get('fetch_workers', 1) or 1))
+        # 同一ETF在多个板块中重复出现时, 行情/估值/持仓当天只请求一次; 配置目录后跨运行复用
+        self.etf_memo = EtfMemo(config.get('data', {}).get('etf_cache_dir'))
+        tushare_config = config.get('tushare', {}) or {}
+        # 批量模式: 多个指数代码合并为一次 index_daily 请求, 单次返回行数不超过 bulk_max_rows
+        self.tushare_bulk = bool(tushare_config.get('bulk', True))
+        self.tushare_bulk_max_rows = int(tushare_config.get('bulk_max_rows', 8000))
+        self._tushare_prefetched: Dict[str, pd.DataFrame] = {}
         self.pro = None
+        configure_upstreams(config.get('upstream'))
         self._init_data_source()
     
     def _init_data_source(self):
@@ -64,11 +84,10 @@ class DataFetcher:
             if self.pro:
                 ts_code = self._get_index_code_tushare(sector_code)
                 try:
-                    df = self.pro.index_daily(
-                        ts_code=ts_code,
-                        start_date=start_date.replace('-', ''),
-                        end_date=end_date.replace('-', '')
-                    )
+                    if ts_code in self._tushare_prefetched:
+                        df = self._tushare_prefetched[ts_code].copy()
+                    else:
+                        df = self._tushare_index_daily([ts_code], start_date, end_date)
                     if df is not None and not df.empty:
                         df = df.sort_values('trade_date')
                         df['close'] = pd.to_numeric(df['close'], errors='coerce')
@@ -97,11 +116,64 @@ class DataFetcher:
             logger.error(f"获取 {sector_name} 数据失败: {e}")
             return self._get_sector_backup(sector_code, sector_name, index_name)
     
+    def _tushare_index_daily(self, ts_codes: List[str], start_date: str, end_date: str) -> Optional[pd.DataFrame]:
+        return guarded_call(
+            "tushare",
+            self.pro.index_daily,
+            ts_code=','.join(ts_codes),
+            start_date=start_date.replace('-', ''),
+            end_date=end_date.replace('-', '')
+        )
+    
+    def prefetch_tushare_indices(self, sectors_config: List[Dict]):
+        """按返回行数上限把所有板块指数代码分组批量请求, 结果按代码拆分供 get_sector_indices 使用"""
+        if not self.pro or not self.tushare_bulk:
+            return
+        
+        ts_codes = list(dict.fromkeys(
+            self._get_index_code_tushare(sector.get('code')) for sector in sectors_config if sector.get('code')
+        ))
+        ts_codes = [code for code in ts_codes if code not in self._tushare_prefetched]
+        if not ts_codes:
+            return
+        
+        start_date = (datetime.now() - timedelta(days=self.history_years*365)).strftime("%Y-%m-%d")
+        end_date = datetime.now().strftime("%Y-%m-%d")
+        # 每年约 245 个交易日, 留出余量估算单个指数的行数
+        rows_per_code = self.history_years * 250 + 10
+        per_request = max(1, self.tushare_bulk_max_rows // rows_per_code)
+        
+        requests = 0
+        for i in range(0, len(ts_codes), per_request):
+            requests += self._prefetch_tushare_chunk(ts_codes[i:i + per_request], start_date, end_date)
+        logger.info(f"Tushare批量获取 {len(ts_codes)} 个指数, 共 {requests} 次请求")
+    
+    def _prefetch_tushare_chunk(self, ts_codes: List[str], start_date: str, end_date: str) -> int:
+        try:
+            df = self._tushare_index_daily(ts_codes, start_date, end_date)
+        except Exception as e:
+            # 未缓存的代码在 get_sector_indices 中逐个请求
+            logger.warning(f"Tushare批量获取失败 {','.join(ts_codes)}: {e}")
+            return 1
+        
+        if df is not None and len(df) >= self.tushare_bulk_max_rows and len(ts_codes) > 1:
+            # 结果可能被截断, 拆成两半重新请求
+            middle = len(ts_codes) // 2
+            return 1 + self._prefetch_tushare_chunk(ts_codes[:middle], start_date, end_date) + \
+                self._prefetch_tushare_chunk(ts_codes[middle:], start_date, end_date)
+        
+        # 批量结果中缺失的代码不缓存, 由 get_sector_indices 逐个请求 Tushare
+        if df is not None and not df.empty and 'ts_code' in df.columns:
+            for code, group in df.groupby('ts_code', sort=False):
+                if code in ts_codes:
+                    self._tushare_prefetched[code] = group.reset_index(drop=True)
+        return 1
+    
     def _get_from_akshare(self, sector_code: str, sector_name: str, index_name: str, start_date: str, end_date: str) -> Dict:
         """使用akshare获取指数数据"""
         try:
             bs_code = self._get_stock_code(sector_code)
-            rs = ak.stock_zh_index_daily(symbol=bs_code.replace('sh.', '').replace('sz.', ''))
+            rs = guarded_call("sina", ak.stock_zh_index_daily, symbol=bs_code.replace('sh.', '').replace('sz.', ''))
             
             if rs is not None and not rs.empty:
                 rs['close'] = pd.to_numeric(rs['close'], errors='coerce')
@@ -137,66 +209,66 @@ class DataFetcher:
             'mean': 0
         }
     
+    def _fetch_etf_quote(self, code: str) -> Dict:
+        bs_code = self._get_stock_code(code)
+        symbol = bs_code.replace('sh.', '').replace('sz.', '')
+        
+        try:
+            df = guarded_call(
+                "eastmoney",
+                ak.fund_etf_hist_em,
+                symbol=symbol,
+                period="daily",
+                start_date=(datetime.now() - timedelta(days=30)).strftime("%Y%m%d"),
+                end_date=datetime.now().strftime("%Y%m%d"),
+                adjust="qfq"
+            )
+            
+            if df is not None and not df.empty:
+                df['close'] = pd.to_numeric(df['close'], errors='coerce')
+                df['pct_chg'] = pd.to_numeric(df.get('pct_chg', 0), errors='coerce')
+                
+                return {
+                    'price': float(df['close'].iloc[-1]),
+                    'change': float(df['pct_chg'].iloc[-1]) if 'pct_chg' in df.columns else 0
+                }
+        except Exception as e:
+            logger.warning(f"获取ETF {code} 数据失败: {e}")
+        
+        return {'price': 0, 'change': 0}
+    
     def get_etf_info(self, etf_list: List[Dict]) -> List[Dict]:
         result = []
         for etf in etf_list:
             code = etf.get('code', '')
             name = etf.get('name', '')
             
-            try:
-                logger.info(f"正在获取ETF {name} ({code}) 信息...")
-                
-                bs_code = self._get_stock_code(code)
-                symbol = bs_code.replace('sh.', '').replace('sz.', '')
-                
-                try:
-                    df = ak.fund_etf_hist_em(
-                        symbol=symbol,
-                        period="daily",
-                        start_date=(datetime.now() - timedelta(days=30)).strftime("%Y%m%d"),
-                        end_date=datetime.now().strftime("%Y%m%d"),
-                        adjust="qfq"
-                    )
-                    
-                    if df is not None and not df.empty:
-                        df['close'] = pd.to_numeric(df['close'], errors='coerce')
-                        df['pct_chg'] = pd.to_numeric(df.get('pct_chg', 0), errors='coerce')
-                        
-                        result.append({
-                            'code': code,
-                            'name': name,
-                            'price': float(df['close'].iloc[-1]),
-                            'change': float(df['pct_chg'].iloc[-1]) if 'pct_chg' in df.columns else 0
-                        })
-                        time.sleep(0.3)
-                        continue
-                except Exception as e:
-                    logger.warning(f"获取ETF {code} 数据失败: {e}")
-                
-                result.append({
-                    'code': code,
-                    'name': name,
-                    'price': 0,
-                    'change': 0
-                })
-                time.sleep(0.3)
-                
-            except Exception as e:
-                logger.warning(f"获取ETF {name} 信息失败: {e}")
-                result.append({
-                    'code': code,
-                    'name': name,
-                    'price': 0,
-                    'change': 0
-                })
+            logger.info(f"正在获取ETF {name} ({code}) 信息...")
+            quote = self.etf_memo.get_or_fetch(
+                'quote',
+                code,
+                lambda: self._fetch_etf_quote(code),
+                persist_if=lambda q: bool(q.get('price'))
+            )
+            result.append({'code': code, 'name': name, **quote})
         
         return result
     
     def get_etf_valuation(self, etf_code: str) -> Dict:
+        return self.etf_memo.get_or_fetch('valuation', etf_code, lambda: self._fetch_etf_valuation(etf_code))
+    
+    def _fetch_etf_valuation(self, etf_code: str) -> Dict:
         logger.info(f"正在获取ETF {etf_code} 估值数据...")
         return {}
     
     def get_etf_holdings(self, etf_code: str, top_n: int = 10) -> List[Dict]:
+        return self.etf_memo.get_or_fetch(
+            f'holdings:{top_n}',
+            etf_code,
+            lambda: self._fetch_etf_holdings(etf_code, top_n)
+        )
+    
+    def _fetch_etf_holdings(self, etf_code: str, top_n: int = 10) -> List[Dict]:
         try:
             logger.info(f"正在获取ETF {etf_code} 持仓数据...")
             
@@ -206,7 +278,7 @@ class DataFetcher:
             
             try:
                 import akshare.fund as fund
-                df = fund.fund_portfolio_em(symbol=symbol)
+                df = guarded_call("eastmoney", fund.fund_portfolio_em, symbol=symbol)
                 if df is not None and not df.empty:
                     holdings = []
                     df = df.head(top_n)
@@ -226,7 +298,32 @@ class DataFetcher:
             logger.error(f"获取ETF {etf_code} 持仓失败: {e}")
             return []
     
+    def _get_etf_detail(self, etf_config: Dict) -> Dict:
+        """单只ETF的行情、估值与持仓"""
+        etf = self.get_etf_info([etf_config])[0]
+        etf_code = etf.get('code')
+        valuation = self.get_etf_valuation(etf_code)
+        holdings = self.get_etf_holdings(etf_code)
+
+        etf.update({
+            'pe': valuation.get('pe'),
+            'pb': valuation.get('pb'),
+            'holdings': holdings
+        })
+        return etf
+
     def get_all_sector_data(self, sectors_config: List[Dict]) -> List[Dict]:
+        self.prefetch_tushare_indices(sectors_config)
+        if self.fetch_workers > 1:
+            all_data = self._get_all_sector_data_concurrent(sectors_config)
+        else:
+            all_data = self._get_all_sector_data_serial(sectors_config)
+        
+        self.etf_memo.save()
+        logger.info(f"ETF请求缓存: 命中 {self.etf_memo.hits} 次, 实际请求 {self.etf_memo.misses} 次")
+        return all_data
+
+    def _get_all_sector_data_serial(self, sectors_config: List[Dict]) -> List[Dict]:
         all_data = []
         
         for sector in sectors_config:
@@ -240,36 +337,43 @@ class DataFetcher:
             logger.info(f"{'='*50}")
             
             sector_data = self.get_sector_indices(sector_code, sector_name, index_name)
-            etf_list = self.get_etf_info(etf_configs)
-            
-            for etf in etf_list:
-                etf_code = etf.get('code')
-                valuation = self.get_etf_valuation(etf_code)
-                holdings = self.get_etf_holdings(etf_code)
-                
-                etf.update({
-                    'pe': valuation.get('pe'),
-                    'pb': valuation.get('pb'),
-                    'holdings': holdings
-                })
-            
-            sector_data['etfs'] = etf_list
+            sector_data['etfs'] = [self._get_etf_detail(etf_config) for etf_config in etf_configs]
             all_data.append(sector_data)
-            
-            time.sleep(0.5)
         
         return all_data
 
+    def _get_all_sector_data_concurrent(self, sectors_config: List[Dict]) -> List[Dict]:
+        """板块指数与每只ETF的请求同时提交到线程池, 结果按配置顺序组装, 与串行输出一致"""
+        logger.info(f"并发获取 {len(sectors_config)} 个板块数据 (workers={self.fetch_workers})")
+        with ThreadPoolExecutor(max_workers=self.fetch_workers, thread_name_prefix="fetch") as pool:
+            sector_futures = [
+                pool.submit(
+                    self.get_sector_indices,
+                    sector.get('code'),
+                    sector.get('name'),
+                    sector.get('index_name', '')
+                )
+                for sector in sectors_config
+            ]
+            etf_futures = [
+                [pool.submit(self._get_etf_detail, etf_config) for etf_config in sector.get('etf', [])]
+                for sector in sectors_config
+            ]
+
+            all_data = []
+            for sector_future, futures in zip(sector_futures, etf_futures):
+                sector_data = sector_future.result()
+                sector_data['etfs'] = [future.result() for future in futures]
+                all_data.append(sector_data)
+
+        return all_data
+
 
 def calculate_percentile(current: float, historical: List[float]) -> float:
-    if not historical or len(historical) < 2:
+    if historical is None or len(historical) < 2:
         return 50.0
-    
-    historical_array = np.array(historical)
-    below_count = np.sum(historical_array < current)
-    percentile = (below_count / len(historical_array)) * 100
-    
-    return min(100, max(0, percentile))
+    # 严格小于当前值的比例, 与后端 analytics 共用同一向量化实现
+    return history_percentile(current, historical, inclusive=False, decimals=None)
 
 
 def get_color_by_percentile(percentile: float, config: dict) -> str:
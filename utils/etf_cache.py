@@ -0,0 +1,110 @@
+"""
+ETF请求记忆化模块
+同一次运行中相同 (方法, ETF代码, 日期) 的请求只访问一次网络,
+并发线程同时请求同一个键时, 后到的线程等待先到线程的结果;
+配置缓存目录后, 当日成功的结果会保存到磁盘, 供同一天的后续运行直接复用
+"""
+
+import copy
+import logging
+import pickle
+import threading
+from concurrent.futures import Future
+from datetime import date
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CacheKey = Tuple[str, str, str]
+
+
+class EtfMemo:
+    def __init__(self, cache_dir: Optional[str] = None, today: Optional[date] = None):
+        self.day = (today or date.today()).isoformat()
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self._lock = threading.Lock()
+        self._values: Dict[CacheKey, Any] = {}
+        self._in_flight: Dict[CacheKey, Future] = {}
+        self._persistable: set = set()
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    @property
+    def _path(self) -> Optional[Path]:
+        return self.cache_dir / f"etf_memo_{self.day}.pkl" if self.cache_dir else None
+
+    def _load(self):
+        path = self._path
+        if path is None or not path.exists():
+            return
+        try:
+            with path.open('rb') as f:
+                stored = pickle.load(f)
+        except Exception as e:
+            logger.warning(f"ETF缓存文件读取失败, 忽略: {path} ({e})")
+            return
+        if isinstance(stored, dict):
+            self._values.update(stored)
+            self._persistable.update(stored.keys())
+            logger.info(f"已加载ETF缓存 {len(stored)} 条: {path}")
+
+    def get_or_fetch(
+        self,
+        method: str,
+        code: str,
+        fetch: Callable[[], Any],
+        persist_if: Callable[[Any], bool] = bool,
+    ) -> Any:
+        """返回缓存结果的副本; persist_if 为真的结果才会写入磁盘 (失败结果只在本次运行内复用)"""
+        key = (method, str(code), self.day)
+        with self._lock:
+            if key in self._values:
+                self.hits += 1
+                return copy.deepcopy(self._values[key])
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight[key] = future
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if not owner:
+            return copy.deepcopy(future.result())
+
+        try:
+            value = fetch()
+        except BaseException as e:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            future.set_exception(e)
+            raise
+        with self._lock:
+            self._values[key] = value
+            if persist_if(value):
+                self._persistable.add(key)
+            self._in_flight.pop(key, None)
+        future.set_result(value)
+        return copy.deepcopy(value)
+
+    def save(self):
+        path = self._path
+        if path is None:
+            return
+        with self._lock:
+            stored = {key: self._values[key] for key in self._persistable if key in self._values}
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix('.tmp')
+            with tmp.open('wb') as f:
+                pickle.dump(stored, f, protocol=pickle.HIGHEST_PROTOCOL)
+            tmp.replace(path)
+            # 只保留当天的缓存文件
+            for stale in path.parent.glob('etf_memo_*.pkl'):
+                if stale != path:
+                    stale.unlink()
+        except OSError as e:
+            logger.warning(f"ETF缓存文件保存失败: {path} ({e})")
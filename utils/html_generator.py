@@ -8,6 +8,20 @@ from datetime import datetime
 from typing import Dict, List
 from jinja2 import Template
 import json
+import numpy as np
+import pandas as pd
+from pathlib import Path
+import sys
+
+BACKEND_DIR = Path(__file__).resolve().parents[1] / "backend"
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from app.services.analytics import calculate_percentile as history_percentile
+
+from .templates import configure_template_cache, get_template
+
+REPORT_TEMPLATE = 'html_generator/report.html'
 
 
 class HTMLGenerator:
@@ -16,6 +30,7 @@ class HTMLGenerator:
         self.output_dir = config.get('output', {}).get('output_dir', './output')
         self.colors = config.get('colors', {})
         self.percentile_config = config.get('percentile', {})
+        configure_template_cache(config.get('output', {}).get('template_cache_dir'))
 
         os.makedirs(self.output_dir, exist_ok=True)
 
@@ -72,25 +87,19 @@ class HTMLGenerator:
             if data is None or (isinstance(data, dict) and not data):
                 return 50.0
             
-            import pandas as pd
-            
             if isinstance(data, pd.DataFrame):
                 if 'close' not in data.columns or data.empty:
                     return 50.0
-                close_data = data['close'].dropna().tolist()
+                close_data = data['close'].dropna().to_numpy(dtype=float)
             elif isinstance(data, dict):
-                close_data = data.get('close', [])
+                close_data = np.asarray(data.get('close', []), dtype=float)
             else:
                 return 50.0
             
-            if not close_data or len(close_data) < 2:
+            if len(close_data) < 2:
                 return 50.0
             
-            current = float(close_data[-1])
-            below_count = sum(1 for price in close_data if float(price) < current)
-            percentile = (below_count / len(close_data)) * 100 if close_data else 50.0
-            
-            return round(percentile, 2)
+            return history_percentile(close_data[-1], close_data, inclusive=False)
         except Exception as e:
             return 50.0
 
@@ -121,6 +130,10 @@ class HTMLGenerator:
         return f"{num:.{decimals}f}" if isinstance(num, float) else str(num)
 
     def _get_html_template(self) -> Template:
+        return get_template(REPORT_TEMPLATE, self._get_html_template_source)
+
+    @staticmethod
+    def _get_html_template_source() -> str:
         template_str = """
 <!DOCTYPE html>
 <html lang="zh-CN">
@@ -621,4 +634,4 @@ class HTMLGenerator:
 </body>
 </html>
 """
-        return Template(template_str)
+        return template_str
@@ -7,6 +7,14 @@ import pandas as pd
 import numpy as np
 from typing import Dict, List, Tuple
 import logging
+from pathlib import Path
+import sys
+
+BACKEND_DIR = Path(__file__).resolve().parents[1] / "backend"
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+from app.services.analytics import calculate_percentile as history_percentile
 
 logger = logging.getLogger(__name__)
 
@@ -19,14 +27,10 @@ class PercentileAnalyzer:
         self.colors = config.get('colors', {})
 
     def calculate_percentile(self, current_value: float, historical_values: List[float]) -> float:
-        if not historical_values or len(historical_values) < 2:
+        if historical_values is None or len(historical_values) < 2:
             return 50.0
 
-        historical = np.array(historical_values)
-        below_count = np.sum(historical < current_value)
-        percentile = (below_count / len(historical)) * 100
-
-        return min(100, max(0, percentile))
+        return history_percentile(current_value, historical_values, inclusive=False, decimals=None)
 
     def get_percentile_category(self, percentile: float) -> str:
         if percentile < self.low_threshold:
@@ -60,7 +64,7 @@ class PercentileAnalyzer:
                 }
 
             current_price = data['close'].iloc[-1]
-            historical_prices = data['close'].tolist()
+            historical_prices = data['close'].to_numpy(dtype=float, na_value=np.nan)
 
             percentile = self.calculate_percentile(current_price, historical_prices)
             category = self.get_percentile_category(percentile)
@@ -102,21 +106,27 @@ class PercentileAnalyzer:
         return temperature_data
 
     def get_summary_statistics(self, sector_data_list: List[Dict]) -> Dict:
-        temperature_data = self.generate_temperature_data(sector_data_list)
+        return self.summarize(self.generate_temperature_data(sector_data_list))
 
-        total = len(temperature_data)
-        low_count = sum(1 for d in temperature_data if d['category'] == 'low')
-        normal_count = sum(1 for d in temperature_data if d['category'] == 'normal')
-        high_count = sum(1 for d in temperature_data if d['category'] == 'high')
+    def summarize(self, temperature_data: List[Dict]) -> Dict:
+        """由 generate_temperature_data 的结果汇总统计, 已分析过的数据不再重复计算"""
+        counts = {'low': 0, 'normal': 0, 'high': 0}
+        percentile_sum = 0.0
+        for d in temperature_data:
+            counts[d['category']] = counts.get(d['category'], 0) + 1
+            percentile_sum += d['percentile']
 
-        avg_percentile = np.mean([d['percentile'] for d in temperature_data])
+        total = len(temperature_data)
+        low_count = counts['low']
+        normal_count = counts['normal']
+        high_count = counts['high']
 
         return {
             'total_sectors': total,
             'low_valuation': low_count,
             'normal_valuation': normal_count,
             'high_valuation': high_count,
-            'average_percentile': round(avg_percentile, 2),
+            'average_percentile': round(percentile_sum / total, 2) if total > 0 else 0,
             'low_percentage': round(low_count / total * 100, 2) if total > 0 else 0,
             'normal_percentage': round(normal_count / total * 100, 2) if total > 0 else 0,
             'high_percentage': round(high_count / total * 100, 2) if total > 0 else 0
@@ -0,0 +1,47 @@
+"""
+Plotly 图表输出模块
+默认模式下每个输出目录只写一份 plotly.js, 各图表 HTML 通过 <script src> 引用它,
+单个图表文件只有几 KB, 不再各自内嵌数 MB 的 plotly.js;
+文件名带 plotly 版本号, 升级 plotly 后会写入新版本文件, 不会沿用旧的 plotly.js
+"""
+
+import os
+import threading
+
+import plotly
+from plotly.offline import get_plotlyjs
+
+PLOTLY_BUNDLE = f'plotly-{plotly.__version__}.min.js'
+
+# shared: 输出目录内共用一份本地 plotly.js (可离线查看); cdn: 从 CDN 加载; inline: 每个文件内嵌完整 plotly.js
+PLOTLY_JS_MODES = ('shared', 'cdn', 'inline')
+
+_lock = threading.Lock()
+
+
+def ensure_plotly_bundle(output_dir: str) -> str:
+    """输出目录中没有当前版本的 plotly.js 时写入一份, 返回其路径"""
+    bundle_path = os.path.join(output_dir, PLOTLY_BUNDLE)
+    with _lock:
+        if not os.path.exists(bundle_path):
+            os.makedirs(output_dir, exist_ok=True)
+            # 先写临时文件再替换, 多个进程同时写入时也不会留下不完整的文件
+            tmp_path = f"{bundle_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(get_plotlyjs())
+            os.replace(tmp_path, bundle_path)
+    return bundle_path
+
+
+def write_figure_html(fig, html_path: str, plotly_js: str = 'shared') -> str:
+    """按 plotly_js 模式把图表写成 HTML 文件"""
+    if plotly_js not in PLOTLY_JS_MODES:
+        raise ValueError(f"未知的 plotly_js 模式: {plotly_js}, 可选 {', '.join(PLOTLY_JS_MODES)}")
+    if plotly_js == 'shared':
+        ensure_plotly_bundle(os.path.dirname(html_path) or '.')
+        fig.write_html(html_path, include_plotlyjs=PLOTLY_BUNDLE)
+    elif plotly_js == 'cdn':
+        fig.write_html(html_path, include_plotlyjs='cdn')
+    else:
+        fig.write_html(html_path)
+    return html_path
@@ -0,0 +1,49 @@
+"""
+HTML模板缓存模块
+所有报告模板共用一个 jinja2 Environment, 每个模板只解析/编译一次并缓存在进程内;
+配置字节码缓存目录后, 编译结果保存到磁盘, 后续运行跳过编译
+"""
+
+import logging
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from jinja2 import Environment, FileSystemBytecodeCache, FunctionLoader, Template
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_sources: Dict[str, Callable[[], str]] = {}
+
+
+def _load_source(name: str) -> Optional[str]:
+    factory = _sources.get(name)
+    return factory() if factory is not None else None
+
+
+# 默认参数与 jinja2.Template(source) 使用的环境一致, 渲染结果不变
+_environment = Environment(loader=FunctionLoader(_load_source), cache_size=-1)
+
+
+def configure_template_cache(cache_dir: Optional[str]):
+    """设置模板字节码缓存目录, 为空时只在进程内缓存"""
+    with _lock:
+        if not cache_dir:
+            _environment.bytecode_cache = None
+            return
+        path = Path(cache_dir)
+        try:
+            path.mkdir(parents=True, exist_ok=True)
+        except OSError as e:
+            logger.warning(f"模板缓存目录创建失败, 不使用字节码缓存: {path} ({e})")
+            _environment.bytecode_cache = None
+            return
+        _environment.bytecode_cache = FileSystemBytecodeCache(str(path))
+
+
+def get_template(name: str, source: Callable[[], str]) -> Template:
+    """按名称返回已编译的模板; source 只在首次使用该名称时调用"""
+    with _lock:
+        _sources.setdefault(name, source)
+        return _environment.get_template(name)